@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+LivePortrait ONNX Runtime backend check: PyTorch parity and per-module CPU latency.
+
+Loads the PyTorch pipeline, exports the generator modules to ONNX (or reuses the
+files cached in MODEL_DIR/liveportrait/onnx) and runs every module on both
+backends with the same inputs. Prints the relative output error (batch 1 and
+ONNX_PARITY_BATCH) and best-of-N latency per module and thread count; also times a
+full warp_decode frame.
+
+Run inside the liveportrait container on a CPU node:
+    CUDA_VISIBLE_DEVICES= python3 /app/benchmark_onnx.py --threads 2 4 8 --tolerance 1e-3
+"""
+
+import argparse
+import logging
+import sys
+import time
+
+import torch
+
+sys.path.insert(0, "/app/LivePortrait")
+
+import liveportrait_service
+from liveportrait_service import (
+    ONNX_MODULES,
+    ONNX_PARITY_BATCH,
+    _batched_inputs,
+    _download_models,
+    _load_pipeline,
+    _onnx_example_inputs,
+    _onnx_modules,
+    _relative_error,
+)
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def call(module, name: str, inputs: tuple):
+    input_names = ONNX_MODULES[name][1]
+    if len(input_names) == 1:
+        return module(*inputs)
+    return module(**dict(zip(input_names, inputs)))
+
+
+def best_ms(fn, repeats: int) -> float:
+    """Best-of-N wall time in ms (after one warm-up call)."""
+    fn()
+    best = float("inf")
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, nargs="+", default=[liveportrait_service.ONNX_THREADS])
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--tolerance", type=float, default=liveportrait_service.ONNX_TOLERANCE,
+                        help="Fail (exit 1) if any module's relative error exceeds this")
+    args = parser.parse_args()
+
+    if liveportrait_service.DEVICE != "cpu":
+        raise SystemExit("ONNX backend is CPU-only (set CUDA_VISIBLE_DEVICES=)")
+
+    _download_models()
+    wrapper = _load_pipeline().live_portrait_wrapper
+    examples = _onnx_example_inputs(wrapper)
+    batched = {name: _batched_inputs(inputs, ONNX_PARITY_BATCH) for name, inputs in examples.items()}
+    torch_modules = {name: getattr(wrapper, name) for name in ONNX_MODULES}
+
+    failed = False
+    for threads in args.threads:
+        torch.set_num_threads(threads)
+        with torch.no_grad():
+            torch_ms = {name: best_ms(lambda n=name: call(torch_modules[n], n, examples[n]), args.repeats)
+                        for name in ONNX_MODULES}
+        onnx_modules = _onnx_modules(wrapper, threads=threads)
+
+        print()
+        print(f"threads={threads}")
+        print(f"{'module':<30} {'torch ms':>9} {'onnx ms':>9} {'speedup':>8} {'rel err':>9} "
+              f"{f'err b{ONNX_PARITY_BATCH}':>9}")
+        for name in ONNX_MODULES:
+            if name not in onnx_modules:
+                print(f"{name:<30} {torch_ms[name]:>9.1f} {'export failed':>28}")
+                failed = True
+                continue
+            onnx_module, error = onnx_modules[name]
+            onnx_ms = best_ms(lambda: call(onnx_module, name, examples[name]), args.repeats)
+            with torch.no_grad():
+                batch_error = _relative_error(
+                    call(torch_modules[name], name, batched[name]), call(onnx_module, name, batched[name])
+                )
+            flag = "" if max(error, batch_error) <= args.tolerance else "  FAIL"
+            failed |= max(error, batch_error) > args.tolerance
+            print(f"{name:<30} {torch_ms[name]:>9.1f} {onnx_ms:>9.1f} "
+                  f"{torch_ms[name] / onnx_ms:>7.2f}x {error:>9.2e} {batch_error:>9.2e}{flag}")
+
+        # Full per-frame hot path: warp_decode on both backends
+        feature_3d, kp_source, kp_driving = examples["warping_module"]
+        with torch.no_grad():
+            frame_torch = best_ms(lambda: wrapper.warp_decode(feature_3d, kp_source, kp_driving), args.repeats)
+            for name, (onnx_module, _) in onnx_modules.items():
+                setattr(wrapper, name, onnx_module)
+            frame_onnx = best_ms(lambda: wrapper.warp_decode(feature_3d, kp_source, kp_driving), args.repeats)
+            for name, module in torch_modules.items():
+                setattr(wrapper, name, module)
+        print(f"{'warp_decode frame':<30} {frame_torch:>9.1f} {frame_onnx:>9.1f} {frame_torch / frame_onnx:>7.2f}x")
+
+    if failed:
+        print(f"\nFAIL: a module failed to export or differs from PyTorch by more than {args.tolerance}")
+        raise SystemExit(1)
+    print("\nOK")
+
+
+if __name__ == "__main__":
+    main()
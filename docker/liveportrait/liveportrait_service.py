@@ -13,16 +13,26 @@ Models: ~500MB PyTorch (.pth) + InsightFace ONNX (~300MB), cached in Docker volu
 import os
 import sys
 import io
+import json
+import uuid
+import asyncio
+import hashlib
 import logging
+import zipfile
+import subprocess
+import tempfile
+import threading
 import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
 
 import cv2
 import numpy as np
 import torch
-from fastapi import FastAPI, File, UploadFile, Form, HTTPException
-from fastapi.responses import Response
+from fastapi import FastAPI, File, UploadFile, Form, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
 import uvicorn
 
@@ -37,9 +47,153 @@ app = FastAPI(title="LivePortrait Service", version="1.0.0")
 DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
 MODEL_DIR = "/app/models"
 
+# Memory budget for cached source features (I_s, keypoints, 3D appearance features)
+SOURCE_CACHE_MB = int(os.getenv("SOURCE_CACHE_MB", "512"))
+# JPEG quality for rendered frames (render, batch, streaming); lower = smaller frames
+JPEG_QUALITY = int(os.getenv("JPEG_QUALITY", "90"))
+# Most expressions per warp_decode call in /api/render/batch (larger requests are chunked)
+RENDER_BATCH_SIZE = int(os.getenv("RENDER_BATCH_SIZE", "8"))
+# Frame streaming (WebSocket / MJPEG): default and maximum target fps
+STREAM_FPS = float(os.getenv("STREAM_FPS", "25"))
+STREAM_MAX_FPS = float(os.getenv("STREAM_MAX_FPS", "30"))
+# Lip-sync video (/render): frame rate, frames per warp_decode batch, ffmpeg binary
+LIPSYNC_FPS = int(os.getenv("LIPSYNC_FPS", "25"))
+LIPSYNC_BATCH_SIZE = int(os.getenv("LIPSYNC_BATCH_SIZE", "16"))
+# Frames quieter than the noise floor + this many dB keep the mouth closed
+LIPSYNC_GATE_DB = float(os.getenv("LIPSYNC_GATE_DB", "6"))
+FFMPEG_BIN = os.getenv("FFMPEG_BIN", "ffmpeg")
+# Face-centred crop via InsightFace (once per source image); 0 = resize the whole image
+FACE_CROP = os.getenv("FACE_CROP", "1") == "1"
+# Default for paste_back: composite the rendered face into the original image
+PASTE_BACK = os.getenv("PASTE_BACK", "1") == "1"
+# Generator backend on CPU nodes: "torch" (eager fp32) or "onnx" (ONNX Runtime sessions,
+# exported once to MODEL_DIR/liveportrait/onnx). Ignored on GPU.
+LIVEPORTRAIT_BACKEND = os.getenv("LIVEPORTRAIT_BACKEND", "torch")
+ONNX_THREADS = int(os.getenv("ONNX_THREADS", str(os.cpu_count() or 4)))
+ONNX_OPSET = int(os.getenv("ONNX_OPSET", "17"))
+# Max relative output difference vs PyTorch before a module falls back to PyTorch
+ONNX_TOLERANCE = float(os.getenv("ONNX_TOLERANCE", "1e-3"))
+# Parity is also checked at this batch size: batched warp_decode feeds the dynamic
+# batch axis, and a traced export can bake in the example's batch size of 1
+ONNX_PARITY_BATCH = 2
+
 # Global pipeline state
 pipeline = None
-source_cache = {}  # Cache processed source images by hash
+backend_status: Dict[str, str] = {}
+
+
+@dataclass
+class SourceFeatures:
+    """Everything the renderer needs from a source portrait, computed once.
+
+    With a detected face, img_rgb / M_c2o / paste_mask allow pasting rendered
+    crops back into the original image; they are None otherwise.
+    """
+    I_s: torch.Tensor
+    x_s_info: dict
+    f_s: torch.Tensor
+    x_s: torch.Tensor
+    nbytes: int
+    extract_ms: float
+    stages: Dict[str, float]
+    img_rgb: Optional[np.ndarray] = None
+    M_c2o: Optional[np.ndarray] = None
+    paste_mask: Optional[np.ndarray] = None
+
+
+def _tensor_bytes(*values) -> int:
+    total = 0
+    for value in values:
+        if isinstance(value, dict):
+            total += _tensor_bytes(*value.values())
+        elif isinstance(value, torch.Tensor):
+            total += value.numel() * value.element_size()
+        elif isinstance(value, np.ndarray):
+            total += value.nbytes
+    return total
+
+
+class SourceCache:
+    """Source features keyed by SHA-256 of the uploaded image bytes.
+
+    LRU eviction keeps the total tensor size under SOURCE_CACHE_MB. Registered
+    avatars map an id to a key and are never evicted.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, SourceFeatures]" = OrderedDict()
+        self._avatars: Dict[str, str] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(image_bytes: bytes) -> str:
+        return hashlib.sha256(image_bytes).hexdigest()
+
+    def get(self, key: str) -> Optional[SourceFeatures]:
+        with self._lock:
+            features = self._entries.get(key)
+            if features is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return features
+
+    def put(self, key: str, features: SourceFeatures):
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = features
+            self._bytes += features.nbytes
+            pinned = set(self._avatars.values())
+            for old_key in list(self._entries):
+                if self._bytes <= self.max_bytes:
+                    break
+                if old_key in pinned or old_key == key:
+                    continue
+                self._bytes -= self._entries.pop(old_key).nbytes
+                self.evictions += 1
+
+    def register(self, avatar_id: str, key: str):
+        with self._lock:
+            self._avatars[avatar_id] = key
+
+    def unregister(self, avatar_id: str) -> bool:
+        with self._lock:
+            # The features stay cached and become subject to normal LRU eviction
+            return self._avatars.pop(avatar_id, None) is not None
+
+    def avatar_key(self, avatar_id: str) -> Optional[str]:
+        return self._avatars.get(avatar_id)
+
+    def avatars(self) -> Dict[str, dict]:
+        with self._lock:
+            return {
+                avatar_id: {"key": key, "bytes": self._entries[key].nbytes if key in self._entries else 0}
+                for avatar_id, key in self._avatars.items()
+            }
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "avatars": len(self._avatars),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            }
+
+
+source_cache = SourceCache(SOURCE_CACHE_MB * 1024 * 1024)
 
 
 class HealthResponse(BaseModel):
@@ -48,6 +202,8 @@ class HealthResponse(BaseModel):
     gpu_name: Optional[str] = None
     model_loaded: bool
     device: str
+    backend: Optional[dict] = None
+    source_cache: Optional[dict] = None
 
 
 # Predefined expression deltas for the 21 implicit keypoints (each has x,y,z).
@@ -71,6 +227,70 @@ EXPRESSION_PRESETS = {
     },
 }
 
+# Keypoint edits per unit of each preset feature: (keypoint, axis, offset).
+# Axis 1 is y; negative y = up.
+EXPRESSION_FEATURES = {
+    # Mouth region: keypoints 12-16 (approximate mapping)
+    "mouth_smile": [(12, 1, -0.1), (13, 1, -0.1), (14, 1, 0.05)],  # corners up, center adjusts
+    "mouth_open": [(15, 1, 0.15), (16, 1, 0.15)],  # lower lip down
+    # Eye region: keypoints 4-7
+    "eye_squint": [(4, 1, 0.1), (5, 1, 0.1)],
+    "eye_open": [(4, 1, -0.12), (5, 1, -0.12)],
+    # Brow region: keypoints 0-3
+    "brow_up": [(0, 1, -0.1), (1, 1, -0.1)],
+    "brow_down": [(0, 1, 0.1), (1, 1, 0.1)],
+}
+
+
+class ExpressionBank:
+    """Presets and features precompiled into (21, 3) expression delta tensors.
+
+    Any weighted blend of names, e.g. {"happy": 0.6, "surprised": 0.3}, is a
+    single matrix product with the stacked bank, and a batch of blends is one
+    (batch, names) x (names, 63) product. Device/dtype copies are made once.
+    """
+
+    def __init__(self, presets: dict, features: dict):
+        feature_deltas = {}
+        for name, edits in features.items():
+            delta = np.zeros((21, 3), dtype=np.float32)
+            for keypoint, axis, offset in edits:
+                delta[keypoint, axis] += offset
+            feature_deltas[name] = delta
+
+        deltas = dict(feature_deltas)
+        for name, preset in presets.items():
+            if preset is not None:
+                deltas[name] = sum(weight * feature_deltas[f] for f, weight in preset.items())
+
+        self.names = list(deltas)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self._bank = torch.from_numpy(np.stack([deltas[n] for n in self.names]).reshape(len(self.names), 63))
+        self._device_banks: Dict[tuple, torch.Tensor] = {}
+
+    def weights(self, blends: List[Dict[str, float]]) -> torch.Tensor:
+        """(batch, names) weight matrix; "neutral" contributes nothing."""
+        w = torch.zeros(len(blends), len(self.names))
+        for row, blend in enumerate(blends):
+            for name, weight in blend.items():
+                if name == "neutral":
+                    continue
+                if name not in self.index:
+                    raise ValueError(f"Unknown expression '{name}'. Use: {['neutral'] + self.names}")
+                w[row, self.index[name]] = float(weight)
+        return w
+
+    def apply(self, weights: torch.Tensor, like: torch.Tensor) -> torch.Tensor:
+        """(batch, 21, 3) deltas for a weight matrix, on like's device and dtype."""
+        key = (like.device, like.dtype)
+        bank = self._device_banks.get(key)
+        if bank is None:
+            bank = self._device_banks[key] = self._bank.to(device=like.device, dtype=like.dtype)
+        return (weights.to(device=like.device, dtype=like.dtype) @ bank).view(-1, 21, 3)
+
+
+expression_bank = ExpressionBank(EXPRESSION_PRESETS, EXPRESSION_FEATURES)
+
 
 def _download_models():
     """Download LivePortrait pretrained weights from HuggingFace if not cached.
@@ -165,10 +385,177 @@ def _load_pipeline():
     return lp_pipeline
 
 
+# Generator modules that can run on ONNX Runtime: wrapper attribute -> (checkpoint
+# config field, input names in call order). Input names match how
+# LivePortraitWrapper calls each module, so the ONNX sessions are drop-in.
+ONNX_MODULES = {
+    "appearance_feature_extractor": ("checkpoint_F", ["source_image"]),
+    "motion_extractor": ("checkpoint_M", ["x"]),
+    "warping_module": ("checkpoint_W", ["feature_3d", "kp_source", "kp_driving"]),
+    "spade_generator": ("checkpoint_G", ["feature"]),
+}
+
+
+class _ExportWrapper(torch.nn.Module):
+    """Positional inputs / tuple outputs around a module, for torch.onnx.export."""
+
+    def __init__(self, module: torch.nn.Module, input_names: List[str], output_keys: Optional[List[str]]):
+        super().__init__()
+        self.module = module
+        self.input_names = input_names
+        self.output_keys = output_keys
+
+    def forward(self, *args):
+        if len(args) == 1:
+            out = self.module(*args)
+        else:
+            out = self.module(**dict(zip(self.input_names, args)))
+        return out if self.output_keys is None else tuple(out[k] for k in self.output_keys)
+
+
+class OnnxModule(torch.nn.Module):
+    """An exported LivePortrait module on an ONNX Runtime CPU session.
+
+    Takes and returns torch tensors (a dict for modules that return one), so it
+    can replace the PyTorch module on LivePortraitWrapper unchanged.
+    """
+
+    def __init__(self, path: str, input_names: List[str], output_keys: Optional[List[str]], threads: int):
+        super().__init__()
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.input_names = input_names
+        self.output_keys = output_keys
+
+    def forward(self, *args, **kwargs):
+        feeds = dict(zip(self.input_names, args))
+        feeds.update(kwargs)
+        outputs = self.session.run(
+            None, {name: value.detach().float().cpu().contiguous().numpy() for name, value in feeds.items()}
+        )
+        tensors = [torch.from_numpy(output) for output in outputs]
+        return tensors[0] if self.output_keys is None else dict(zip(self.output_keys, tensors))
+
+
+def _onnx_example_inputs(wrapper) -> Dict[str, tuple]:
+    """Representative inputs for every exported module, from a dummy 256x256 source."""
+    with torch.no_grad():
+        image = torch.rand(1, 3, 256, 256)
+        feature_3d = wrapper.appearance_feature_extractor(image)
+        kp = wrapper.transform_keypoint(wrapper.get_kp_info(image))
+        warped = wrapper.warping_module(feature_3d, kp_source=kp, kp_driving=kp)["out"]
+    return {
+        "appearance_feature_extractor": (image,),
+        "motion_extractor": (image,),
+        "warping_module": (feature_3d, kp, kp * 1.01),
+        "spade_generator": (warped,),
+    }
+
+
+def _batched_inputs(inputs: tuple, batch: int) -> tuple:
+    """Stack `batch` distinct (slightly scaled) copies of batch-1 example inputs along dim 0."""
+    return tuple(torch.cat([t * (1 - 0.01 * i) for i in range(batch)]) for t in inputs)
+
+
+def _call_module(module, input_names: List[str], inputs: tuple):
+    """Call a generator module the way LivePortraitWrapper does."""
+    return module(*inputs) if len(input_names) == 1 else module(**dict(zip(input_names, inputs)))
+
+
+def _relative_error(reference, candidate) -> float:
+    """Max abs difference relative to the reference's max magnitude, over all outputs."""
+    if isinstance(reference, dict):
+        return max(_relative_error(reference[k], candidate[k]) for k in reference)
+    if reference.shape != candidate.shape:
+        return float("inf")
+    scale = float(reference.abs().max()) + 1e-6
+    return float((reference.float() - candidate.float()).abs().max()) / scale
+
+
+def _onnx_modules(wrapper, threads: int = ONNX_THREADS) -> Dict[str, Tuple[OnnxModule, float]]:
+    """Export (once, cached in the model volume) and load every generator module.
+
+    Returns {name: (onnx_module, relative_error_vs_pytorch)}, the error being the
+    worst of batch 1 and ONNX_PARITY_BATCH. Modules that fail to export, load or
+    run batched are skipped and keep running on PyTorch.
+    """
+    onnx_dir = Path(MODEL_DIR) / "liveportrait" / "onnx"
+    onnx_dir.mkdir(parents=True, exist_ok=True)
+    examples = _onnx_example_inputs(wrapper)
+    modules = {}
+
+    for name, (checkpoint_field, input_names) in ONNX_MODULES.items():
+        module = getattr(wrapper, name)
+        path = onnx_dir / f"{name}.onnx"
+        meta_path = onnx_dir / f"{name}.json"
+        checkpoint = Path(getattr(wrapper.inference_cfg, checkpoint_field))
+        # Re-export when the checkpoint, torch version or opset changes
+        stamp = {
+            "checkpoint": str(checkpoint),
+            "checkpoint_size": checkpoint.stat().st_size if checkpoint.exists() else None,
+            "checkpoint_mtime": checkpoint.stat().st_mtime if checkpoint.exists() else None,
+            "torch": torch.__version__,
+            "opset": ONNX_OPSET,
+        }
+
+        try:
+            with torch.no_grad():
+                reference = _call_module(module, input_names, examples[name])
+            output_keys = list(reference) if isinstance(reference, dict) else None
+
+            meta = json.loads(meta_path.read_text()) if meta_path.exists() else {}
+            if not path.exists() or meta.get("stamp") != stamp:
+                t0 = time.time()
+                output_names = output_keys or ["out"]
+                torch.onnx.export(
+                    _ExportWrapper(module, input_names, output_keys).eval(),
+                    examples[name],
+                    str(path),
+                    input_names=input_names,
+                    output_names=output_names,
+                    dynamic_axes={n: {0: "batch"} for n in input_names + output_names},
+                    opset_version=ONNX_OPSET,
+                    dynamo=False,  # TorchScript exporter: dynamic_axes, no onnxscript dependency
+                )
+                meta_path.write_text(json.dumps({"stamp": stamp, "output_keys": output_keys}))
+                logger.info(f"Exported {name} to ONNX in {time.time() - t0:.1f}s")
+
+            onnx_module = OnnxModule(str(path), input_names, output_keys, threads)
+            error = _relative_error(reference, onnx_module(*examples[name]))
+            batched = _batched_inputs(examples[name], ONNX_PARITY_BATCH)
+            with torch.no_grad():
+                batched_reference = _call_module(module, input_names, batched)
+            error = max(error, _relative_error(batched_reference, onnx_module(*batched)))
+            modules[name] = (onnx_module, error)
+        except Exception as e:
+            logger.warning(f"ONNX backend unavailable for {name}, keeping PyTorch: {e}")
+
+    return modules
+
+
+def _enable_onnx_backend(wrapper) -> Dict[str, str]:
+    """Swap generator modules for ONNX Runtime sessions that match PyTorch within ONNX_TOLERANCE."""
+    status = {name: "torch" for name in ONNX_MODULES}
+    for name, (onnx_module, error) in _onnx_modules(wrapper).items():
+        if error > ONNX_TOLERANCE:
+            logger.warning(f"ONNX {name} differs from PyTorch (rel. error {error:.2e}), keeping PyTorch")
+            continue
+        setattr(wrapper, name, onnx_module)
+        status[name] = "onnx"
+        logger.info(f"{name}: ONNX Runtime ({ONNX_THREADS} threads, rel. error {error:.2e})")
+    return status
+
+
 @app.on_event("startup")
 async def load_models():
     """Load LivePortrait models on startup."""
-    global pipeline
+    global pipeline, backend_status
 
     logger.info("Loading LivePortrait models...")
     try:
@@ -179,6 +566,11 @@ async def load_models():
 
         _download_models()
         pipeline = _load_pipeline()
+        if LIVEPORTRAIT_BACKEND == "onnx":
+            if DEVICE == "cpu":
+                backend_status = _enable_onnx_backend(pipeline.live_portrait_wrapper)
+            else:
+                logger.warning("LIVEPORTRAIT_BACKEND=onnx is CPU-only, using PyTorch on GPU")
         logger.info("LivePortrait ready")
 
     except Exception as e:
@@ -196,6 +588,8 @@ async def health_check():
         gpu_name=torch.cuda.get_device_name(0) if gpu_available else None,
         model_loaded=pipeline is not None,
         device=DEVICE,
+        backend=backend_status,
+        source_cache=source_cache.stats(),
     )
 
 
@@ -208,169 +602,911 @@ def _decode_image(image_bytes: bytes) -> np.ndarray:
     return img
 
 
-def _encode_jpeg(img: np.ndarray, quality: int = 90) -> bytes:
+def _encode_jpeg(img: np.ndarray, quality: int = JPEG_QUALITY) -> bytes:
     """Encode BGR numpy array to JPEG bytes."""
     _, buf = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, quality])
     return buf.tobytes()
 
 
-def _apply_expression_to_kp(x_s_info: dict, expression: str) -> dict:
-    """Apply expression preset by modifying keypoint expression deltas.
+def _crop_face(img_rgb: np.ndarray) -> Optional[dict]:
+    """Face-centred 256x256 crop from LivePortrait's InsightFace cropper, or None without a face."""
+    try:
+        return pipeline.cropper.crop_source_image(img_rgb, pipeline.cropper.crop_cfg)
+    except Exception as e:
+        logger.warning(f"Face crop failed, using the whole image: {e}")
+        return None
+
 
-    LivePortrait's motion extractor outputs expression as a tensor of shape (1, 21, 3).
-    We modify specific regions to simulate facial expressions.
+def _extract_source(image_bytes: bytes) -> SourceFeatures:
+    """Decode a portrait, crop the face and run the source-side networks on it.
+
+    Face detection runs on CPU (ONNX) and is the slowest step; it only happens
+    here, so cached sources never pay for it again.
     """
-    preset = EXPRESSION_PRESETS.get(expression)
-    if preset is None:
-        return x_s_info
+    stages = {}
+    t0 = time.time()
+    wrapper = pipeline.live_portrait_wrapper
+    img_rgb = cv2.cvtColor(_decode_image(image_bytes), cv2.COLOR_BGR2RGB)
+    stages["decode_ms"] = (time.time() - t0) * 1000
+
+    t1 = time.time()
+    crop_info = _crop_face(img_rgb) if FACE_CROP else None
+    if crop_info is not None:
+        from src.utils.crop import prepare_paste_back
+
+        img_256 = crop_info["img_crop_256x256"]
+        M_c2o = crop_info["M_c2o"]
+        paste_mask = prepare_paste_back(
+            wrapper.inference_cfg.mask_crop, M_c2o, dsize=(img_rgb.shape[1], img_rgb.shape[0])
+        )
+    else:
+        # No face found (or cropping disabled): resize the whole image
+        img_256 = cv2.resize(img_rgb, (256, 256))
+        img_rgb = M_c2o = paste_mask = None
+    stages["crop_ms"] = (time.time() - t1) * 1000
 
-    exp = x_s_info["exp"].clone()  # (1, 21, 3)
+    t1 = time.time()
+    with torch.no_grad():
+        I_s = wrapper.prepare_source(img_256)
+        x_s_info = wrapper.get_kp_info(I_s)
+        f_s = wrapper.extract_feature_3d(I_s)
+        x_s = wrapper.transform_keypoint(x_s_info)
+    stages["features_ms"] = (time.time() - t1) * 1000
+
+    return SourceFeatures(
+        I_s=I_s,
+        x_s_info=x_s_info,
+        f_s=f_s,
+        x_s=x_s,
+        nbytes=_tensor_bytes(I_s, x_s_info, f_s, x_s, img_rgb, M_c2o, paste_mask),
+        extract_ms=(time.time() - t0) * 1000,
+        stages={k: round(v, 1) for k, v in stages.items()},
+        img_rgb=img_rgb,
+        M_c2o=M_c2o,
+        paste_mask=paste_mask,
+    )
 
-    # Mouth region: keypoints 12-16 (approximate mapping)
-    mouth_smile = preset.get("mouth_smile", 0.0)
-    if mouth_smile != 0.0:
-        # Raise/lower mouth corners
-        exp[0, 12, 1] -= mouth_smile * 0.1  # left corner up (negative y = up)
-        exp[0, 13, 1] -= mouth_smile * 0.1  # right corner up
-        exp[0, 14, 1] += mouth_smile * 0.05  # center adjusts
-
-    mouth_open = preset.get("mouth_open", 0.0)
-    if mouth_open != 0.0:
-        # Open mouth vertically
-        exp[0, 15, 1] += mouth_open * 0.15  # lower lip down
-        exp[0, 16, 1] += mouth_open * 0.15
 
-    # Eye region: keypoints 4-7
-    eye_squint = preset.get("eye_squint", 0.0)
-    if eye_squint != 0.0:
-        exp[0, 4, 1] += eye_squint * 0.1
-        exp[0, 5, 1] += eye_squint * 0.1
+def _get_source(image_bytes: bytes) -> Tuple[SourceFeatures, bool]:
+    """Cached source features for an image. Returns (features, cache_hit)."""
+    key = SourceCache.key(image_bytes)
+    features = source_cache.get(key)
+    if features is not None:
+        return features, True
+    features = _extract_source(image_bytes)
+    source_cache.put(key, features)
+    return features, False
 
-    eye_open = preset.get("eye_open", 0.0)
-    if eye_open != 0.0:
-        exp[0, 4, 1] -= eye_open * 0.12
-        exp[0, 5, 1] -= eye_open * 0.12
 
-    # Brow region: keypoints 0-3
-    brow_up = preset.get("brow_up", 0.0)
-    if brow_up != 0.0:
-        exp[0, 0, 1] -= brow_up * 0.1
-        exp[0, 1, 1] -= brow_up * 0.1
+async def _resolve_source(
+    source_image: Optional[UploadFile], avatar_id: Optional[str]
+) -> Tuple[SourceFeatures, bool]:
+    """Source features from an uploaded image or a registered avatar id.
 
-    brow_down = preset.get("brow_down", 0.0)
-    if brow_down != 0.0:
-        exp[0, 0, 1] += brow_down * 0.1
-        exp[0, 1, 1] += brow_down * 0.1
+    Extraction (face detection and the source networks) runs in a worker thread
+    so live streams keep sending frames meanwhile.
+    """
+    if avatar_id:
+        key = source_cache.avatar_key(avatar_id)
+        if key is None:
+            raise HTTPException(status_code=404, detail=f"Unknown avatar '{avatar_id}'")
+        features = source_cache.get(key)
+        if features is None:
+            raise HTTPException(status_code=410, detail=f"Features for avatar '{avatar_id}' are gone, re-register it")
+        return features, True
+    if source_image is None:
+        raise HTTPException(status_code=400, detail="Provide source_image or avatar_id")
+    image_bytes = await source_image.read()
+    return await asyncio.get_running_loop().run_in_executor(None, _get_source, image_bytes)
+
+
+def _expression_blend(expression: str = "neutral", intensity: float = 1.0, blend=None) -> Dict[str, float]:
+    """Blend weights from a preset name and intensity, or an explicit {name: weight} blend."""
+    if blend is not None:
+        if isinstance(blend, str):
+            blend = json.loads(blend)
+        if not isinstance(blend, dict):
+            raise ValueError("blend must be an object of {expression: weight}")
+        blend = {name: float(weight) for name, weight in blend.items()}
+        expression_bank.weights([blend])  # validate names
+        return blend
+    if expression not in EXPRESSION_PRESETS:
+        raise ValueError(f"Unknown expression '{expression}'. Use: {list(EXPRESSION_PRESETS.keys())}")
+    return {} if expression == "neutral" else {expression: float(intensity)}
+
+
+def _repeat_info(x_info: dict, n: int) -> dict:
+    """Repeat every keypoint-info tensor along the batch dimension."""
+    return {
+        k: v.repeat(n, *([1] * (v.dim() - 1))) if isinstance(v, torch.Tensor) else v
+        for k, v in x_info.items()
+    }
 
-    x_s_info["exp"] = exp
-    return x_s_info
+
+def _keypoints_for_weights(
+    source: SourceFeatures, weights: torch.Tensor, exp_delta: Optional[torch.Tensor] = None
+) -> torch.Tensor:
+    """Driving keypoints (batch, 21, 3) for a (batch, names) blend weight matrix.
+
+    The cached source keypoints are never modified. exp_delta (1, 21, 3) is added
+    on top for direct keypoint control.
+    """
+    x_d_info = _repeat_info(source.x_s_info, weights.shape[0])
+    x_d_info["exp"] = x_d_info["exp"] + expression_bank.apply(weights, source.x_s_info["exp"])
+    if exp_delta is not None:
+        x_d_info["exp"] = x_d_info["exp"] + exp_delta
+    return pipeline.live_portrait_wrapper.transform_keypoint(x_d_info)
+
+
+def _target_keypoints(
+    source: SourceFeatures, blends: List[Dict[str, float]], exp_delta: Optional[torch.Tensor] = None
+) -> torch.Tensor:
+    """Driving keypoints for a batch of blends, in one batched op."""
+    if exp_delta is None and not any(blends):
+        return source.x_s.expand(len(blends), *source.x_s.shape[1:])
+    return _keypoints_for_weights(source, expression_bank.weights(blends), exp_delta)
+
+
+def _to_bgr(rendered: np.ndarray) -> np.ndarray:
+    """parse_output frame (RGB) to uint8 BGR for encoding."""
+    if rendered.dtype != np.uint8:
+        rendered = (rendered * 255).clip(0, 255).astype(np.uint8)
+    if rendered.shape[-1] == 3:
+        return cv2.cvtColor(rendered, cv2.COLOR_RGB2BGR)
+    return rendered
+
+
+def _compose(source: SourceFeatures, rendered: np.ndarray, paste_back: bool) -> np.ndarray:
+    """Paste a rendered face crop back into the original image using the cached crop transform."""
+    if rendered.dtype != np.uint8:
+        rendered = (rendered * 255).clip(0, 255).astype(np.uint8)
+    if not paste_back or source.M_c2o is None:
+        return rendered
+    from src.utils.crop import paste_back as lp_paste_back
+
+    return lp_paste_back(rendered, source.M_c2o, source.img_rgb, source.paste_mask)
+
+
+def _render_frame(
+    source: SourceFeatures, weights: Dict[str, float], paste_back: bool
+) -> Tuple[bytes, Dict[str, float]]:
+    """Warp, decode, paste back and encode one frame. Returns (jpeg, render/paste/encode ms)."""
+    wrapper = pipeline.live_portrait_wrapper
+    t0 = time.time()
+    with torch.no_grad():
+        x_d = _target_keypoints(source, [weights])
+        out = wrapper.warp_decode(source.f_s, source.x_s, x_d)
+    rendered = wrapper.parse_output(out["out"])[0]
+    render_ms = (time.time() - t0) * 1000
+
+    t0 = time.time()
+    frame = _compose(source, rendered, paste_back)
+    paste_ms = (time.time() - t0) * 1000
+
+    t0 = time.time()
+    jpeg_bytes = _encode_jpeg(_to_bgr(frame))
+    encode_ms = (time.time() - t0) * 1000
+    return jpeg_bytes, {"render_ms": render_ms, "paste_ms": paste_ms, "encode_ms": encode_ms}
 
 
 @app.post("/api/render")
 async def render_frame(
-    source_image: UploadFile = File(...),
+    source_image: Optional[UploadFile] = File(None),
+    avatar_id: Optional[str] = Form(None),
     expression: str = Form("neutral"),
     intensity: float = Form(1.0),
+    blend: Optional[str] = Form(None),
+    paste_back: bool = Form(PASTE_BACK),
 ):
     """
     Render a single avatar frame with expression control.
 
     Args:
-        source_image: Portrait image (PNG/JPG, ideally 256x256 or larger face crop)
+        source_image: Portrait image (PNG/JPG); the face is detected and cropped once per image
+        avatar_id: Id from POST /api/avatars, instead of uploading source_image
         expression: One of: neutral, happy, sad, surprised
         intensity: Expression intensity multiplier (0.0-2.0, default 1.0)
+        blend: JSON weights over presets/features, e.g. {"happy": 0.6, "surprised": 0.3}
+            (overrides expression and intensity)
+        paste_back: Return the full original image with the rendered face pasted in
+            (default PASTE_BACK) instead of the 512x512 face crop
 
     Returns:
-        JPEG image of the rendered frame
+        JPEG image of the rendered frame; per-stage timings in X-*-Ms headers
     """
     if pipeline is None:
         raise HTTPException(status_code=503, detail="Model not loaded")
 
-    if expression not in EXPRESSION_PRESETS:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Unknown expression '{expression}'. Use: {list(EXPRESSION_PRESETS.keys())}",
-        )
+    try:
+        weights = _expression_blend(expression, intensity, blend)
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
     try:
         t0 = time.time()
-        image_bytes = await source_image.read()
-        img_bgr = _decode_image(image_bytes)
+        source, cache_hit = await _resolve_source(source_image, avatar_id)
+        source_ms = (time.time() - t0) * 1000
 
-        # Use the LivePortrait wrapper for single-frame rendering
-        wrapper = pipeline.live_portrait_wrapper
+        # Keep the event loop (and live streams) responsive during the render
+        jpeg_bytes, timings = await asyncio.get_running_loop().run_in_executor(
+            None, _render_frame, source, weights, paste_back
+        )
+        render_ms, paste_ms, encode_ms = timings["render_ms"], timings["paste_ms"], timings["encode_ms"]
 
-        # Prepare source: resize to 256x256 and convert
-        img_rgb = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2RGB)
-        img_256 = cv2.resize(img_rgb, (256, 256))
+        elapsed = time.time() - t0
+        logger.info(
+            f"Rendered frame [{blend or expression}] in {elapsed:.3f}s "
+            f"(source {'cached' if cache_hit else f'{source.extract_ms:.0f}ms'}, render {render_ms:.0f}ms, "
+            f"paste {paste_ms:.0f}ms, encode {encode_ms:.0f}ms)"
+        )
 
-        # Prepare tensor
-        I_s = wrapper.prepare_source(img_256)
+        # Detection/crop only appear in the stage headers when the source was not cached
+        source_stages = {} if cache_hit else source.stages
+        return Response(
+            content=jpeg_bytes,
+            media_type="image/jpeg",
+            headers={
+                "X-Source-Cache": "hit" if cache_hit else "miss",
+                "X-Face-Crop": "yes" if source.M_c2o is not None else "no",
+                "X-Source-Ms": f"{source_ms:.1f}",
+                "X-Crop-Ms": f"{source_stages.get('crop_ms', 0.0):.1f}",
+                "X-Features-Ms": f"{source_stages.get('features_ms', 0.0):.1f}",
+                "X-Render-Ms": f"{render_ms:.1f}",
+                "X-Paste-Ms": f"{paste_ms:.1f}",
+                "X-Encode-Ms": f"{encode_ms:.1f}",
+            },
+        )
 
-        # Extract keypoints and features
-        x_s_info = wrapper.get_kp_info(I_s)
-        f_s = wrapper.extract_feature_3d(I_s)
-        x_s = wrapper.transform_keypoint(x_s_info)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Render failed: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Rendering failed: {str(e)}")
 
-        # Apply expression modification
-        if expression != "neutral":
-            x_d_info = wrapper.get_kp_info(I_s)  # Start from source keypoints
-            x_d_info = _apply_expression_to_kp(x_d_info, expression)
-            # Scale by intensity
-            if intensity != 1.0 and EXPRESSION_PRESETS.get(expression) is not None:
-                diff = x_d_info["exp"] - x_s_info["exp"]
-                x_d_info["exp"] = x_s_info["exp"] + diff * intensity
-            x_d = wrapper.transform_keypoint(x_d_info)
-        else:
-            x_d = x_s
 
-        # Warp and decode
-        out = wrapper.warp_decode(f_s, x_s, x_d)
-        rendered = wrapper.parse_output(out["out"])[0]
+def _parse_batch_items(expressions: str) -> List[Tuple[str, Dict[str, float]]]:
+    """Parse the batch spec into (label, blend) pairs.
 
-        # Convert to BGR for encoding
-        if rendered.dtype != np.uint8:
-            rendered = (rendered * 255).clip(0, 255).astype(np.uint8)
-        if rendered.shape[-1] == 3:
-            rendered_bgr = cv2.cvtColor(rendered, cv2.COLOR_RGB2BGR)
-        else:
-            rendered_bgr = rendered
+    Entries are {"expression", "intensity"} or {"blend": {...}} objects, or [name, intensity] pairs.
+    """
+    try:
+        raw = json.loads(expressions)
+    except json.JSONDecodeError as e:
+        raise HTTPException(status_code=400, detail=f"expressions must be JSON: {e}")
+    if not isinstance(raw, list) or not raw:
+        raise HTTPException(status_code=400, detail="expressions must be a non-empty list")
+
+    items = []
+    try:
+        for entry in raw:
+            if isinstance(entry, dict) and "blend" in entry:
+                items.append(("blend", _expression_blend(blend=entry["blend"])))
+            elif isinstance(entry, dict):
+                expression = entry.get("expression", "neutral")
+                items.append((expression, _expression_blend(expression, entry.get("intensity", 1.0))))
+            elif isinstance(entry, (list, tuple)) and len(entry) == 2:
+                items.append((entry[0], _expression_blend(entry[0], entry[1])))
+            else:
+                raise ValueError(f"Invalid batch entry: {entry!r}")
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return items
+
+
+def _render_frames(
+    source: SourceFeatures, items: List[Tuple[str, Dict[str, float]]], paste_back: bool
+) -> List[dict]:
+    """Render (label, blend) items in chunks of RENDER_BATCH_SIZE; one dict per frame with its jpeg and timings."""
+    wrapper = pipeline.live_portrait_wrapper
+    frames = []
+    for start in range(0, len(items), RENDER_BATCH_SIZE):
+        chunk = items[start:start + RENDER_BATCH_SIZE]
+        n = len(chunk)
+
+        t1 = time.time()
+        with torch.no_grad():
+            x_d = _target_keypoints(source, [weights for _, weights in chunk])
+        keypoints_ms = (time.time() - t1) * 1000
+
+        # One warp_decode for the whole chunk: source features broadcast over the batch
+        t1 = time.time()
+        with torch.no_grad():
+            f_s = source.f_s.expand(n, *source.f_s.shape[1:])
+            x_s = source.x_s.expand(n, *source.x_s.shape[1:])
+            out = wrapper.warp_decode(f_s, x_s, x_d)
+        rendered = wrapper.parse_output(out["out"])
+        decode_ms = (time.time() - t1) * 1000
+
+        for (label, weights), frame in zip(chunk, rendered):
+            t1 = time.time()
+            frame = _compose(source, frame, paste_back)
+            paste_ms = (time.time() - t1) * 1000
+            t1 = time.time()
+            jpeg_bytes = _encode_jpeg(_to_bgr(frame))
+            frames.append({
+                "expression": label,
+                "blend": weights,
+                "jpeg": jpeg_bytes,
+                "keypoints_ms": round(keypoints_ms / n, 2),
+                "decode_ms": round(decode_ms / n, 2),
+                "paste_ms": round(paste_ms, 2),
+                "encode_ms": round((time.time() - t1) * 1000, 2),
+                "batch_size": n,
+            })
+    return frames
+
+
+@app.post("/api/render/batch")
+async def render_batch(
+    expressions: str = Form(...),
+    source_image: Optional[UploadFile] = File(None),
+    avatar_id: Optional[str] = Form(None),
+    paste_back: bool = Form(PASTE_BACK),
+):
+    """
+    Render several expressions of one portrait in batched warp_decode calls.
 
-        jpeg_bytes = _encode_jpeg(rendered_bgr)
+    Args:
+        expressions: JSON list, e.g. [{"expression": "happy", "intensity": 1.2}, ["sad", 0.5],
+            {"blend": {"happy": 0.6, "surprised": 0.3}}]
+        source_image / avatar_id / paste_back: as for /api/render
 
-        elapsed = time.time() - t0
-        logger.info(f"Rendered frame [{expression}] in {elapsed:.3f}s")
+    Returns:
+        ZIP with frame_000_<expression>.jpg ... and timing.json (per-frame and total timings)
+    """
+    if pipeline is None:
+        raise HTTPException(status_code=503, detail="Model not loaded")
+
+    items = _parse_batch_items(expressions)
+
+    try:
+        t0 = time.time()
+        source, cache_hit = await _resolve_source(source_image, avatar_id)
+        source_ms = (time.time() - t0) * 1000
 
-        return Response(content=jpeg_bytes, media_type="image/jpeg")
+        frames = await asyncio.get_running_loop().run_in_executor(
+            None, _render_frames, source, items, paste_back
+        )
+
+        timing = {
+            "frames": [],
+            "source_cache": "hit" if cache_hit else "miss",
+            "source_ms": round(source_ms, 1),
+            "source_stages": {} if cache_hit else source.stages,
+            "face_crop": source.M_c2o is not None,
+            "total_ms": round((time.time() - t0) * 1000, 1),
+        }
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_STORED) as archive:
+            for index, frame in enumerate(frames):
+                name = f"frame_{index:03d}_{frame['expression']}.jpg"
+                archive.writestr(name, frame.pop("jpeg"))
+                timing["frames"].append({"file": name, **frame})
+            archive.writestr("timing.json", json.dumps(timing, indent=2))
+
+        logger.info(
+            f"Rendered batch of {len(frames)} frames in {timing['total_ms']:.0f}ms "
+            f"({timing['total_ms'] / len(frames):.1f}ms/frame)"
+        )
+        return Response(
+            content=buffer.getvalue(),
+            media_type="application/zip",
+            headers={
+                "Content-Disposition": 'attachment; filename="frames.zip"',
+                "X-Frames": str(len(frames)),
+                "X-Source-Cache": timing["source_cache"],
+                "X-Total-Ms": str(timing["total_ms"]),
+            },
+        )
 
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Render failed: {e}", exc_info=True)
+        logger.error(f"Batch render failed: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Rendering failed: {str(e)}")
 
 
+@app.post("/api/avatars")
+async def register_avatar(
+    source_image: UploadFile = File(...),
+    avatar_id: Optional[str] = Form(None),
+):
+    """
+    Pre-register a portrait so renders can reference it by id.
+
+    Source features are extracted once and pinned in the cache. Without
+    avatar_id the first 16 hex chars of the image hash are used.
+    """
+    if pipeline is None:
+        raise HTTPException(status_code=503, detail="Model not loaded")
+
+    try:
+        image_bytes = await source_image.read()
+        key = SourceCache.key(image_bytes)
+        avatar_id = avatar_id or key[:16]
+        source_cache.register(avatar_id, key)
+        source, cache_hit = await asyncio.get_running_loop().run_in_executor(None, _get_source, image_bytes)
+    except Exception as e:
+        source_cache.unregister(avatar_id)
+        logger.error(f"Avatar registration failed: {e}", exc_info=True)
+        raise HTTPException(status_code=400, detail=f"Registration failed: {str(e)}")
+
+    logger.info(f"Registered avatar '{avatar_id}' ({source.nbytes / 1024 / 1024:.1f}MB)")
+    return {
+        "avatar_id": avatar_id,
+        "key": key,
+        "bytes": source.nbytes,
+        "extract_ms": round(source.extract_ms, 1),
+        "stages": source.stages,
+        "face_crop": source.M_c2o is not None,
+        "already_cached": cache_hit,
+    }
+
+
+@app.get("/api/avatars")
+async def list_avatars():
+    """Registered avatars and source cache statistics."""
+    return {"avatars": source_cache.avatars(), "cache": source_cache.stats()}
+
+
+@app.delete("/api/avatars/{avatar_id}")
+async def delete_avatar(avatar_id: str):
+    """Unpin an avatar; its features become normal LRU cache entries."""
+    if not source_cache.unregister(avatar_id):
+        raise HTTPException(status_code=404, detail=f"Unknown avatar '{avatar_id}'")
+    return {"deleted": avatar_id}
+
+
+class StreamMetrics:
+    """Frame counters, achieved fps and tick-to-send latency over a sliding window."""
+
+    def __init__(self):
+        self.frames = 0
+        self.rendered = 0
+        self.dropped = 0
+        self._latencies_ms: deque = deque(maxlen=300)
+        self._sent_at: deque = deque(maxlen=120)
+
+    def frame(self, latency_ms: float, rendered: bool):
+        self.frames += 1
+        self.rendered += int(rendered)
+        self._latencies_ms.append(latency_ms)
+        self._sent_at.append(time.monotonic())
+
+    def snapshot(self) -> dict:
+        sent = self._sent_at
+        window_s = sent[-1] - sent[0] if len(sent) > 1 else 0.0
+        latencies = np.array(self._latencies_ms) if self._latencies_ms else None
+        return {
+            "frames": self.frames,
+            "rendered": self.rendered,
+            "dropped": self.dropped,
+            "fps": round((len(sent) - 1) / window_s, 1) if window_s > 0 else None,
+            "latency_ms": round(float(latencies.mean()), 1) if latencies is not None else None,
+            "latency_p95_ms": round(float(np.percentile(latencies, 95)), 1) if latencies is not None else None,
+        }
+
+
+# All streams combined, plus live sessions by id
+stream_metrics = StreamMetrics()
+stream_sessions: Dict[str, "StreamSession"] = {}
+
+
+class StreamSession:
+    """Latest render state of one frame stream.
+
+    Updates overwrite the state - they are never queued - so every rendered
+    frame shows the newest expression.
+    """
+
+    def __init__(self, source: SourceFeatures, fps: float, paste_back: bool = PASTE_BACK):
+        self.id = uuid.uuid4().hex[:12]
+        self.source = source
+        self.paste_back = paste_back
+        self.fps = min(max(fps, 1.0), STREAM_MAX_FPS)
+        self.blend: Dict[str, float] = {}
+        self.exp_delta: Optional[torch.Tensor] = None
+        self.version = 0
+        self.metrics = StreamMetrics()
+
+    def update(self, message: dict):
+        """Apply {"expression", "intensity"} or {"blend"}, and/or {"exp_delta": 63 floats (null clears)}."""
+        blend = self.blend
+        if "blend" in message:
+            blend = _expression_blend(blend=message["blend"])
+        elif "expression" in message or "intensity" in message:
+            blend = _expression_blend(message.get("expression", "neutral"), message.get("intensity", 1.0))
+        exp_delta = self.exp_delta
+        if "exp_delta" in message:
+            exp_delta = None
+            if message["exp_delta"] is not None:
+                exp = self.source.x_s_info["exp"]
+                exp_delta = torch.tensor(message["exp_delta"], dtype=exp.dtype, device=exp.device)
+                if exp_delta.numel() != exp.numel():
+                    raise ValueError(f"exp_delta needs {exp.numel()} values (21 keypoints x 3)")
+                exp_delta = exp_delta.reshape(exp.shape)
+        self.blend, self.exp_delta = blend, exp_delta
+        self.version += 1
+
+    def record_frame(self, latency_ms: float, rendered: bool):
+        self.metrics.frame(latency_ms, rendered)
+        stream_metrics.frame(latency_ms, rendered)
+
+    def record_dropped(self, count: int):
+        self.metrics.dropped += count
+        stream_metrics.dropped += count
+
+
+def _render_stream_frame(
+    source: SourceFeatures, blend: Dict[str, float], exp_delta: Optional[torch.Tensor], paste_back: bool
+) -> bytes:
+    wrapper = pipeline.live_portrait_wrapper
+    with torch.no_grad():
+        x_d = _target_keypoints(source, [blend], exp_delta)
+        out = wrapper.warp_decode(source.f_s, source.x_s, x_d)
+    frame = _compose(source, wrapper.parse_output(out["out"])[0], paste_back)
+    return _encode_jpeg(_to_bgr(frame))
+
+
+async def _stream_frames(session: StreamSession):
+    """Yield JPEG frames at the session's target fps.
+
+    Rendering runs in a worker thread. When it falls behind, the missed ticks
+    are dropped (counted, never rendered) instead of piling up; an unchanged
+    state resends the previous frame without rendering.
+    """
+    loop = asyncio.get_running_loop()
+    interval = 1.0 / session.fps
+    next_tick = loop.time()
+    last_version, jpeg = None, None
+
+    while True:
+        delay = next_tick - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tick = next_tick
+
+        version = session.version
+        rendered = version != last_version
+        if rendered:
+            jpeg = await loop.run_in_executor(
+                None, _render_stream_frame,
+                session.source, session.blend, session.exp_delta, session.paste_back,
+            )
+            last_version = version
+
+        yield jpeg
+        session.record_frame((loop.time() - tick) * 1000, rendered)
+
+        next_tick += interval
+        behind = loop.time() - next_tick
+        if behind >= interval:
+            skipped = int(behind // interval)
+            next_tick += skipped * interval
+            session.record_dropped(skipped)
+
+
+def _stream_source(avatar_id: str) -> SourceFeatures:
+    """Streams render registered avatars only, so every frame starts from cached features."""
+    key = source_cache.avatar_key(avatar_id)
+    features = source_cache.get(key) if key else None
+    if features is None:
+        raise ValueError(f"Unknown avatar '{avatar_id}' - register it with POST /api/avatars first")
+    return features
+
+
+@app.websocket("/ws/stream")
+async def stream_ws(
+    websocket: WebSocket, avatar_id: str, fps: float = STREAM_FPS, paste_back: bool = PASTE_BACK
+):
+    """
+    Stream rendered frames of a registered avatar over a WebSocket.
+
+    Client -> server: JSON state updates, e.g. {"expression": "happy", "intensity": 0.8},
+    {"blend": {"happy": 0.6, "surprised": 0.3}} or {"exp_delta": [...63 floats...]}. Server -> client: binary JPEG frames, and
+    about once per second a JSON {"type": "metrics", ...} message.
+    """
+    await websocket.accept()
+    try:
+        if pipeline is None:
+            raise ValueError("Model not loaded")
+        session = StreamSession(_stream_source(avatar_id), fps, paste_back)
+    except ValueError as e:
+        await websocket.close(code=1008, reason=str(e))
+        return
+
+    stream_sessions[session.id] = session
+    await websocket.send_json({"type": "session", "session_id": session.id, "fps": session.fps})
+
+    async def receive_updates():
+        while True:
+            try:
+                session.update(json.loads(await websocket.receive_text()))
+            except WebSocketDisconnect:
+                return
+            except (ValueError, TypeError, AttributeError) as e:
+                await websocket.send_json({"type": "error", "detail": str(e)})
+
+    receiver = asyncio.create_task(receive_updates())
+    metrics_every = max(1, int(session.fps))
+    sent = 0
+    try:
+        async for jpeg in _stream_frames(session):
+            if receiver.done():
+                break
+            await websocket.send_bytes(jpeg)
+            sent += 1
+            if sent % metrics_every == 0:
+                await websocket.send_json({"type": "metrics", **session.metrics.snapshot()})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        receiver.cancel()
+        stream_sessions.pop(session.id, None)
+        logger.info(f"Stream {session.id} closed: {session.metrics.snapshot()}")
+
+
+@app.get("/api/stream/mjpeg")
+async def stream_mjpeg(
+    avatar_id: str, fps: float = STREAM_FPS, expression: str = "neutral", intensity: float = 1.0,
+    paste_back: bool = PASTE_BACK,
+):
+    """
+    Stream a registered avatar as multipart/x-mixed-replace MJPEG.
+
+    The session id is returned in X-Stream-Session; change the expression with
+    POST /api/stream/{session_id}.
+    """
+    if pipeline is None:
+        raise HTTPException(status_code=503, detail="Model not loaded")
+    try:
+        session = StreamSession(_stream_source(avatar_id), fps, paste_back)
+        session.update({"expression": expression, "intensity": intensity})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    stream_sessions[session.id] = session
+
+    async def parts():
+        try:
+            async for jpeg in _stream_frames(session):
+                yield (
+                    b"--frame\r\nContent-Type: image/jpeg\r\n"
+                    + f"Content-Length: {len(jpeg)}\r\n\r\n".encode()
+                    + jpeg + b"\r\n"
+                )
+        finally:
+            stream_sessions.pop(session.id, None)
+            logger.info(f"Stream {session.id} closed: {session.metrics.snapshot()}")
+
+    return StreamingResponse(
+        parts(),
+        media_type="multipart/x-mixed-replace; boundary=frame",
+        headers={"X-Stream-Session": session.id, "Cache-Control": "no-store"},
+    )
+
+
+@app.post("/api/stream/{session_id}")
+async def update_stream(session_id: str, update: dict):
+    """Update expression / intensity / blend / exp_delta of a live stream."""
+    session = stream_sessions.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail=f"Unknown stream session '{session_id}'")
+    try:
+        session.update(update)
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"session_id": session_id, "version": session.version}
+
+
+@app.get("/api/stream/stats")
+async def stream_stats():
+    """Achieved fps, frame latency and dropped frames, overall and per live stream."""
+    return {
+        "active_sessions": len(stream_sessions),
+        "total": stream_metrics.snapshot(),
+        "sessions": {session_id: s.metrics.snapshot() for session_id, s in stream_sessions.items()},
+    }
+
+
+def _decode_audio(path: str, sample_rate: int = 16000) -> np.ndarray:
+    """Decode any ffmpeg-readable audio file to mono float32 samples."""
+    result = subprocess.run(
+        [FFMPEG_BIN, "-v", "error", "-i", path, "-f", "f32le", "-ac", "1", "-ar", str(sample_rate), "pipe:1"],
+        capture_output=True,
+    )
+    if result.returncode != 0:
+        raise ValueError(f"Could not decode audio: {result.stderr.decode(errors='replace').strip()[-300:]}")
+    return np.frombuffer(result.stdout, dtype=np.float32)
+
+
+def _mouth_envelope(samples: np.ndarray, sample_rate: int, fps: int, smoothing_frames: int = 3) -> np.ndarray:
+    """Per-video-frame mouth openness in [0, 1] from short-time RMS energy.
+
+    Fully vectorized: frame energies come from one cumulative sum of squared samples.
+    The level is mapped linearly from (noise floor + LIPSYNC_GATE_DB) to the 95th
+    percentile, then smoothed with a short moving average so the mouth does not flicker.
+    """
+    hop = sample_rate / fps
+    n_frames = max(1, int(np.ceil(len(samples) / hop)))
+    edges = np.minimum((np.arange(n_frames + 1) * hop).astype(np.int64), len(samples))
+    energy = np.concatenate([[0.0], np.cumsum(np.square(samples, dtype=np.float64))])
+    counts = np.maximum(np.diff(edges), 1)
+    rms = np.sqrt((energy[edges[1:]] - energy[edges[:-1]]) / counts)
+
+    level_db = 20.0 * np.log10(rms + 1e-8)
+    gate = np.percentile(level_db, 10) + LIPSYNC_GATE_DB
+    peak = np.percentile(level_db, 95)
+    if peak <= gate:
+        return np.zeros(n_frames, dtype=np.float32)
+    openness = np.clip((level_db - gate) / (peak - gate), 0.0, 1.0)
+
+    if smoothing_frames > 1:
+        kernel = np.ones(smoothing_frames) / smoothing_frames
+        openness = np.convolve(openness, kernel, mode="same")
+    return openness.astype(np.float32)
+
+
+def _render_lipsync(
+    source: SourceFeatures, audio_path: str, out_path: str,
+    fps: int, expression: str, intensity: float, batch_size: int, paste_back: bool,
+) -> dict:
+    """Render mouth-synced frames in batches and mux them with the audio into an MP4."""
+    wrapper = pipeline.live_portrait_wrapper
+    timings = {}
+
+    t0 = time.time()
+    sample_rate = 16000
+    samples = _decode_audio(audio_path, sample_rate)
+    if samples.size == 0:
+        raise ValueError("Audio contains no samples")
+    openness = _mouth_envelope(samples, sample_rate, fps)
+    timings["audio_ms"] = (time.time() - t0) * 1000
+
+    # Blend weights per frame: the requested expression plus the audio-driven mouth_open feature
+    weights = expression_bank.weights([_expression_blend(expression, intensity)]).repeat(len(openness), 1)
+    weights[:, expression_bank.index["mouth_open"]] += torch.from_numpy(openness)
+
+    render_s = paste_s = 0.0
+    encoder = None
+    try:
+        for start in range(0, len(openness), batch_size):
+            t1 = time.time()
+            n = min(batch_size, len(openness) - start)
+            with torch.no_grad():
+                x_d = _keypoints_for_weights(source, weights[start:start + n])
+                f_s = source.f_s.expand(n, *source.f_s.shape[1:])
+                x_s = source.x_s.expand(n, *source.x_s.shape[1:])
+                out = wrapper.warp_decode(f_s, x_s, x_d)
+            frames = wrapper.parse_output(out["out"])
+            render_s += time.time() - t1
+
+            t1 = time.time()
+            frames = np.stack([_compose(source, frame, paste_back) for frame in frames])
+            paste_s += time.time() - t1
+
+            if encoder is None:
+                height, width = frames.shape[1:3]
+                encoder = subprocess.Popen(
+                    [
+                        FFMPEG_BIN, "-y", "-v", "error",
+                        "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{width}x{height}", "-r", str(fps),
+                        "-i", "pipe:0", "-i", audio_path,
+                        "-map", "0:v", "-map", "1:a",
+                        # yuv420p needs even dimensions; pasted-back frames have the source's size
+                        "-vf", "crop=trunc(iw/2)*2:trunc(ih/2)*2",
+                        "-c:v", "libx264", "-preset", "veryfast", "-pix_fmt", "yuv420p",
+                        "-c:a", "aac", "-shortest", "-movflags", "+faststart",
+                        out_path,
+                    ],
+                    stdin=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                )
+            encoder.stdin.write(np.ascontiguousarray(frames).tobytes())
+
+        t1 = time.time()
+        encoder.stdin.close()
+        if encoder.wait() != 0:
+            raise RuntimeError(f"ffmpeg failed: {encoder.stderr.read().decode(errors='replace')[-500:]}")
+        timings["mux_tail_ms"] = (time.time() - t1) * 1000
+    finally:
+        if encoder is not None and encoder.poll() is None:
+            encoder.kill()
+
+    video_s = len(openness) / fps
+    timings.update(
+        frames=len(openness),
+        fps=fps,
+        batch_size=batch_size,
+        video_s=video_s,
+        render_ms=render_s * 1000,
+        paste_ms=paste_s * 1000,
+        render_fps=len(openness) / render_s if render_s > 0 else None,
+        total_ms=(time.time() - t0) * 1000,
+    )
+    timings["realtime_factor"] = video_s / (timings["total_ms"] / 1000)
+    return {k: round(v, 2) if isinstance(v, float) else v for k, v in timings.items()}
+
+
 @app.post("/render")
 async def render_video(
-    character_image: UploadFile = File(...),
+    character_image: Optional[UploadFile] = File(None),
     audio: Optional[UploadFile] = File(None),
+    avatar_id: Optional[str] = Form(None),
+    expression: str = Form("neutral"),
+    intensity: float = Form(1.0),
+    fps: int = Form(LIPSYNC_FPS),
+    batch_size: int = Form(LIPSYNC_BATCH_SIZE),
+    paste_back: bool = Form(PASTE_BACK),
 ):
     """
-    Render avatar video from character image and optional audio.
-    Placeholder — full video rendering will be implemented in a future sprint.
+    Render a lip-synced avatar video (MP4, H.264 + AAC) from a portrait and speech audio.
+
+    The audio's per-frame energy envelope drives the mouth keypoints on top of the
+    chosen expression. Frames are rendered batch_size at a time from cached source
+    features and piped into ffmpeg while rendering continues.
+
+    Timings are returned in X-* headers; X-Realtime-Factor > 1 means faster than real time.
     """
     if pipeline is None:
         raise HTTPException(status_code=503, detail="Model not loaded")
+    if audio is None:
+        raise HTTPException(status_code=400, detail="audio is required for lip-sync rendering")
+    if expression not in EXPRESSION_PRESETS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown expression '{expression}'. Use: {list(EXPRESSION_PRESETS.keys())}",
+        )
+    if not 1 <= fps <= 60 or batch_size < 1:
+        raise HTTPException(status_code=400, detail="fps must be 1-60 and batch_size >= 1")
 
-    raise HTTPException(
-        status_code=501,
-        detail="Video rendering not yet implemented. Use POST /api/render for single frames.",
-    )
+    try:
+        source, cache_hit = await _resolve_source(character_image, avatar_id)
+        audio_bytes = await audio.read()
+
+        with tempfile.TemporaryDirectory(prefix="lipsync-") as tmp:
+            audio_path = os.path.join(tmp, "input" + Path(audio.filename or "audio.wav").suffix)
+            out_path = os.path.join(tmp, "output.mp4")
+            with open(audio_path, "wb") as f:
+                f.write(audio_bytes)
+
+            # Keep the event loop (and live streams) responsive during the render
+            timings = await asyncio.get_running_loop().run_in_executor(
+                None, _render_lipsync,
+                source, audio_path, out_path, fps, expression, intensity, batch_size, paste_back,
+            )
+            with open(out_path, "rb") as f:
+                video_bytes = f.read()
+
+        logger.info(f"Rendered lip-sync video: {timings}")
+        return Response(
+            content=video_bytes,
+            media_type="video/mp4",
+            headers={
+                "Content-Disposition": 'attachment; filename="avatar.mp4"',
+                "X-Source-Cache": "hit" if cache_hit else "miss",
+                "X-Frames": str(timings["frames"]),
+                "X-Render-Fps": str(timings["render_fps"]),
+                "X-Realtime-Factor": str(timings["realtime_factor"]),
+                "X-Timings": json.dumps(timings),
+            },
+        )
+
+    except HTTPException:
+        raise
+    except ValueError as e:
+        logger.error(f"Lip-sync input rejected: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Video render failed: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Rendering failed: {str(e)}")
 
 
 @app.get("/expressions")
 async def list_expressions():
-    """List available expression presets."""
+    """List available expression presets and the names usable in blends."""
     return {
         "expressions": list(EXPRESSION_PRESETS.keys()),
+        "blendable": expression_bank.names,
         "description": {
             "neutral": "No expression modification (source image as-is)",
             "happy": "Smile with slight eye squint",
@@ -0,0 +1,131 @@
+"""
+Unit tests for compiled-mode shape handling in the Parler-TTS service
+
+The model and tokenizer are small stand-ins that count tokens, so the tests
+check which generate() path a request takes and that no text is dropped.
+Run from docker/parler-tts: python -m pytest tests/
+"""
+
+from types import SimpleNamespace
+
+import pytest
+import torch
+
+pytest.importorskip("parler_tts")
+
+import parler_service
+from parler_service import DESCRIPTION_PAD_LENGTH, PROMPT_BUCKETS, EncodedDescription, ParlerModel
+
+SAMPLES_PER_TOKEN = 10
+
+
+class FakeTokenizer:
+    """One token per word, right padding"""
+    padding_side = "right"
+    pad_token_id = 0
+
+    def __call__(self, texts, return_tensors="pt", padding=True):
+        texts = [texts] if isinstance(texts, str) else texts
+        length = max(len(text.split()) for text in texts)
+        input_ids = torch.zeros(len(texts), length, dtype=torch.long)
+        attention_mask = torch.zeros(len(texts), length, dtype=torch.long)
+        for i, text in enumerate(texts):
+            input_ids[i, :len(text.split())] = 1
+            attention_mask[i, :len(text.split())] = 1
+        return SimpleNamespace(
+            input_ids=input_ids, attention_mask=attention_mask, to=lambda device: self._batch(input_ids, attention_mask)
+        )
+
+    @staticmethod
+    def _batch(input_ids, attention_mask):
+        return SimpleNamespace(input_ids=input_ids, attention_mask=attention_mask)
+
+
+class FakeModel:
+    """Returns SAMPLES_PER_TOKEN samples per unpadded prompt token and records each generate()"""
+
+    def __init__(self):
+        self.generation_config = SimpleNamespace(cache_implementation="static")
+        self.config = SimpleNamespace(sampling_rate=44100)
+        self.audio_encoder = SimpleNamespace(config=SimpleNamespace(frame_rate=86))
+        self.forward = "compiled"
+        self.calls = []
+
+    def generate(self, generation_config=None, **kwargs):
+        generation_config = generation_config or self.generation_config
+        prompt_mask = kwargs["prompt_attention_mask"]
+        self.calls.append({
+            "forward": self.forward,
+            "cache": generation_config.cache_implementation,
+            "prompt_shape": tuple(prompt_mask.shape),
+            "description_shape": tuple(kwargs["input_ids"].shape),
+        })
+        lengths = prompt_mask.sum(-1) * SAMPLES_PER_TOKEN
+        sequences = torch.ones(prompt_mask.shape[0], int(lengths.max()))
+        return SimpleNamespace(sequences=sequences, audios_length=lengths)
+
+
+def encoded_description(tokens: int) -> EncodedDescription:
+    length = max(tokens, DESCRIPTION_PAD_LENGTH)
+    attention_mask = torch.zeros(1, length, dtype=torch.long)
+    attention_mask[0, :tokens] = 1
+    return EncodedDescription(
+        input_ids=attention_mask.clone(),
+        attention_mask=attention_mask,
+        hidden_states=torch.zeros(1, length, 8),
+        encode_ms=1.0,
+    )
+
+
+@pytest.fixture
+def pm():
+    """A model in compiled mode"""
+    pm = ParlerModel("test", "test/repo", "/tmp/parler-test")
+    pm.model = FakeModel()
+    pm.tokenizer = FakeTokenizer()
+    pm.compile_state.update(enabled=True, eager_fallbacks=0)
+    pm.eager_forward = "eager"
+    return pm
+
+
+class TestCompiledShapes:
+    """Test suite for compiled-mode prompt/description shapes"""
+
+    def test_bucketed_prompt_uses_compiled_graph(self, pm):
+        """Test that a prompt within the buckets is padded and runs compiled"""
+        audio = parler_service._generate_batch(pm, ["short prompt " * 5], encoded_description(20))[0]
+
+        call = pm.model.calls[-1]
+        assert len(audio) == 10 * SAMPLES_PER_TOKEN
+        assert call["forward"] == "compiled" and call["cache"] == "static"
+        assert call["prompt_shape"] == (1, PROMPT_BUCKETS[0])
+        assert pm.compile_state["eager_fallbacks"] == 0
+
+    def test_oversize_prompt_comes_back_in_full(self, pm):
+        """Test that a prompt longer than the largest bucket is not truncated"""
+        words = PROMPT_BUCKETS[-1] + 44
+        description = "A clear voice."
+        pm.description_cache[description] = encoded_description(20)
+
+        audio, timings = parler_service._generate_speech(pm, "word " * words, description, "single")
+
+        call = pm.model.calls[-1]
+        assert len(audio) == words * SAMPLES_PER_TOKEN
+        assert call["prompt_shape"] == (1, words)
+        assert call["forward"] == "eager" and call["cache"] is None
+        assert pm.model.forward == "compiled"
+        assert pm.model.generation_config.cache_implementation == "static"
+        assert pm.compile_state["eager_fallbacks"] == 1
+
+    def test_oversize_description_runs_eagerly(self, pm):
+        """Test that a description longer than DESCRIPTION_PAD_LENGTH is not truncated"""
+        tokens = DESCRIPTION_PAD_LENGTH + 16
+        parler_service._generate_batch(pm, ["hello world"], encoded_description(tokens))
+
+        call = pm.model.calls[-1]
+        assert call["description_shape"] == (1, tokens)
+        assert call["forward"] == "eager"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
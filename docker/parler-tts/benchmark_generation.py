@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Parler-TTS generation benchmark: latency vs. text length, sequential vs. batched.
+
+Loads the model the same way the service does (including preset encoding and
+warm-up), then synthesizes texts of 1..N sentences in sequential mode (one
+generate() call per sentence) and batched mode (one padded batch).
+
+Run inside the parler-tts container:
+    python3 /app/benchmark_generation.py --sentences 1 2 4 8 --repeats 3
+"""
+
+import argparse
+import asyncio
+import time
+
+import parler_service
+from parler_service import VoiceDescription, generate_speech
+
+SENTENCES = [
+    "Good morning, here is your schedule for today.",
+    "Your first meeting starts at nine o'clock.",
+    "After that you have a call with the design team.",
+    "Lunch is booked at the Italian place around the corner.",
+    "In the afternoon there is time reserved for focused work.",
+    "The quarterly report is due on Friday.",
+    "I have moved the dentist appointment to next week.",
+    "Let me know if you want me to change anything.",
+]
+
+
+def measure(text: str, mode: str, repeats: int) -> float:
+    """Best-of-N wall time in seconds."""
+    best = float("inf")
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        generate_speech(text, VoiceDescription.EN_NEUTRAL, "en", mode=mode)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sentences", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    asyncio.run(parler_service.load_model())
+
+    print()
+    print(f"{'sentences':>9} {'chars':>6} {'sequential s':>12} {'batched s':>10} {'speedup':>8}")
+    for count in args.sentences:
+        text = " ".join(SENTENCES[i % len(SENTENCES)] for i in range(count))
+        sequential = measure(text, "sequential", args.repeats)
+        batched = measure(text, "batched", args.repeats)
+        print(f"{count:>9} {len(text):>6} {sequential:>12.2f} {batched:>10.2f} {sequential / batched:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,20 +3,38 @@
 Parler-TTS Mini Multilingual Service
 Supports: EN, DE, FR, ES, PT, PL, IT, NL
 Voice control via natural language descriptions
+
+Can host several Parler checkpoints in one process (PARLER_MODELS), selected
+per request with the `model` field.
 """
 
 import os
+import io
+import re
+import gc
+import copy
+import json
+import asyncio
+import hashlib
 import logging
+import threading
+import time
+import weakref
+from collections import OrderedDict, deque
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional, Tuple
 
+import numpy as np
 import torch
 import soundfile as sf
 from fastapi import FastAPI, HTTPException, UploadFile, File
-from fastapi.responses import FileResponse
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
-from parler_tts import ParlerTTSForConditionalGeneration
-from transformers import AutoTokenizer
+from parler_tts import ParlerTTSForConditionalGeneration, ParlerTTSStreamer
+from transformers import AutoTokenizer, StoppingCriteria, StoppingCriteriaList
+from transformers.modeling_outputs import BaseModelOutput
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -27,13 +45,225 @@ app = FastAPI(title="Parler-TTS Service", version="1.0.0")
 
 # Model configuration
 MODEL_PATH = os.getenv("MODEL_PATH", "/app/models/parler-tts")
+MODEL_DIR = os.getenv("MODEL_DIR", "/app/models")
 DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
-OUTPUT_DIR = Path("/tmp/parler-tts-output")
+OUTPUT_DIR = Path(os.getenv("OUTPUT_DIR", "/tmp/parler-tts-output"))
 OUTPUT_DIR.mkdir(exist_ok=True)
 
-# Global model instances
-model = None
-tokenizer = None
+# Checkpoints served by this process as comma-separated name=repo pairs. The first
+# one is the default for requests without `model` and is stored in MODEL_PATH; the
+# others are stored in MODEL_DIR/<name>.
+PARLER_MODELS = os.getenv(
+    "PARLER_MODELS", "mini-multilingual=parler-tts/parler-tts-mini-multilingual-v1.1"
+)
+# Models loaded (and pinned) at startup; the others load on their first request.
+# Default: the default model only.
+PARLER_PRELOAD = os.getenv("PARLER_PRELOAD", "")
+# Unload non-pinned models that were idle this long (0 = never)
+IDLE_UNLOAD_S = float(os.getenv("PARLER_IDLE_UNLOAD_S", "0"))
+
+# Synthesis cache (WAV files in OUTPUT_DIR + LRU copy in memory)
+AUDIO_CACHE_MAX_MB = float(os.getenv("AUDIO_CACHE_MAX_MB", "512"))
+AUDIO_CACHE_MEMORY_MB = float(os.getenv("AUDIO_CACHE_MEMORY_MB", "64"))
+AUDIO_CACHE_TTL_S = float(os.getenv("AUDIO_CACHE_TTL_S", str(7 * 24 * 3600)))
+
+# Max cached description encodings (presets are pinned and never evicted)
+DESCRIPTION_CACHE_SIZE = int(os.getenv("DESCRIPTION_CACHE_SIZE", "64"))
+
+# Generation modes:
+#   single     - whole text as one prompt (original behaviour)
+#   sequential - one generate() call per sentence
+#   batched    - all sentences as one padded batch sharing the description encoding
+GENERATION_MODES = ("single", "sequential", "batched")
+DEFAULT_GENERATION_MODE = os.getenv("GENERATION_MODE", "single")
+# Upper bound on sentences per generate() call in batched mode (memory)
+MAX_BATCH_SENTENCES = int(os.getenv("MAX_BATCH_SENTENCES", "8"))
+MAX_LENGTH = 1000
+
+# Streaming: audio is decoded and sent every STREAM_CHUNK_SECONDS of generated audio
+# (play_steps = frame_rate * chunk seconds). Smaller = lower time-to-first-audio,
+# more decoder calls.
+STREAM_CHUNK_SECONDS = float(os.getenv("STREAM_CHUNK_SECONDS", "0.5"))
+
+# Opt-in compiled mode: static KV cache + torch.compile on the decoder forward pass.
+# COMPILE_MODE: "" (eager), "default", "reduce-overhead" or "max-autotune".
+# Warm-up compiles one generate() shape per PROMPT_BUCKETS size at batch size 1, so
+# compiled mode runs one prompt per generate() call (batched mode runs its sentences
+# one by one) and pads each prompt to the smallest bucket that fits; descriptions are
+# padded to DESCRIPTION_PAD_LENGTH. Prompts longer than the largest bucket, or
+# descriptions longer than DESCRIPTION_PAD_LENGTH, run in full through the eager
+# forward with a dynamic cache instead, so requests never trigger a recompile.
+COMPILE_MODE = os.getenv("COMPILE_MODE", "")
+PROMPT_BUCKETS = sorted(int(b) for b in os.getenv("PROMPT_BUCKETS", "32,64,128,256").split(","))
+DESCRIPTION_PAD_LENGTH = int(os.getenv("DESCRIPTION_PAD_LENGTH", "64"))
+
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?…;])\s+")
+
+@dataclass
+class EncodedDescription:
+    """Tokenized voice description and its text-encoder hidden states."""
+    input_ids: torch.Tensor
+    attention_mask: torch.Tensor
+    hidden_states: torch.Tensor
+    encode_ms: float  # cost paid once, saved on every cache hit
+
+
+# Time-to-first-audio of recent streaming requests (ms)
+stream_ttfa_ms: "deque[float]" = deque(maxlen=100)
+
+
+class AudioCache:
+    """Content-addressed synthesis cache.
+
+    Keys are SHA-256 digests of (text, description, language, mode, model), so
+    they survive restarts. Files live in the cache directory next to an index.json
+    with size and access times; recently used WAVs are also kept in memory. Entries
+    expire after ttl_s and the least recently used are evicted above max_bytes.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int, memory_bytes: int, ttl_s: float):
+        self.directory = directory
+        self.index_path = directory / "index.json"
+        self.max_bytes = max_bytes
+        self.memory_bytes = memory_bytes
+        self.ttl_s = ttl_s
+        # key -> {"size", "created", "last_access", "hits"}, least recently used first
+        self.entries: "OrderedDict[str, dict]" = OrderedDict()
+        self.memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self.disk_bytes = 0
+        self.memory_bytes_used = 0
+        self.counters = {"hits_memory": 0, "hits_disk": 0, "misses": 0, "evictions": 0}
+        self._lock = threading.Lock()
+        self._load_index()
+
+    @staticmethod
+    def key(text: str, description: str, language: str, mode: str, model: str) -> str:
+        payload = json.dumps(
+            {"text": text, "description": description, "language": language,
+             "mode": mode, "model": model},
+            sort_keys=True, ensure_ascii=False,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.wav"
+
+    def _load_index(self):
+        """Load the index, dropping entries without files and files without entries."""
+        try:
+            entries = json.loads(self.index_path.read_text())
+        except (OSError, ValueError):
+            entries = {}
+        for key, entry in sorted(entries.items(), key=lambda item: item[1]["last_access"]):
+            if self._path(key).exists():
+                self.entries[key] = entry
+                self.disk_bytes += entry["size"]
+        for path in self.directory.glob("*.wav"):
+            if path.stem not in self.entries:
+                path.unlink(missing_ok=True)
+        self._evict()
+        self._save_index()
+        logger.info(f"Audio cache: {len(self.entries)} entries, {self.disk_bytes / 1e6:.1f}MB on disk")
+
+    def _save_index(self):
+        tmp = self.index_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.entries))
+        os.replace(tmp, self.index_path)
+
+    def _remove(self, key: str):
+        entry = self.entries.pop(key)
+        self.disk_bytes -= entry["size"]
+        data = self.memory.pop(key, None)
+        if data is not None:
+            self.memory_bytes_used -= len(data)
+        self._path(key).unlink(missing_ok=True)
+        self.counters["evictions"] += 1
+
+    def _evict(self):
+        """Drop expired entries, then least recently used ones above the size budget."""
+        now = time.time()
+        for key in [k for k, e in self.entries.items() if now - e["created"] > self.ttl_s]:
+            self._remove(key)
+        while self.entries and self.disk_bytes > self.max_bytes:
+            self._remove(next(iter(self.entries)))
+
+    def _remember(self, key: str, data: bytes):
+        if len(data) > self.memory_bytes:
+            return
+        self.memory[key] = data
+        self.memory_bytes_used += len(data)
+        while self.memory_bytes_used > self.memory_bytes:
+            _, dropped = self.memory.popitem(last=False)
+            self.memory_bytes_used -= len(dropped)
+
+    def get(self, key: str) -> Tuple[Optional[bytes], str]:
+        """Return (wav_bytes, source) with source "memory", "disk" or "miss"."""
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None and time.time() - entry["created"] > self.ttl_s:
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.counters["misses"] += 1
+                return None, "miss"
+
+            entry["last_access"] = time.time()
+            entry["hits"] += 1
+            self.entries.move_to_end(key)
+
+            data = self.memory.get(key)
+            if data is not None:
+                self.memory.move_to_end(key)
+                self.counters["hits_memory"] += 1
+                return data, "memory"
+
+            try:
+                data = self._path(key).read_bytes()
+            except OSError:
+                self._remove(key)
+                self.counters["misses"] += 1
+                return None, "miss"
+            self._remember(key, data)
+            self.counters["hits_disk"] += 1
+            return data, "disk"
+
+    def put(self, key: str, data: bytes):
+        with self._lock:
+            if key in self.entries:
+                self._remove(key)
+                self.counters["evictions"] -= 1  # replacement, not an eviction
+            tmp = self._path(key).with_suffix(".tmp")
+            tmp.write_bytes(data)
+            os.replace(tmp, self._path(key))
+            now = time.time()
+            self.entries[key] = {"size": len(data), "created": now, "last_access": now, "hits": 0}
+            self.disk_bytes += len(data)
+            self._remember(key, data)
+            self._evict()
+            self._save_index()
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits = self.counters["hits_memory"] + self.counters["hits_disk"]
+            lookups = hits + self.counters["misses"]
+            return {
+                **self.counters,
+                "hit_rate": round(hits / lookups, 3) if lookups else None,
+                "entries": len(self.entries),
+                "bytes_disk": self.disk_bytes,
+                "bytes_memory": self.memory_bytes_used,
+                "entries_memory": len(self.memory),
+                "max_bytes": self.max_bytes,
+                "ttl_s": self.ttl_s,
+            }
+
+
+audio_cache = AudioCache(
+    OUTPUT_DIR,
+    max_bytes=int(AUDIO_CACHE_MAX_MB * 1024 * 1024),
+    memory_bytes=int(AUDIO_CACHE_MEMORY_MB * 1024 * 1024),
+    ttl_s=AUDIO_CACHE_TTL_S,
+)
 
 
 class TTSRequest(BaseModel):
@@ -41,6 +271,13 @@ class TTSRequest(BaseModel):
     description: Optional[str] = "A clear, neutral voice with moderate speed"
     language: Optional[str] = "en"  # en, de, fr, es, pt, pl, it, nl
     speaker_id: Optional[str] = None
+    mode: Optional[str] = None  # single, sequential, batched (default: GENERATION_MODE)
+    model: Optional[str] = None  # name from PARLER_MODELS (default: first entry)
+
+
+class StreamRequest(TTSRequest):
+    play_steps: Optional[int] = None  # decoder steps per chunk (overrides chunk_seconds)
+    chunk_seconds: Optional[float] = None  # default: STREAM_CHUNK_SECONDS
 
 
 class VoiceDescription:
@@ -62,77 +299,649 @@ class VoiceDescription:
     # Spanish voices
     ES_NEUTRAL = "Una voz clara y neutra con velocidad moderada"
 
+    @classmethod
+    def presets(cls) -> list:
+        """All predefined description strings."""
+        return [value for name, value in vars(cls).items() if name.isupper()]
 
-@app.on_event("startup")
-async def load_model():
-    """Load Parler-TTS model on startup"""
-    global model, tokenizer
 
+def _rss_bytes() -> int:
+    """Resident set size of this process."""
     try:
-        logger.info(f"Using device: {DEVICE}")
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return 0
+
+
+def _cuda_allocated() -> int:
+    return torch.cuda.memory_allocated() if DEVICE == "cuda" else 0
+
+
+class WeightRegistry:
+    """Content index of loaded tensors so weights shared between checkpoints
+    (e.g. the same text encoder or audio codec) are stored once.
+
+    Tensors are bucketed by (shape, dtype, device, checksum) and confirmed with
+    torch.equal. Only weak references are kept, so a tensor is freed once every
+    model using it has been unloaded.
+    """
+
+    def __init__(self):
+        self._index: dict = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _fingerprint(tensor: torch.Tensor) -> tuple:
+        checksum = float(tensor.detach().double().sum()) if tensor.numel() else 0.0
+        return tuple(tensor.shape), tensor.dtype, tensor.device, checksum
+
+    def deduplicate(self, module: torch.nn.Module) -> int:
+        """Point parameters and buffers of module at identical loaded tensors.
+
+        Returns the number of bytes no longer held twice.
+        """
+        saved = 0
+        with self._lock, torch.no_grad():
+            for submodule in module.modules():
+                for store in (submodule._parameters, submodule._buffers):
+                    for tensor in store.values():
+                        if tensor is None:
+                            continue
+                        key = self._fingerprint(tensor)
+                        candidates = [t for t in (ref() for ref in self._index.get(key, [])) if t is not None]
+                        if any(t is tensor for t in candidates):
+                            continue  # tied weight seen earlier in this module
+                        match = next((t for t in candidates if torch.equal(t, tensor)), None)
+                        if match is not None and match.data_ptr() != tensor.data_ptr():
+                            tensor.data = match.data
+                            saved += tensor.numel() * tensor.element_size()
+                        self._index[key] = [weakref.ref(t) for t in candidates] + [weakref.ref(tensor)]
+        return saved
 
-        # Check if model exists locally, otherwise download from HuggingFace
-        model_repo = "parler-tts/parler-tts-mini-multilingual-v1.1"
 
+weight_registry = WeightRegistry()
+
+# Tokenizers shared between checkpoints, keyed by a digest of their files
+_tokenizers: dict = {}
+_TOKENIZER_FILES = (
+    "tokenizer.json", "tokenizer_config.json", "special_tokens_map.json",
+    "spiece.model", "added_tokens.json",
+)
+
+
+def _load_tokenizer(path: str):
+    """Load a tokenizer, reusing an already loaded one with identical files."""
+    digest = hashlib.sha256()
+    for name in _TOKENIZER_FILES:
+        file = Path(path) / name
+        if file.exists():
+            digest.update(name.encode())
+            digest.update(file.read_bytes())
+    key = digest.hexdigest()
+    if key not in _tokenizers:
+        _tokenizers[key] = AutoTokenizer.from_pretrained(path)
+    else:
+        logger.info(f"Reusing loaded tokenizer for {path}")
+    return _tokenizers[key]
+
+
+class ParlerModel:
+    """One Parler checkpoint with its tokenizer, description cache and compile state.
+
+    Loaded lazily on first use; non-pinned models can be unloaded when idle.
+    """
+
+    def __init__(self, name: str, repo: str, local_path: str):
+        self.name = name
+        self.repo = repo
+        self.local_path = local_path
+        self.model = None
+        self.tokenizer = None
+        self.pinned = False
+        # description string -> EncodedDescription, in LRU order
+        self.description_cache: "OrderedDict[str, EncodedDescription]" = OrderedDict()
+        # Compiled mode status, compile time and steady-state tokens/s per bucket
+        self.compile_state: dict = {"enabled": False}
+        # Uncompiled forward, for shapes the compiled graphs were not warmed up for
+        self.eager_forward = None
+        self.memory: dict = {}
+        self.active = 0
+        self.last_used = 0.0
+        # True from the start of load() until warm-up/compilation has finished
+        self.loading = False
+        self._lock = threading.RLock()
+        # Held for description cache access and, in compiled mode, for generate():
+        # the static KV cache lives on the model and cannot be shared by two threads
+        self.generate_lock = threading.RLock()
+
+    @property
+    def loaded(self) -> bool:
+        return self.model is not None
+
+    def _from_pretrained(self):
         # Try loading from local path first, fall back to HuggingFace
         try:
-            if os.path.exists(MODEL_PATH) and os.listdir(MODEL_PATH):
-                logger.info(f"Loading Parler-TTS model from local cache: {MODEL_PATH}")
-                model = ParlerTTSForConditionalGeneration.from_pretrained(MODEL_PATH).to(DEVICE)
-                tokenizer = AutoTokenizer.from_pretrained(MODEL_PATH)
-            else:
-                raise FileNotFoundError("Local model not found")
+            if os.path.exists(self.local_path) and os.listdir(self.local_path):
+                logger.info(f"Loading Parler-TTS model '{self.name}' from local cache: {self.local_path}")
+                return ParlerTTSForConditionalGeneration.from_pretrained(self.local_path)
+            raise FileNotFoundError("Local model not found")
         except (FileNotFoundError, OSError):
-            logger.info(f"Downloading Parler-TTS model from HuggingFace: {model_repo}")
+            logger.info(f"Downloading Parler-TTS model from HuggingFace: {self.repo}")
             logger.info("This may take 30-60 seconds on first startup...")
-            model = ParlerTTSForConditionalGeneration.from_pretrained(model_repo).to(DEVICE)
-            tokenizer = AutoTokenizer.from_pretrained(model_repo)
+            model = ParlerTTSForConditionalGeneration.from_pretrained(self.repo)
 
             # Save to local cache for future use
-            logger.info(f"Saving model to local cache: {MODEL_PATH}")
-            model.save_pretrained(MODEL_PATH)
-            tokenizer.save_pretrained(MODEL_PATH)
+            logger.info(f"Saving model to local cache: {self.local_path}")
+            model.save_pretrained(self.local_path)
+            AutoTokenizer.from_pretrained(self.repo).save_pretrained(self.local_path)
+            return model
+
+    def load(self):
+        """Load weights, deduplicate them against loaded models and warm up."""
+        with self._lock:
+            if self.model is not None:
+                return
+            self.loading = True
+            self.last_used = time.time()
+            try:
+                self._load()
+            finally:
+                self.loading = False
+                self.last_used = time.time()
+
+    def _load(self):
+        gc.collect()
+        rss_before, cuda_before = _rss_bytes(), _cuda_allocated()
+        t0 = time.perf_counter()
 
-        logger.info("Parler-TTS model loaded successfully")
+        model = self._from_pretrained().to(DEVICE)
+        shared_bytes = weight_registry.deduplicate(model)
+        self.tokenizer = _load_tokenizer(self.local_path)
+        self.model = model
+        gc.collect()
+
+        param_bytes = sum(
+            t.numel() * t.element_size()
+            for t in list(model.parameters()) + list(model.buffers())
+        )
+        self.memory = {
+            "load_s": round(time.perf_counter() - t0, 1),
+            "weights_mb": round(param_bytes / 2**20, 1),
+            "shared_mb": round(shared_bytes / 2**20, 1),
+            "resident_mb": round((_rss_bytes() - rss_before) / 2**20, 1),
+            "cuda_mb": round((_cuda_allocated() - cuda_before) / 2**20, 1),
+        }
+        logger.info(f"Parler-TTS model '{self.name}' loaded successfully: {self.memory}")
+
+        self._warm_up()
+
+    def _warm_up(self):
+        if COMPILE_MODE:
+            _setup_compiled_mode(self)
+
+        # Pre-compute encoder outputs for the preset voices
+        t0 = time.perf_counter()
+        for description in VoiceDescription.presets():
+            encode_description(self, description)
+        logger.info(
+            f"Encoded {len(VoiceDescription.presets())} preset descriptions "
+            f"in {(time.perf_counter() - t0) * 1000:.0f}ms"
+        )
 
         # Warm-up inference
         logger.info("Running warm-up inference...")
-        _ = generate_speech("Hello world", VoiceDescription.EN_NEUTRAL)
+        _generate_batch(self, ["Hello world"], encode_description(self, VoiceDescription.EN_NEUTRAL)[0])
         logger.info("Warm-up complete")
 
+    def unload(self) -> bool:
+        """Drop the model unless it is pinned or in use. Returns True if unloaded."""
+        with self._lock:
+            if self.model is None or self.loading or self.pinned or self.active:
+                return False
+            self.model = None
+            self.tokenizer = None
+            self.description_cache.clear()
+            self.compile_state = {"enabled": False}
+            self.eager_forward = None
+            self.memory = {}
+        gc.collect()
+        if DEVICE == "cuda":
+            torch.cuda.empty_cache()
+        logger.info(f"Unloaded idle Parler-TTS model '{self.name}'")
+        return True
+
+    @contextmanager
+    def use(self):
+        """Load if needed and keep the model from being unloaded while in use."""
+        with self._lock:
+            self.load()
+            self.active += 1
+            self.last_used = time.time()
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self.active -= 1
+                self.last_used = time.time()
+
+    def info(self) -> dict:
+        return {
+            "repo": self.repo,
+            "loaded": self.loaded,
+            "loading": self.loading,
+            "pinned": self.pinned,
+            "active_requests": self.active,
+            "idle_s": round(time.time() - self.last_used, 1) if self.loaded else None,
+            "memory": self.memory,
+            "description_cache": {"entries": len(self.description_cache), "max": DESCRIPTION_CACHE_SIZE},
+            "compile": self.compile_state,
+        }
+
+
+def _parse_models(spec: str) -> "OrderedDict[str, ParlerModel]":
+    hosted: "OrderedDict[str, ParlerModel]" = OrderedDict()
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, repo = item.partition("=")
+        local_path = MODEL_PATH if not hosted else os.path.join(MODEL_DIR, name)
+        hosted[name] = ParlerModel(name, repo or name, local_path)
+    return hosted
+
+
+# Hosted checkpoints by name; the first is the default
+models = _parse_models(PARLER_MODELS)
+DEFAULT_MODEL = next(iter(models))
+
+
+async def _unload_idle_models():
+    """Background task: unload models that were idle longer than IDLE_UNLOAD_S."""
+    while True:
+        await asyncio.sleep(min(60.0, IDLE_UNLOAD_S))
+        for pm in models.values():
+            # unload() takes the model lock and runs gc; keep both off the event loop
+            if pm.loaded and not pm.loading and time.time() - pm.last_used > IDLE_UNLOAD_S:
+                await asyncio.to_thread(pm.unload)
+
+
+@app.on_event("startup")
+async def load_model():
+    """Load the preloaded Parler-TTS models on startup"""
+    try:
+        logger.info(f"Using device: {DEVICE}")
+        logger.info(f"Hosted models: {', '.join(f'{pm.name}={pm.repo}' for pm in models.values())}")
+
+        for name in [n.strip() for n in PARLER_PRELOAD.split(",") if n.strip()] or [DEFAULT_MODEL]:
+            models[name].pinned = True
+            models[name].load()
+
+        if IDLE_UNLOAD_S > 0:
+            asyncio.get_running_loop().create_task(_unload_idle_models())
+
     except Exception as e:
         logger.error(f"Failed to load model: {e}")
         raise
 
 
-def generate_speech(text: str, description: str, language: str = "en") -> Path:
-    """Generate speech from text using Parler-TTS"""
+def _sync():
+    if DEVICE == "cuda":
+        torch.cuda.synchronize()
+
+
+def _generation_lock(pm: ParlerModel):
+    """Lock to hold around generate(): the model's lock in compiled mode, else none."""
+    return pm.generate_lock if pm.compile_state["enabled"] else nullcontext()
+
+
+def encode_description(pm: ParlerModel, description: str) -> Tuple[EncodedDescription, bool]:
+    """Return the cached description encoding, computing it on a miss.
+
+    Returns (encoding, cache_hit).
+    """
+    with pm.generate_lock:
+        return _encode_description(pm, description)
+
+
+def _encode_description(pm: ParlerModel, description: str) -> Tuple[EncodedDescription, bool]:
+    description_cache = pm.description_cache
+    cached = description_cache.get(description)
+    if cached is not None:
+        description_cache.move_to_end(description)
+        return cached, True
+
+    t0 = time.perf_counter()
+    inputs = pm.tokenizer(description, return_tensors="pt").to(DEVICE)
+    input_ids, attention_mask = inputs.input_ids, inputs.attention_mask
+    if pm.compile_state["enabled"]:
+        input_ids, attention_mask = _pad_to(pm.tokenizer, input_ids, attention_mask, DESCRIPTION_PAD_LENGTH)
+    with torch.no_grad():
+        hidden_states = pm.model.get_text_encoder()(
+            input_ids=input_ids,
+            attention_mask=attention_mask,
+            return_dict=True,
+        ).last_hidden_state
+    _sync()
+
+    encoded = EncodedDescription(
+        input_ids=input_ids,
+        attention_mask=attention_mask,
+        hidden_states=hidden_states,
+        encode_ms=(time.perf_counter() - t0) * 1000,
+    )
+    description_cache[description] = encoded
+
+    # Evict least recently used non-preset entries
+    if len(description_cache) > DESCRIPTION_CACHE_SIZE:
+        presets = set(VoiceDescription.presets())
+        for key in list(description_cache):
+            if len(description_cache) <= DESCRIPTION_CACHE_SIZE:
+                break
+            if key not in presets:
+                del description_cache[key]
+
+    return encoded, False
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split text at sentence-ending punctuation."""
+    return [part.strip() for part in _SENTENCE_SPLIT.split(text.strip()) if part.strip()]
+
+
+def _pad_to(tokenizer, input_ids: torch.Tensor, attention_mask: torch.Tensor, length: int):
+    """Pad token ids and mask to a fixed length on the tokenizer's padding side."""
+    missing = length - input_ids.shape[-1]
+    if missing <= 0:
+        return input_ids, attention_mask
+    pad = (missing, 0) if tokenizer.padding_side == "left" else (0, missing)
+    input_ids = torch.nn.functional.pad(input_ids, pad, value=tokenizer.pad_token_id)
+    attention_mask = torch.nn.functional.pad(attention_mask, pad, value=0)
+    return input_ids, attention_mask
+
+
+def _prompt_bucket(length: int) -> int:
+    """Smallest compiled prompt bucket that fits (longer prompts are left unpadded)."""
+    return next((bucket for bucket in PROMPT_BUCKETS if bucket >= length), length)
+
+
+def _audio_tokens(pm: ParlerModel, num_samples: int) -> int:
+    """Decoder steps (audio frames) that produced num_samples samples."""
+    frame_rate = pm.model.audio_encoder.config.frame_rate
+    return round(num_samples * frame_rate / pm.model.config.sampling_rate)
+
+
+def _generate_kwargs(
+    pm: ParlerModel, prompts: List[str], encoded: EncodedDescription, prompt_length: Optional[int] = None
+) -> dict:
+    """model.generate kwargs for a padded prompt batch sharing one description encoding.
+
+    In compiled mode prompts are padded to prompt_length (default: smallest bucket
+    that fits); longer prompts are left as they are and run eagerly.
+    """
+    batch_size = len(prompts)
+    prompt_inputs = pm.tokenizer(prompts, return_tensors="pt", padding=True).to(DEVICE)
+    prompt_input_ids, prompt_attention_mask = prompt_inputs.input_ids, prompt_inputs.attention_mask
+    if pm.compile_state["enabled"]:
+        bucket = prompt_length or _prompt_bucket(prompt_input_ids.shape[-1])
+        prompt_input_ids, prompt_attention_mask = _pad_to(
+            pm.tokenizer, prompt_input_ids, prompt_attention_mask, bucket
+        )
+    return dict(
+        input_ids=encoded.input_ids.repeat(batch_size, 1),
+        attention_mask=encoded.attention_mask.repeat(batch_size, 1),
+        encoder_outputs=BaseModelOutput(
+            last_hidden_state=encoded.hidden_states.repeat(batch_size, 1, 1)
+        ),
+        prompt_input_ids=prompt_input_ids,
+        prompt_attention_mask=prompt_attention_mask,
+        max_length=MAX_LENGTH,
+    )
+
+
+def _setup_compiled_mode(pm: ParlerModel):
+    """Switch to a static KV cache + torch.compile and compile every prompt bucket.
+
+    Falls back to eager mode if compilation fails on this platform.
+    """
+    model, compile_state = pm.model, pm.compile_state
+    original_forward = model.forward
     try:
-        # Tokenize inputs
-        input_ids = tokenizer(description, return_tensors="pt").input_ids.to(DEVICE)
-        prompt_input_ids = tokenizer(text, return_tensors="pt").input_ids.to(DEVICE)
-
-        # Generate speech
-        with torch.no_grad():
-            generation = model.generate(
-                input_ids=input_ids,
-                prompt_input_ids=prompt_input_ids,
-                max_length=1000
+        model.generation_config.cache_implementation = "static"
+        model.forward = torch.compile(model.forward, mode=COMPILE_MODE)
+        compile_state.update(enabled=True, mode=COMPILE_MODE, buckets={}, eager_fallbacks=0)
+        pm.eager_forward = original_forward
+        pm.description_cache.clear()
+        encoded, _ = encode_description(pm, VoiceDescription.EN_NEUTRAL)
+
+        # CUDA graphs ("reduce-overhead") are recorded on the second call
+        compile_calls = 1 if COMPILE_MODE == "default" else 2
+        total_t0 = time.perf_counter()
+        for bucket in PROMPT_BUCKETS:
+            t0 = time.perf_counter()
+            for _ in range(compile_calls):
+                _generate_batch(pm, ["This is for compilation."], encoded, prompt_length=bucket)
+            _sync()
+            compile_s = time.perf_counter() - t0
+
+            t0 = time.perf_counter()
+            audio = _generate_batch(pm, ["This is for compilation."], encoded, prompt_length=bucket)[0]
+            _sync()
+            tokens_per_s = _audio_tokens(pm, len(audio)) / (time.perf_counter() - t0)
+
+            compile_state["buckets"][bucket] = {
+                "compile_s": round(compile_s, 2),
+                "tokens_per_s": round(tokens_per_s, 1),
+            }
+            logger.info(
+                f"[{pm.name}] Compiled prompt bucket {bucket}: "
+                f"{compile_s:.1f}s, steady state {tokens_per_s:.0f} tokens/s"
             )
+        compile_state["compile_s"] = round(time.perf_counter() - total_t0, 2)
+
+    except Exception as e:
+        logger.warning(f"Compiled mode failed, falling back to eager: {e}")
+        model.forward = original_forward
+        model.generation_config.cache_implementation = None
+        pm.eager_forward = None
+        compile_state.clear()
+        compile_state.update(enabled=False, mode=COMPILE_MODE, error=str(e))
+        # Drop encodings that were padded for the compiled shapes
+        pm.description_cache.clear()
+
 
-        audio_arr = generation.cpu().numpy().squeeze()
+def _fits_compiled(kwargs: dict) -> bool:
+    """Whether generate() kwargs have shapes the compiled graphs were warmed up for."""
+    return (
+        kwargs["prompt_input_ids"].shape[-1] <= PROMPT_BUCKETS[-1]
+        and kwargs["input_ids"].shape[-1] <= DESCRIPTION_PAD_LENGTH
+    )
 
-        # Save to file
-        output_file = OUTPUT_DIR / f"output_{hash(text)}_{hash(description)}.wav"
-        sf.write(output_file, audio_arr, model.config.sampling_rate)
 
-        return output_file
+def _generate(pm: ParlerModel, kwargs: dict, **extra):
+    """model.generate; in compiled mode, oversize prompts/descriptions run eagerly.
+
+    Callers hold _generation_lock(pm), so the temporary forward swap is not seen
+    by other requests.
+    """
+    model = pm.model
+    if not pm.compile_state["enabled"] or _fits_compiled(kwargs):
+        return model.generate(**kwargs, **extra)
+
+    logger.info(
+        f"[{pm.name}] Prompt ({kwargs['prompt_input_ids'].shape[-1]} tokens) or description "
+        f"({kwargs['input_ids'].shape[-1]} tokens) exceeds the compiled shapes, generating eagerly"
+    )
+    pm.compile_state["eager_fallbacks"] += 1
+    generation_config = copy.deepcopy(model.generation_config)
+    generation_config.cache_implementation = None
+    compiled_forward = model.forward
+    model.forward = pm.eager_forward
+    try:
+        return model.generate(**kwargs, generation_config=generation_config, **extra)
+    finally:
+        model.forward = compiled_forward
+
+
+def _generate_batch(
+    pm: ParlerModel, prompts: List[str], encoded: EncodedDescription, prompt_length: Optional[int] = None
+) -> List[np.ndarray]:
+    """Run one padded batch through model.generate and trim each output to its length.
+
+    All prompts share the same description encoding; the text encoder is skipped
+    because encoder_outputs are passed in.
+    """
+    batch_size = len(prompts)
+    with torch.no_grad():
+        generation = _generate(
+            pm, _generate_kwargs(pm, prompts, encoded, prompt_length), return_dict_in_generate=True
+        )
+
+    audios = generation.sequences.cpu().numpy()
+    lengths = generation.audios_length
+    return [audios[i, : int(lengths[i])] for i in range(batch_size)]
+
+
+def generate_speech(
+    text: str, description: str, language: str = "en", mode: Optional[str] = None,
+    model_name: Optional[str] = None,
+) -> Tuple[np.ndarray, dict]:
+    """Generate speech from text using Parler-TTS.
+
+    Returns the audio samples and per-stage timings in ms.
+    """
+    mode = mode or DEFAULT_GENERATION_MODE
+    if mode not in GENERATION_MODES:
+        raise ValueError(f"Unknown mode '{mode}'. Use: {', '.join(GENERATION_MODES)}")
+
+    try:
+        with models[model_name or DEFAULT_MODEL].use() as pm:
+            return _generate_speech(pm, text, description, mode)
 
     except Exception as e:
         logger.error(f"Speech generation failed: {e}")
         raise
 
 
+def _generate_speech(pm: ParlerModel, text: str, description: str, mode: str) -> Tuple[np.ndarray, dict]:
+    encoded, cache_hit = encode_description(pm, description)
+
+    t0 = time.perf_counter()
+    if mode == "single":
+        sentences = [text]
+        batches = [sentences]
+    else:
+        sentences = split_sentences(text) or [text]
+        if mode == "sequential" or pm.compile_state["enabled"]:
+            # Compiled graphs are only warmed up for batch size 1
+            batches = [[sentence] for sentence in sentences]
+        else:
+            batches = [
+                sentences[i: i + MAX_BATCH_SENTENCES]
+                for i in range(0, len(sentences), MAX_BATCH_SENTENCES)
+            ]
+
+    pieces = []
+    with _generation_lock(pm):
+        for batch in batches:
+            pieces.extend(_generate_batch(pm, batch, encoded))
+        _sync()
+    generate_ms = (time.perf_counter() - t0) * 1000
+
+    audio_arr = np.concatenate(pieces)
+
+    timings = {
+        "mode": mode,
+        "sentences": len(sentences),
+        "batches": len(batches),
+        "encoder_cache_hit": cache_hit,
+        "encoder_ms": 0.0 if cache_hit else round(encoded.encode_ms, 1),
+        "encoder_saved_ms": round(encoded.encode_ms, 1) if cache_hit else 0.0,
+        "generate_ms": round(generate_ms, 1),
+        "tokens_per_s": round(_audio_tokens(pm, len(audio_arr)) / (generate_ms / 1000), 1),
+        "compiled": pm.compile_state["enabled"],
+    }
+    return audio_arr, timings
+
+
+def _default_description(language: Optional[str]) -> str:
+    """Predefined neutral description for a language."""
+    if language == "de":
+        return VoiceDescription.DE_NEUTRAL
+    if language == "fr":
+        return VoiceDescription.FR_NEUTRAL
+    if language == "es":
+        return VoiceDescription.ES_NEUTRAL
+    return VoiceDescription.EN_NEUTRAL
+
+
+class _CancelGeneration(StoppingCriteria):
+    """Stops generate() once the streaming client has gone away."""
+
+    def __init__(self, cancelled: threading.Event):
+        self.cancelled = cancelled
+
+    def __call__(self, input_ids, scores, **kwargs):
+        return torch.full(
+            (input_ids.shape[0],), self.cancelled.is_set(), dtype=torch.bool, device=input_ids.device
+        )
+
+
+def stream_speech(pm: ParlerModel, text: str, description: str, play_steps: int):
+    """Yield 16-bit PCM chunks as the streamer decodes them during generation."""
+    with pm.use():
+        yield from _stream_speech(pm, text, description, play_steps)
+
+
+def _stream_speech(pm: ParlerModel, text: str, description: str, play_steps: int):
+    t0 = time.perf_counter()
+    encoded, _ = encode_description(pm, description)
+    streamer = ParlerTTSStreamer(pm.model, device=DEVICE, play_steps=play_steps)
+    cancelled = threading.Event()
+
+    def _run():
+        try:
+            with _generation_lock(pm), torch.no_grad():
+                _generate(
+                    pm,
+                    _generate_kwargs(pm, [text], encoded),
+                    streamer=streamer,
+                    stopping_criteria=StoppingCriteriaList([_CancelGeneration(cancelled)]),
+                )
+        except Exception as e:
+            logger.error(f"Streaming generation failed: {e}")
+            # Unblock the consumer: an empty chunk ends the stream
+            streamer.on_finalized_audio(np.zeros(0, dtype=np.float32), stream_end=True)
+
+    thread = threading.Thread(target=_run, name="parler-stream", daemon=True)
+    thread.start()
+
+    chunks, samples = 0, 0
+    try:
+        for audio in streamer:
+            if audio.shape[0] == 0:
+                break
+            if chunks == 0:
+                ttfa_ms = (time.perf_counter() - t0) * 1000
+                stream_ttfa_ms.append(ttfa_ms)
+                logger.info(f"Stream time-to-first-audio: {ttfa_ms:.0f}ms (play_steps={play_steps})")
+            chunks += 1
+            samples += audio.shape[0]
+            yield (np.clip(audio, -1.0, 1.0) * 32767).astype("<i2").tobytes()
+    finally:
+        cancelled.set()
+        thread.join()
+        total_s = time.perf_counter() - t0
+        audio_s = samples / pm.model.config.sampling_rate
+        logger.info(f"Stream done: {chunks} chunks, {audio_s:.2f}s audio in {total_s:.2f}s")
+
+
+def _get_model(name: Optional[str]) -> ParlerModel:
+    pm = models.get(name or DEFAULT_MODEL)
+    if pm is None:
+        raise HTTPException(
+            status_code=400, detail=f"Unknown model '{name}'. Use: {', '.join(models)}"
+        )
+    return pm
+
+
 @app.post("/synthesize")
 async def synthesize(request: TTSRequest):
     """
@@ -148,39 +957,145 @@ async def synthesize(request: TTSRequest):
 
         # Use predefined description if available
         if not request.description:
-            if request.language == "de":
-                request.description = VoiceDescription.DE_NEUTRAL
-            elif request.language == "fr":
-                request.description = VoiceDescription.FR_NEUTRAL
-            elif request.language == "es":
-                request.description = VoiceDescription.ES_NEUTRAL
-            else:
-                request.description = VoiceDescription.EN_NEUTRAL
-
-        output_file = generate_speech(request.text, request.description, request.language)
-
-        return FileResponse(
-            output_file,
+            request.description = _default_description(request.language)
+
+        if request.mode and request.mode not in GENERATION_MODES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown mode '{request.mode}'. Use: {', '.join(GENERATION_MODES)}",
+            )
+
+        pm = _get_model(request.model)
+        mode = request.mode or DEFAULT_GENERATION_MODE
+        cache_key = AudioCache.key(
+            request.text, request.description, request.language, mode, f"{pm.name}={pm.repo}"
+        )
+        wav_bytes, cache_source = audio_cache.get(cache_key)
+        if wav_bytes is not None:
+            logger.info(f"Audio cache hit ({cache_source}): {cache_key[:12]}")
+            return Response(
+                content=wav_bytes,
+                media_type="audio/wav",
+                headers={
+                    "Content-Disposition": 'attachment; filename="output.wav"',
+                    "X-Audio-Cache": cache_source,
+                },
+            )
+
+        # Off the event loop: in compiled mode this may wait for a running stream
+        audio_arr, timings = await asyncio.to_thread(
+            generate_speech,
+            request.text, request.description, request.language, mode=mode, model_name=pm.name
+        )
+        logger.info(f"Timings: {timings}")
+
+        buffer = io.BytesIO()
+        sf.write(buffer, audio_arr, pm.model.config.sampling_rate, format="WAV")
+        wav_bytes = buffer.getvalue()
+        audio_cache.put(cache_key, wav_bytes)
+
+        return Response(
+            content=wav_bytes,
             media_type="audio/wav",
-            filename="output.wav"
+            headers={
+                "Content-Disposition": 'attachment; filename="output.wav"',
+                "X-Audio-Cache": "miss",
+                "X-Model": pm.name,
+                "X-Encoder-Cache": "hit" if timings["encoder_cache_hit"] else "miss",
+                "X-Encoder-Ms": str(timings["encoder_ms"]),
+                "X-Encoder-Saved-Ms": str(timings["encoder_saved_ms"]),
+                "X-Generate-Ms": str(timings["generate_ms"]),
+                "X-Generation-Mode": timings["mode"],
+                "X-Sentences": str(timings["sentences"]),
+                "X-Tokens-Per-S": str(timings["tokens_per_s"]),
+            },
         )
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Synthesis failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/synthesize/stream")
+async def synthesize_stream(request: StreamRequest):
+    """
+    Stream speech as raw 16-bit mono PCM while it is being generated.
+
+    Audio codes are decoded every `play_steps` decoder steps (or `chunk_seconds` of
+    audio) and sent immediately. The sample rate is in the X-Sample-Rate header.
+    """
+    pm = _get_model(request.model)
+    if not pm.loaded:
+        if not models[DEFAULT_MODEL].loaded:
+            raise HTTPException(status_code=503, detail="Model not loaded yet")
+        # Download, warm-up and compilation take a while; keep the event loop serving
+        await asyncio.to_thread(pm.load)
+
+    frame_rate = pm.model.audio_encoder.config.frame_rate
+    play_steps = request.play_steps or int(frame_rate * (request.chunk_seconds or STREAM_CHUNK_SECONDS))
+    if play_steps < 1:
+        raise HTTPException(status_code=400, detail="play_steps must be >= 1")
+
+    description = request.description or _default_description(request.language)
+    logger.info(f"Streaming: '{request.text[:50]}...' in {request.language}, play_steps={play_steps}")
+
+    return StreamingResponse(
+        stream_speech(pm, request.text, description, play_steps),
+        media_type="audio/pcm",
+        headers={
+            "X-Model": pm.name,
+            "X-Sample-Rate": str(pm.model.config.sampling_rate),
+            "X-Sample-Format": "s16le",
+            "X-Channels": "1",
+            "X-Play-Steps": str(play_steps),
+        },
+    )
+
+
 @app.get("/health")
 async def health():
     """Health check endpoint"""
     return {
         "status": "healthy",
-        "model": "parler-tts-mini-multilingual-v1.1",
+        "model": DEFAULT_MODEL,
+        "models": {name: pm.loaded for name, pm in models.items()},
         "device": DEVICE,
-        "languages": ["en", "de", "fr", "es", "pt", "pl", "it", "nl"]
+        "languages": ["en", "de", "fr", "es", "pt", "pl", "it", "nl"],
+        "description_cache": {
+            name: {"entries": len(pm.description_cache), "max": DESCRIPTION_CACHE_SIZE}
+            for name, pm in models.items()
+        },
+        "audio_cache": audio_cache.stats(),
+        "compile": {name: pm.compile_state for name, pm in models.items()},
+        "streaming": {
+            "recent_requests": len(stream_ttfa_ms),
+            "avg_ttfa_ms": round(sum(stream_ttfa_ms) / len(stream_ttfa_ms), 1) if stream_ttfa_ms else None,
+            "last_ttfa_ms": round(stream_ttfa_ms[-1], 1) if stream_ttfa_ms else None,
+        },
     }
 
 
+@app.get("/models")
+async def list_models():
+    """Hosted models with load state and memory footprint."""
+    return {
+        "default": DEFAULT_MODEL,
+        "idle_unload_s": IDLE_UNLOAD_S,
+        "process_rss_mb": round(_rss_bytes() / 2**20, 1),
+        "cuda_allocated_mb": round(_cuda_allocated() / 2**20, 1),
+        "shared_tokenizers": len(_tokenizers),
+        "models": {name: pm.info() for name, pm in models.items()},
+    }
+
+
+@app.get("/cache/stats")
+async def cache_stats():
+    """Synthesis cache hit rate and bytes stored."""
+    return audio_cache.stats()
+
+
 @app.get("/voices")
 async def list_voices():
     """List available voice descriptions"""
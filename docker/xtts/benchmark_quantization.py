@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+XTTS CPU int8 mode check: RTF before/after quantization and spectrogram distance.
+
+Synthesizes a fixed sentence set with the fp32 model, applies the same dynamic int8
+quantization as XTTS_CPU_INT8=1, and synthesizes again with the same seeds.
+Quantization changes the sampled token path, so outputs are compared as log-mel
+spectrograms aligned with DTW (mean absolute dB difference per aligned frame). The
+same distance between two fp32 runs with different seeds is printed as the noise floor.
+
+Run inside the xtts container (CPU):
+    python3 /app/benchmark_quantization.py --max-distance 8
+"""
+
+import argparse
+import logging
+import time
+
+import librosa
+import numpy as np
+import torch
+
+import xtts_service
+from xtts_service import SAMPLE_RATE, _load_tts_model, _quantize_cpu_int8, _synthesis_kwargs
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SENTENCES = [
+    ("en", "Good morning, here is your schedule for today."),
+    ("en", "Your next meeting starts in fifteen minutes."),
+    ("en", "I have forwarded the invoice to the accounting team."),
+    ("de", "Guten Morgen, hier ist dein Terminplan für heute."),
+    ("de", "Das Meeting wurde auf Donnerstag verschoben."),
+]
+
+
+def synthesize_all(model, seed: int) -> list:
+    """Return (wav, seconds) per sentence with a fixed seed per sentence."""
+    results = []
+    for i, (language, text) in enumerate(SENTENCES):
+        torch.manual_seed(seed + i)
+        t0 = time.time()
+        with torch.inference_mode():
+            wav = model.tts(**_synthesis_kwargs(text, language, speaker=None, speaker_wav=None))
+        results.append((np.asarray(wav, dtype=np.float32), time.time() - t0))
+    return results
+
+
+def log_mel(wav: np.ndarray) -> np.ndarray:
+    mel = librosa.feature.melspectrogram(y=wav, sr=SAMPLE_RATE, n_fft=1024, hop_length=256, n_mels=80)
+    return librosa.power_to_db(mel, ref=1.0, top_db=80.0)
+
+
+def spectrogram_distance(reference: np.ndarray, candidate: np.ndarray) -> float:
+    """DTW-aligned mean absolute log-mel difference in dB per frame."""
+    x, y = log_mel(reference), log_mel(candidate)
+    _, path = librosa.sequence.dtw(X=x, Y=y, metric="cityblock")
+    return float(np.mean([np.abs(x[:, i] - y[:, j]).mean() for i, j in path]))
+
+
+def rtf(results: list) -> float:
+    audio_s = sum(len(wav) for wav, _ in results) / SAMPLE_RATE
+    return sum(seconds for _, seconds in results) / audio_s
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--max-distance", type=float, default=8.0,
+                        help="Fail (exit 1) if the mean spectrogram distance in dB exceeds this")
+    args = parser.parse_args()
+
+    if xtts_service.DEVICE != "cpu":
+        raise SystemExit("int8 mode is CPU-only (set CUDA_VISIBLE_DEVICES=)")
+
+    xtts_service._tune_torch_threads()
+    model = _load_tts_model(int8=False)
+
+    # First pass pays lazy init costs; with another seed it doubles as the noise floor
+    fp32_other_seed = synthesize_all(model, args.seed + 1000)
+    fp32 = synthesize_all(model, args.seed)
+
+    _quantize_cpu_int8(model)
+    synthesize_all(model, args.seed)
+    int8 = synthesize_all(model, args.seed)
+
+    print()
+    print(f"{'lang':<4} {'fp32 s':>7} {'int8 s':>7} {'speedup':>7} {'dist dB':>7} {'noise dB':>8}  text")
+    distances, noise = [], []
+    for (language, text), (ref, t_ref), (cand, t_cand), (other, _) in zip(SENTENCES, fp32, int8, fp32_other_seed):
+        distances.append(spectrogram_distance(ref, cand))
+        noise.append(spectrogram_distance(ref, other))
+        print(f"{language:<4} {t_ref:>7.2f} {t_cand:>7.2f} {t_ref / t_cand:>6.2f}x "
+              f"{distances[-1]:>7.2f} {noise[-1]:>8.2f}  {text[:40]}")
+
+    mean_distance = float(np.mean(distances))
+    print(f"\nRTF fp32: {rtf(fp32):.3f}  RTF int8: {rtf(int8):.3f}")
+    print(f"mean distance int8 vs fp32: {mean_distance:.2f} dB (fp32 seed-to-seed: {np.mean(noise):.2f} dB)")
+    if mean_distance > args.max_distance:
+        print(f"FAIL: mean distance above {args.max_distance} dB - listen before enabling XTTS_CPU_INT8")
+        raise SystemExit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+XTTS worker-pool benchmark: throughput vs. worker count and memory per worker.
+
+Loads the model once, then for each worker count forks a pool, warms every worker
+up and fires a fixed set of requests with one client thread per worker.
+
+Run inside the xtts container (CPU):
+    python3 /app/benchmark_workers.py --workers 1 2 4 8 --requests 16
+"""
+
+import argparse
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import xtts_service
+from xtts_service import SAMPLE_RATE, XTTSWorkerPool, _load_tts_model, _synthesis_kwargs
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SENTENCES = [
+    "Good morning, here is your schedule for today.",
+    "Your next meeting starts in fifteen minutes.",
+    "I have forwarded the invoice to the accounting team.",
+    "Guten Morgen, hier ist dein Terminplan für heute.",
+]
+
+
+def run(num_workers: int, num_requests: int, threads_per_worker: int) -> dict:
+    pool = XTTSWorkerPool(num_workers, threads_per_worker=threads_per_worker)
+    pool.start()
+    try:
+        jobs = []
+        for i in range(num_requests):
+            text = SENTENCES[i % len(SENTENCES)]
+            language = "de" if text.startswith("Guten") else "en"
+            jobs.append(_synthesis_kwargs(text, language, speaker=None, speaker_wav=None))
+
+        with ThreadPoolExecutor(max_workers=num_workers) as executor:
+            # Warm-up: one request per worker (first call pays lazy init costs)
+            list(executor.map(pool.synthesize, jobs[:num_workers]))
+
+            t0 = time.time()
+            wavs = list(executor.map(pool.synthesize, jobs))
+            wall = time.time() - t0
+
+        stats = pool.stats()
+    finally:
+        pool.shutdown()
+
+    audio_s = sum(len(w) for w in wavs) / SAMPLE_RATE
+    memory = [w["memory"] for w in stats["workers"] if w["memory"]]
+
+    def avg(key: str) -> float:
+        return sum(m[key] for m in memory) / len(memory) if memory else 0.0
+
+    return {
+        "workers": num_workers,
+        "threads": stats["threads_per_worker"],
+        "req_per_s": num_requests / wall,
+        "audio_s_per_s": audio_s / wall,
+        "rss_mb": avg("rss_mb"),
+        "pss_mb": avg("pss_mb"),
+        "private_mb": avg("private_mb"),
+        "parent_rss_mb": stats["parent_memory"].get("rss_mb", 0.0),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--requests", type=int, default=16, help="Timed requests per worker count")
+    parser.add_argument("--threads", type=int, default=0, help="Threads per worker (0 = cores / workers)")
+    args = parser.parse_args()
+
+    if xtts_service.DEVICE != "cpu":
+        raise SystemExit("Worker pool benchmark is CPU-only (set CUDA_VISIBLE_DEVICES=)")
+
+    xtts_service.tts_model = _load_tts_model()
+
+    results = [run(n, args.requests, args.threads) for n in args.workers]
+
+    print()
+    print(f"{'workers':>7} {'threads':>7} {'req/s':>7} {'audio s/s':>9} "
+          f"{'RSS/wkr':>8} {'PSS/wkr':>8} {'priv/wkr':>8} {'parent':>8}")
+    for r in results:
+        print(f"{r['workers']:>7} {r['threads']:>7} {r['req_per_s']:>7.2f} {r['audio_s_per_s']:>9.2f} "
+              f"{r['rss_mb']:>7.0f}M {r['pss_mb']:>7.0f}M {r['private_mb']:>7.0f}M {r['parent_rss_mb']:>7.0f}M")
+    print("\nRSS counts shared weights in every worker; PSS/private show the real cost per worker.")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,11 +7,20 @@ Supports: EN, DE, FR, ES, IT, PT, PL, NL, CS, AR, TR, RU, HU, KO, JA, ZH, HI
 
 import os
 import io
+import gc
+import asyncio
+import queue
+import signal
 import tempfile
+import threading
+import time
 import logging
+import platform
+import multiprocessing as mp
 from pathlib import Path
 from typing import Optional
 
+import numpy as np
 import torch
 import soundfile as sf
 from fastapi import FastAPI, HTTPException, UploadFile, File, Form
@@ -45,6 +54,21 @@ SYNTH_TOP_P = float(os.environ.get("XTTS_TOP_P", "0.85"))
 # 240 tokens ≈ 10-12s max output. Default 602 tokens = ~25s (too long for assistant use).
 MAX_GEN_MEL_TOKENS = int(os.environ.get("XTTS_MAX_GEN_MEL_TOKENS", "240"))
 
+# CPU performance mode: dynamic int8 quantization of the GPT decoder and HiFi-GAN linear
+# layers, plus torch thread tuning. Opt-in; check quality/RTF with benchmark_quantization.py.
+CPU_INT8 = os.environ.get("XTTS_CPU_INT8", "0") == "1"
+# torch intra-op threads for the in-process model (0 = torch default = all cores)
+TORCH_THREADS = int(os.environ.get("XTTS_TORCH_THREADS", "0"))
+
+# Worker-pool mode (CPU only). The model is loaded once in the parent, then N worker
+# processes are forked and share the weights copy-on-write. 0 = single in-process model.
+# CUDA contexts do not survive fork(), so on GPU the pool is disabled.
+NUM_WORKERS = int(os.environ.get("XTTS_WORKERS", "0"))
+# torch intra-op threads per worker (default: split the cores evenly between workers)
+WORKER_THREADS = int(os.environ.get("XTTS_WORKER_THREADS", "0"))
+WORKER_TIMEOUT = float(os.environ.get("XTTS_WORKER_TIMEOUT", "120"))
+WORKER_HEALTH_INTERVAL = float(os.environ.get("XTTS_WORKER_HEALTH_INTERVAL", "5"))
+
 # Supported languages (XTTS v2)
 SUPPORTED_LANGUAGES = {
     "en": "English",
@@ -68,6 +92,8 @@ SUPPORTED_LANGUAGES = {
 
 # Global TTS model
 tts_model = None
+# Global worker pool (only when XTTS_WORKERS > 0 on CPU)
+worker_pool = None
 
 
 class SynthesizeRequest(BaseModel):
@@ -85,26 +111,102 @@ class HealthResponse(BaseModel):
     gpu_name: Optional[str] = None
     languages: list
     default_speaker: str
+    workers: int = 0
 
 
-@app.on_event("startup")
-async def load_model():
-    """Load XTTS v2 model on startup."""
-    global tts_model
+def _convert_conv1d_to_linear(module: torch.nn.Module) -> int:
+    """Replace HF GPT-2 Conv1D layers (transposed nn.Linear) with nn.Linear in-place.
+
+    quantize_dynamic only knows nn.Linear, and XTTS's GPT-2 uses Conv1D for every
+    attention and MLP projection.
+    """
+    from transformers.pytorch_utils import Conv1D
+
+    converted = 0
+    for parent in list(module.modules()):
+        for name, child in list(parent.named_children()):
+            if isinstance(child, Conv1D):
+                linear = torch.nn.Linear(child.weight.shape[0], child.nf)
+                linear.weight = torch.nn.Parameter(child.weight.detach().t().contiguous())
+                linear.bias = torch.nn.Parameter(child.bias.detach().clone())
+                setattr(parent, name, linear)
+                converted += 1
+    return converted
+
+
+def _quantize_cpu_int8(model) -> int:
+    """Dynamic int8 quantization of the GPT and HiFi-GAN linear layers (CPU only).
+
+    Returns the number of quantized Linear modules.
+    """
+    if platform.machine() in ("aarch64", "arm64") and "qnnpack" in torch.backends.quantized.supported_engines:
+        torch.backends.quantized.engine = "qnnpack"
+
+    xtts = model.synthesizer.tts_model
+    converted = _convert_conv1d_to_linear(xtts.gpt)
+    # in-place: gpt_inference shares the GPT-2 blocks and mel head with xtts.gpt
+    for name in ("gpt", "hifigan_decoder"):
+        torch.ao.quantization.quantize_dynamic(
+            getattr(xtts, name), {torch.nn.Linear}, dtype=torch.qint8, inplace=True
+        )
+
+    quantized = sum(
+        1 for m in xtts.modules() if isinstance(m, torch.ao.nn.quantized.dynamic.Linear)
+    )
+    logger.info(
+        f"CPU int8 mode: {converted} Conv1D -> Linear, {quantized} Linear layers quantized "
+        f"(engine: {torch.backends.quantized.engine})"
+    )
+    return quantized
+
+
+def _tune_torch_threads():
+    """Apply XTTS_TORCH_THREADS and, in CPU int8 mode, a single inter-op thread.
+
+    Autoregressive decoding runs one op after another, so inter-op threads only add
+    scheduling overhead.
+    """
+    if TORCH_THREADS > 0:
+        torch.set_num_threads(TORCH_THREADS)
+    if CPU_INT8:
+        try:
+            torch.set_num_interop_threads(1)
+        except RuntimeError:
+            pass  # already set / parallel work started
+    logger.info(f"torch threads: intra-op={torch.get_num_threads()}, inter-op={torch.get_num_interop_threads()}")
 
-    try:
-        from TTS.api import TTS
 
-        os.environ["COQUI_TOS_AGREED"] = "1"
+def _load_tts_model(int8: bool = CPU_INT8):
+    """Load XTTS v2 and apply the generation caps. Shared by the service and benchmarks."""
+    from TTS.api import TTS
 
-        logger.info(f"Loading XTTS v2 model on device: {DEVICE}")
-        logger.info("First startup: downloading ~1.8GB model - may take 60-120 seconds...")
+    os.environ["COQUI_TOS_AGREED"] = "1"
 
-        tts_model = TTS("tts_models/multilingual/multi-dataset/xtts_v2")
-        tts_model.to(DEVICE)
+    logger.info(f"Loading XTTS v2 model on device: {DEVICE}")
+    logger.info("First startup: downloading ~1.8GB model - may take 60-120 seconds...")
 
-        # Cap max audio tokens. Default 602 = ~25s causes runaway generation.
-        tts_model.synthesizer.tts_model.gpt.max_gen_mel_tokens = MAX_GEN_MEL_TOKENS
+    model = TTS("tts_models/multilingual/multi-dataset/xtts_v2")
+    model.to(DEVICE)
+
+    # Cap max audio tokens. Default 602 = ~25s causes runaway generation.
+    model.synthesizer.tts_model.gpt.max_gen_mel_tokens = MAX_GEN_MEL_TOKENS
+
+    if int8:
+        if DEVICE == "cpu":
+            _quantize_cpu_int8(model)
+        else:
+            logger.warning("XTTS_CPU_INT8 is a CPU-only mode - ignored on GPU")
+    return model
+
+
+@app.on_event("startup")
+async def load_model():
+    """Load XTTS v2 model on startup."""
+    global tts_model, worker_pool
+
+    try:
+        _tune_torch_threads()
+        tts_model = _load_tts_model()
 
         logger.info(f"XTTS v2 loaded on {DEVICE}, default speaker: '{DEFAULT_SPEAKER}'")
         logger.info(f"Parameters: temperature={SYNTH_TEMPERATURE}, rep_penalty={SYNTH_REPETITION_PENALTY}, top_k={SYNTH_TOP_K}, top_p={SYNTH_TOP_P}, max_tokens={MAX_GEN_MEL_TOKENS}")
@@ -112,6 +214,21 @@ async def load_model():
     except Exception as e:
         logger.error(f"Failed to load XTTS model: {e}")
         tts_model = None
+        return
+
+    if NUM_WORKERS > 0:
+        if DEVICE != "cpu":
+            logger.warning("XTTS_WORKERS is only supported on CPU (CUDA does not survive fork) - using single model")
+        else:
+            worker_pool = XTTSWorkerPool(NUM_WORKERS, threads_per_worker=WORKER_THREADS)
+            worker_pool.start()
+
+
+@app.on_event("shutdown")
+async def stop_workers():
+    """Terminate worker processes on shutdown."""
+    if worker_pool is not None:
+        worker_pool.shutdown()
 
 
 @app.get("/health", response_model=HealthResponse)
@@ -128,9 +245,18 @@ async def health():
         gpu_name=gpu_name,
         languages=list(SUPPORTED_LANGUAGES.keys()),
         default_speaker=DEFAULT_SPEAKER,
+        workers=worker_pool.num_workers if worker_pool is not None else 0,
     )
 
 
+@app.get("/workers")
+async def list_workers():
+    """Per-worker health, request counters and memory (PSS shows the copy-on-write sharing)."""
+    if worker_pool is None:
+        return {"enabled": False, "workers": []}
+    return {"enabled": True, **worker_pool.stats()}
+
+
 @app.get("/languages")
 async def list_languages():
     """List supported languages."""
@@ -151,8 +277,220 @@ async def list_speakers():
     return {"speakers": speakers, "count": len(speakers), "default": DEFAULT_SPEAKER}
 
 
-def _synthesize(text: str, language: str, speaker: Optional[str], speaker_wav: Optional[str]) -> list:
-    """Core synthesis call with official XTTS v2 parameters."""
+def _process_memory(pid: int) -> dict:
+    """Memory of a process in MB from /proc/<pid>/smaps_rollup (Linux only).
+
+    RSS counts shared copy-on-write pages in every worker; PSS splits them between the
+    sharers, and private is what the worker would free if it exited.
+    """
+    fields = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[1].isdigit():
+                    fields[parts[0].rstrip(":")] = int(parts[1])
+    except OSError:
+        return {}
+    private_kb = fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)
+    return {
+        "rss_mb": round(fields.get("Rss", 0) / 1024, 1),
+        "pss_mb": round(fields.get("Pss", 0) / 1024, 1),
+        "private_mb": round(private_kb / 1024, 1),
+        "shared_mb": round((fields.get("Shared_Clean", 0) + fields.get("Shared_Dirty", 0)) / 1024, 1),
+    }
+
+
+def _worker_main(worker_id: int, conn, num_threads: int):
+    """Worker process loop. Uses the tts_model inherited from the parent via fork()."""
+    # Ctrl+C / uvicorn shutdown is handled by the parent, which terminates the workers
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    torch.set_num_threads(num_threads)
+
+    while True:
+        try:
+            kwargs = conn.recv()
+        except (EOFError, OSError):
+            break
+        t0 = time.time()
+        try:
+            with torch.inference_mode():
+                wav = tts_model.tts(**kwargs)
+            conn.send((True, np.asarray(wav, dtype=np.float32), time.time() - t0))
+        except Exception as e:
+            conn.send((False, f"{type(e).__name__}: {e}", time.time() - t0))
+
+
+class WorkerCrashed(RuntimeError):
+    """Raised when a worker process dies while handling a request."""
+
+
+class _Worker:
+    """Parent-side handle and health counters for one worker process."""
+
+    def __init__(self, worker_id: int):
+        self.worker_id = worker_id
+        self.process = None
+        self.conn = None
+        self.busy = False
+        self.started_at = 0.0
+        self.requests = 0
+        self.failures = 0
+        self.restarts = 0
+        self.last_latency_s: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.is_alive()
+
+
+class XTTSWorkerPool:
+    """Pool of forked XTTS worker processes sharing the parent's weights copy-on-write.
+
+    Requests are dispatched to the first idle worker (a thread-safe queue of idle
+    workers acts as the request queue). A monitor thread restarts workers that died
+    while idle; a worker that dies mid-request fails that request and is re-forked.
+    """
+
+    def __init__(self, num_workers: int, threads_per_worker: int = 0,
+                 request_timeout: float = WORKER_TIMEOUT,
+                 health_interval: float = WORKER_HEALTH_INTERVAL):
+        self.num_workers = num_workers
+        self.threads_per_worker = threads_per_worker or max(1, (os.cpu_count() or 1) // num_workers)
+        self.request_timeout = request_timeout
+        self.health_interval = health_interval
+        self._ctx = mp.get_context("fork")
+        self._workers = [_Worker(i) for i in range(num_workers)]
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._monitor_thread = None
+
+    def start(self):
+        """Fork all workers. Call after the model is loaded and before any inference in the parent."""
+        # Move the loaded model's Python objects out of the GC generations so that
+        # collections in the workers don't write to (and un-share) their pages.
+        gc.collect()
+        gc.freeze()
+        for worker in self._workers:
+            self._spawn(worker)
+            self._idle.put(worker)
+        self._monitor_thread = threading.Thread(target=self._monitor, name="xtts-pool-monitor", daemon=True)
+        self._monitor_thread.start()
+        logger.info(f"XTTS worker pool started: {self.num_workers} workers x {self.threads_per_worker} threads")
+
+    def _spawn(self, worker: _Worker):
+        parent_conn, child_conn = self._ctx.Pipe()
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(worker.worker_id, child_conn, self.threads_per_worker),
+            name=f"xtts-worker-{worker.worker_id}",
+            daemon=True,
+        )
+        process.start()
+        child_conn.close()
+        worker.process = process
+        worker.conn = parent_conn
+        worker.started_at = time.time()
+
+    def _restart(self, worker: _Worker, reason: str):
+        logger.warning(f"Restarting XTTS worker {worker.worker_id} (pid {worker.process.pid}): {reason}")
+        if worker.process.is_alive():
+            worker.process.kill()
+        worker.process.join(timeout=5)
+        worker.conn.close()
+        worker.restarts += 1
+        self._spawn(worker)
+
+    def _monitor(self):
+        """Restart idle workers that died (OOM kill, segfault, ...)."""
+        while not self._stop.wait(self.health_interval):
+            for worker in self._workers:
+                with self._lock:
+                    if not worker.busy and not worker.alive and not self._stop.is_set():
+                        self._restart(worker, f"exit code {worker.process.exitcode}")
+
+    def synthesize(self, kwargs: dict) -> np.ndarray:
+        """Run one synthesis on the next idle worker (blocking)."""
+        worker = self._idle.get()
+        try:
+            with self._lock:
+                if not worker.alive:
+                    self._restart(worker, "found dead before dispatch")
+                worker.busy = True
+
+            try:
+                worker.conn.send(kwargs)
+                deadline = time.monotonic() + self.request_timeout
+                while not worker.conn.poll(0.1):
+                    if not worker.process.is_alive():
+                        raise WorkerCrashed(f"worker {worker.worker_id} exited with code {worker.process.exitcode}")
+                    if time.monotonic() > deadline:
+                        raise WorkerCrashed(f"worker {worker.worker_id} timed out after {self.request_timeout:.0f}s")
+                ok, payload, elapsed = worker.conn.recv()
+            except (EOFError, OSError, WorkerCrashed) as e:
+                reason = str(e) or f"worker {worker.worker_id} closed its connection"
+                worker.failures += 1
+                worker.last_error = reason
+                with self._lock:
+                    self._restart(worker, reason)
+                raise WorkerCrashed(reason) from e
+
+            worker.requests += 1
+            worker.last_latency_s = elapsed
+            if not ok:
+                worker.failures += 1
+                worker.last_error = payload
+                raise RuntimeError(payload)
+            return payload
+
+        finally:
+            worker.busy = False
+            self._idle.put(worker)
+
+    def stats(self) -> dict:
+        """Per-worker health and memory plus pool totals."""
+        workers = []
+        for worker in self._workers:
+            pid = worker.process.pid if worker.process is not None else None
+            workers.append({
+                "worker_id": worker.worker_id,
+                "pid": pid,
+                "alive": worker.alive,
+                "busy": worker.busy,
+                "uptime_s": round(time.time() - worker.started_at, 1),
+                "requests": worker.requests,
+                "failures": worker.failures,
+                "restarts": worker.restarts,
+                "last_latency_s": round(worker.last_latency_s, 3) if worker.last_latency_s is not None else None,
+                "last_error": worker.last_error,
+                "memory": _process_memory(pid) if pid else {},
+            })
+        return {
+            "num_workers": self.num_workers,
+            "threads_per_worker": self.threads_per_worker,
+            "idle": self._idle.qsize(),
+            "parent_memory": _process_memory(os.getpid()),
+            "workers": workers,
+        }
+
+    def shutdown(self):
+        """Stop the monitor and terminate all workers."""
+        self._stop.set()
+        for worker in self._workers:
+            if worker.process is None:
+                continue
+            worker.conn.close()
+            worker.process.join(timeout=2)
+            if worker.process.is_alive():
+                worker.process.kill()
+                worker.process.join(timeout=2)
+        gc.unfreeze()
+
+
+def _synthesis_kwargs(text: str, language: str, speaker: Optional[str], speaker_wav: Optional[str]) -> dict:
+    """Build tts() kwargs with official XTTS v2 parameters."""
     kwargs = dict(
         text=text,
         language=language,
@@ -168,8 +506,21 @@ def _synthesize(text: str, language: str, speaker: Optional[str], speaker_wav: O
     else:
         kwargs["speaker"] = speaker or DEFAULT_SPEAKER
         kwargs["split_sentences"] = False  # avoids inter-sentence artifacts with built-in speakers
+    return kwargs
+
+
+def _synthesize(text: str, language: str, speaker: Optional[str], speaker_wav: Optional[str]) -> list:
+    """Core synthesis call with official XTTS v2 parameters."""
+    return tts_model.tts(**_synthesis_kwargs(text, language, speaker, speaker_wav))
+
 
-    return tts_model.tts(**kwargs)
+async def _synthesize_async(text: str, language: str, speaker: Optional[str], speaker_wav: Optional[str]):
+    """Dispatch to the worker pool when enabled, otherwise run in-process."""
+    if worker_pool is None:
+        return _synthesize(text, language, speaker, speaker_wav)
+    kwargs = _synthesis_kwargs(text, language, speaker, speaker_wav)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, worker_pool.synthesize, kwargs)
 
 
 @app.post("/synthesize")
@@ -202,7 +553,7 @@ async def synthesize_speech(request: SynthesizeRequest):
     try:
         logger.info(f"Synthesizing [{request.language}]: '{request.text[:60]}'")
 
-        wav = _synthesize(request.text, request.language, request.speaker, speaker_wav)
+        wav = await _synthesize_async(request.text, request.language, request.speaker, speaker_wav)
 
         audio_buffer = io.BytesIO()
         sf.write(audio_buffer, wav, SAMPLE_RATE, format="WAV")
@@ -252,7 +603,7 @@ async def synthesize_with_voice_clone(
 
         logger.info(f"Voice clone [{language}]: '{text[:60]}' with {speaker_audio.filename}")
 
-        wav = _synthesize(text, language, speaker=None, speaker_wav=tmp_path)
+        wav = await _synthesize_async(text, language, speaker=None, speaker_wav=tmp_path)
 
         audio_buffer = io.BytesIO()
         sf.write(audio_buffer, wav, SAMPLE_RATE, format="WAV")
@@ -0,0 +1,120 @@
+"""
+Avatar registry - pre-rendered emotion sprites per registered portrait.
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from app.models import AvatarResponse, EmotionType
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Avatar:
+    """A registered portrait and its pre-rendered emotion x intensity frames."""
+    avatar_id: str
+    source: bytes
+    intensities: List[float]
+    sprite_format: str = "png"
+    # (width, height) of the source image, i.e. what a render without a size returns
+    source_size: Tuple[int, int] = (512, 512)
+    # (width, height) the frames are rendered at, with default quality and effort 0
+    sprite_size: Tuple[int, int] = (512, 512)
+    # (emotion, intensity) -> encoded frame
+    frames: Dict[Tuple[EmotionType, float], bytes] = field(default_factory=dict)
+    status: str = "pending"
+    error: Optional[str] = None
+    created: float = field(default_factory=time.time)
+    render_ms: float = 0.0
+    task: Optional[asyncio.Task] = None
+
+    @property
+    def total(self) -> int:
+        return len(EmotionType) * len(self.intensities)
+
+    @property
+    def storage_bytes(self) -> int:
+        return len(self.source) + sum(len(frame) for frame in self.frames.values())
+
+    def nearest(self, emotion: EmotionType, intensity: float) -> Optional[Tuple[float, bytes]]:
+        """Pre-rendered frame for emotion with the closest intensity, or None if none is ready."""
+        rendered = [i for (e, i) in self.frames if e == emotion]
+        if not rendered:
+            return None
+        closest = min(rendered, key=lambda i: abs(i - intensity))
+        return closest, self.frames[(emotion, closest)]
+
+    def info(self) -> AvatarResponse:
+        return AvatarResponse(
+            avatar_id=self.avatar_id,
+            status=self.status,
+            rendered=len(self.frames),
+            total=self.total,
+            progress=round(len(self.frames) / self.total, 3),
+            intensities=self.intensities,
+            sprite_format=self.sprite_format,
+            storage_bytes=self.storage_bytes,
+            render_ms=round(self.render_ms, 2),
+            error=self.error
+        )
+
+
+class AvatarRegistry:
+    """Registered avatars by id (event-loop only, no locking)."""
+
+    def __init__(self, max_avatars: int = 32):
+        """
+        Initialize avatar registry.
+
+        Args:
+            max_avatars: Maximum number of registered avatars
+        """
+        self.max_avatars = max_avatars
+        self._avatars: Dict[str, Avatar] = {}
+
+    def register(
+        self,
+        source: bytes,
+        intensities: List[float],
+        avatar_id: Optional[str] = None,
+        sprite_format: str = "png",
+        source_size: Tuple[int, int] = (512, 512)
+    ) -> Avatar:
+        """Add an avatar (replacing one with the same id). Raises ValueError when full."""
+        avatar_id = avatar_id or uuid.uuid4().hex[:12]
+        if avatar_id not in self._avatars and len(self._avatars) >= self.max_avatars:
+            raise ValueError(f"Avatar limit reached ({self.max_avatars})")
+
+        self.delete(avatar_id)
+        avatar = Avatar(
+            avatar_id=avatar_id,
+            source=source,
+            intensities=sorted(set(intensities)),
+            sprite_format=sprite_format,
+            source_size=source_size
+        )
+        self._avatars[avatar_id] = avatar
+        return avatar
+
+    def get(self, avatar_id: str) -> Optional[Avatar]:
+        return self._avatars.get(avatar_id)
+
+    def delete(self, avatar_id: str) -> bool:
+        """Remove an avatar, cancelling its pre-render. Returns False if unknown."""
+        avatar = self._avatars.pop(avatar_id, None)
+        if avatar is None:
+            return False
+        if avatar.task and not avatar.task.done():
+            avatar.task.cancel()
+        return True
+
+    def list(self) -> List[Avatar]:
+        return list(self._avatars.values())
+
+    def storage_bytes(self) -> int:
+        return sum(avatar.storage_bytes for avatar in self._avatars.values())
@@ -0,0 +1,207 @@
+"""
+Inference executor - bounded worker threads with a priority lane and request coalescing.
+"""
+
+import asyncio
+import contextvars
+import itertools
+import logging
+import queue
+import threading
+from concurrent.futures import Future
+from enum import IntEnum
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class Priority(IntEnum):
+    """Queue priority; lower values run first."""
+    INTERACTIVE = 0
+    BATCH = 1
+
+
+class _Job:
+    """A queued call. Promotion queues it again; the stale entry is skipped."""
+    __slots__ = ("future", "fn", "args", "priority", "taken")
+
+    def __init__(self, future: Future, fn: Callable, args: tuple, priority: Priority):
+        self.future = future
+        self.fn = fn
+        self.args = args
+        self.priority = priority
+        self.taken = False
+
+
+class _Shared:
+    """An in-flight coalesced call and the executor jobs it has queued."""
+    __slots__ = ("task", "priority", "jobs")
+
+    def __init__(self, priority: Optional[Priority]):
+        self.task: Optional[asyncio.Future] = None
+        self.priority = priority
+        self.jobs: List[_Job] = []
+
+
+# The coalesced call the current task is running, if any
+_shared: contextvars.ContextVar = contextvars.ContextVar("shared", default=None)
+
+
+class InferenceExecutor:
+    """
+    Dedicated thread pool for model inference.
+
+    At most `concurrency` jobs touch the model at once. Queued jobs run in
+    priority order (FIFO within a priority), so interactive renders overtake
+    queued batch pre-generation. coalesce() lets identical concurrent
+    requests share one in-flight result instead of rendering twice; a
+    higher-priority caller joining a call promotes its queued jobs.
+    """
+
+    def __init__(self, concurrency: int = 1, on_coalesce: Optional[Callable[[], None]] = None):
+        """
+        Initialize inference executor.
+
+        Args:
+            concurrency: Number of worker threads running inference
+            on_coalesce: Called whenever a request joins an in-flight call
+        """
+        self.concurrency = max(1, concurrency)
+        self.on_coalesce = on_coalesce
+        self._queue: "queue.PriorityQueue" = queue.PriorityQueue()
+        self._sequence = itertools.count()
+        self._threads: List[threading.Thread] = []
+        self._start_lock = threading.Lock()
+        self._pending: Dict[Hashable, _Shared] = {}
+        self._stats_lock = threading.Lock()
+        self.in_flight = 0
+        self.completed = 0
+        self.coalesced = 0
+        self.queued = {priority.name.lower(): 0 for priority in Priority}
+
+    def _start(self):
+        with self._start_lock:
+            if self._threads:
+                return
+            for i in range(self.concurrency):
+                thread = threading.Thread(target=self._worker, name=f"inference-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _worker(self):
+        while True:
+            _, _, job = self._queue.get()
+            if job is None:
+                return
+            with self._stats_lock:
+                if job.taken:
+                    continue
+                job.taken = True
+                self.queued[job.priority.name.lower()] -= 1
+                self.in_flight += 1
+            try:
+                if job.future.set_running_or_notify_cancel():
+                    try:
+                        job.future.set_result(job.fn(*job.args))
+                    except BaseException as e:
+                        job.future.set_exception(e)
+            finally:
+                with self._stats_lock:
+                    self.in_flight -= 1
+                    self.completed += 1
+
+    def submit(self, priority: Priority, fn: Callable, *args) -> Future:
+        """
+        Queue fn(*args) and return a concurrent future for its result.
+
+        Inside a coalesced call the job runs at the highest priority of the
+        callers sharing it, and is promoted if a higher-priority caller joins.
+        """
+        self._start()
+        shared = _shared.get()
+        if shared is not None and shared.priority is not None:
+            priority = min(priority, shared.priority)
+        job = _Job(Future(), fn, args, priority)
+        with self._stats_lock:
+            self.queued[priority.name.lower()] += 1
+            if shared is not None:
+                shared.jobs.append(job)
+        self._queue.put((int(priority), next(self._sequence), job))
+        return job.future
+
+    def _promote(self, shared: _Shared, priority: Priority):
+        """Raise a coalesced call, and its jobs still queued, to priority."""
+        if shared.priority is not None and shared.priority <= priority:
+            return
+        shared.priority = priority
+        with self._stats_lock:
+            for job in shared.jobs:
+                if job.taken or job.priority <= priority:
+                    continue
+                self.queued[job.priority.name.lower()] -= 1
+                self.queued[priority.name.lower()] += 1
+                job.priority = priority
+                self._queue.put((int(priority), next(self._sequence), job))
+
+    async def run(self, priority: Priority, fn: Callable, *args) -> Any:
+        """Run fn(*args) on an inference worker and await the result."""
+        return await asyncio.wrap_future(self.submit(priority, fn, *args))
+
+    async def coalesce(
+        self,
+        key: Hashable,
+        factory: Callable[[], Awaitable[Any]],
+        priority: Optional[Priority] = None
+    ) -> Any:
+        """
+        Await factory(), sharing one in-flight call between identical keys.
+
+        Callers with the same key while the first call is running get its
+        result (or exception); a cancelled caller does not cancel the others.
+        A caller with a higher priority than the running call promotes the
+        jobs it queues through submit()/run(), so it never waits in a lower lane.
+        """
+        shared = self._pending.get(key)
+        if shared is None:
+            shared = _Shared(priority)
+
+            async def call():
+                _shared.set(shared)
+                return await factory()
+
+            shared.task = asyncio.ensure_future(call())
+            self._pending[key] = shared
+
+            def forget(done: asyncio.Future):
+                if key in self._pending and self._pending[key].task is done:
+                    del self._pending[key]
+
+            shared.task.add_done_callback(forget)
+        else:
+            self.coalesced += 1
+            if self.on_coalesce:
+                self.on_coalesce()
+            if priority is not None:
+                self._promote(shared, priority)
+        return await asyncio.shield(shared.task)
+
+    def stats(self) -> dict:
+        """Queue depth, running jobs and coalescing counters."""
+        with self._stats_lock:
+            return {
+                "concurrency": self.concurrency,
+                "queue_depth": sum(self.queued.values()),
+                "queued": dict(self.queued),
+                "in_flight": self.in_flight,
+                "completed": self.completed,
+                "coalesced": self.coalesced,
+            }
+
+    def shutdown(self):
+        """Stop the worker threads after the queued jobs have run."""
+        with self._start_lock:
+            for _ in self._threads:
+                self._queue.put((len(Priority), next(self._sequence), None))
+            for thread in self._threads:
+                thread.join()
+            self._threads = []
@@ -4,20 +4,27 @@ Provides GPU-accelerated portrait animation using LivePortrait model.
 """
 
 import asyncio
+import io
+import json
 import logging
+import mimetypes
 import os
+import zipfile
 from contextlib import asynccontextmanager
 from typing import Optional
 
 import torch
-from fastapi import FastAPI, HTTPException, UploadFile, File, Form
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Query
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel, Field
-from prometheus_client import Counter, Histogram, generate_latest
+from prometheus_client import Counter, Gauge, Histogram, generate_latest
 from starlette.responses import Response
 
 from app.renderer import LivePortraitRenderer
-from app.models import RenderRequest, RenderResponse, EmotionType, HealthResponse
+from app.models import (
+    AvatarResponse, RenderRequest, RenderResponse, EmotionType, HealthResponse,
+    EasingType, TransitionOutput, TransitionResponse
+)
 
 # Configure logging
 logging.basicConfig(
@@ -26,10 +33,52 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Output store: rendered frames live in memory (LRU), spill to OUTPUT_DIR when
+# the memory budget is exceeded and are dropped after OUTPUT_TTL_S or when the
+# disk budget is exceeded. Expired outputs are evicted every OUTPUT_EVICT_INTERVAL_S.
+OUTPUT_DIR = os.getenv("OUTPUT_DIR", "/tmp/liveportrait_output")
+OUTPUT_MEMORY_MB = int(os.getenv("OUTPUT_MEMORY_MB", "128"))
+OUTPUT_DISK_MB = int(os.getenv("OUTPUT_DISK_MB", "1024"))
+OUTPUT_TTL_S = float(os.getenv("OUTPUT_TTL_S", "900"))
+OUTPUT_EVICT_INTERVAL_S = float(os.getenv("OUTPUT_EVICT_INTERVAL_S", "30"))
+
+# Renders allowed on the model at once (dedicated inference threads). Interactive
+# /render requests are queued ahead of /render/batch pre-generation.
+INFERENCE_CONCURRENCY = int(os.getenv("INFERENCE_CONCURRENCY", "1"))
+
+# Registered avatars: every emotion is pre-rendered at these intensities in the
+# background; /render with avatar_id returns the nearest pre-rendered frame.
+AVATAR_INTENSITIES = [float(i) for i in os.getenv("AVATAR_INTENSITIES", "0.25,0.5,0.75,1.0").split(",")]
+AVATAR_MAX = int(os.getenv("AVATAR_MAX", "32"))
+
 # Prometheus metrics
 REQUEST_COUNT = Counter('liveportrait_requests_total', 'Total number of render requests')
 REQUEST_LATENCY = Histogram('liveportrait_request_duration_seconds', 'Request latency in seconds')
 RENDER_ERRORS = Counter('liveportrait_errors_total', 'Total number of render errors')
+OUTPUT_STORE_BYTES = Gauge('liveportrait_output_store_bytes', 'Bytes held by the output store', ['tier'])
+OUTPUT_STORE_ITEMS = Gauge('liveportrait_output_store_items', 'Outputs held by the output store', ['tier'])
+OUTPUT_STORE_EVICTIONS = Counter(
+    'liveportrait_output_store_evictions_total', 'Outputs evicted from the output store', ['reason']
+)
+# Per-stage render timings: queue (wait for an inference thread), decode, resize,
+# inference, downsample, encode, save. kind is single/batch/transition/sprite; emotion
+# is empty for renders spanning several emotions.
+STAGE_LATENCY = Histogram(
+    'liveportrait_stage_duration_seconds', 'Render stage latency in seconds',
+    ['stage', 'kind', 'emotion', 'format', 'resolution'],
+    buckets=(.001, .0025, .005, .01, .025, .05, .1, .25, .5, 1.0, 2.5, 5.0, 10.0)
+)
+RENDERS_IN_PROGRESS = Gauge('liveportrait_renders_in_progress', 'Render requests currently being handled')
+INFERENCE_QUEUE_DEPTH = Gauge(
+    'liveportrait_inference_queue_depth', 'Renders waiting for an inference thread', ['priority']
+)
+INFERENCE_IN_FLIGHT = Gauge('liveportrait_inference_in_flight', 'Renders running on the model')
+GPU_MEMORY = Gauge('liveportrait_gpu_memory_bytes', 'CUDA memory held by PyTorch', ['kind'])
+CACHE_HITS = Counter('liveportrait_cache_hits_total', 'Renders served without new inference', ['cache'])
+AVATARS = Gauge('liveportrait_avatars', 'Registered avatars')
+AVATAR_STORAGE_BYTES = Gauge('liveportrait_avatar_storage_bytes', 'Memory held by avatar sources and sprites')
+# Process RSS/CPU come from prometheus_client's default process collector
+# (process_resident_memory_bytes, process_cpu_seconds_total).
 
 # Global renderer instance
 renderer: Optional[LivePortraitRenderer] = None
@@ -44,7 +93,16 @@ async def lifespan(app: FastAPI):
     try:
         renderer = LivePortraitRenderer(
             model_path="/app/liveportrait/pretrained_weights",
-            device="cuda" if torch.cuda.is_available() else "cpu"
+            device="cuda" if torch.cuda.is_available() else "cpu",
+            output_dir=OUTPUT_DIR,
+            output_memory_bytes=OUTPUT_MEMORY_MB * 1024 * 1024,
+            output_disk_bytes=OUTPUT_DISK_MB * 1024 * 1024,
+            output_ttl_s=OUTPUT_TTL_S,
+            on_output_evict=lambda reason: OUTPUT_STORE_EVICTIONS.labels(reason=reason).inc(),
+            inference_concurrency=INFERENCE_CONCURRENCY,
+            on_stage=lambda stage, seconds, labels: STAGE_LATENCY.labels(stage=stage, **labels).observe(seconds),
+            on_cache_hit=lambda cache: CACHE_HITS.labels(cache=cache).inc(),
+            max_avatars=AVATAR_MAX
         )
         await renderer.initialize()
         logger.info(f"Renderer initialized successfully on {renderer.device}")
@@ -56,13 +114,67 @@ async def lifespan(app: FastAPI):
         logger.error(f"Failed to initialize renderer: {e}")
         raise
 
+    eviction_task = asyncio.create_task(evict_outputs())
+
     yield
 
     logger.info("Shutting down LivePortrait renderer...")
+    eviction_task.cancel()
     if renderer:
         await renderer.cleanup()
 
 
+async def evict_outputs():
+    """Periodically drop expired outputs from the output store."""
+    while True:
+        await asyncio.sleep(OUTPUT_EVICT_INTERVAL_S)
+        try:
+            evicted = await asyncio.get_event_loop().run_in_executor(None, renderer.output_store.evict)
+            if evicted:
+                logger.info(f"Evicted {evicted} outputs")
+        except Exception as e:
+            logger.warning(f"Output eviction failed: {e}")
+
+
+def _media_type(filename: str) -> str:
+    return mimetypes.guess_type(filename)[0] or "application/octet-stream"
+
+
+def _render_request(**fields) -> RenderRequest:
+    """Build a RenderRequest from form fields, turning validation errors into 400s."""
+    sizes = fields.pop("sizes", None)
+    try:
+        if sizes:
+            fields["sizes"] = [int(size) for size in sizes.split(",")]
+        return RenderRequest(**fields)
+    except ValueError as e:
+        RENDER_ERRORS.inc()
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _inline_response(result: RenderResponse) -> Response:
+    """Return the rendered image itself, with the render metadata as headers."""
+    data = renderer.output_store.get(result.filename)
+    if data is None:
+        raise RuntimeError(f"Output {result.filename} was evicted before it could be returned")
+
+    return Response(
+        content=data,
+        media_type=_media_type(result.filename),
+        headers={
+            "X-Filename": result.filename,
+            "X-Emotion": result.emotion.value,
+            "X-Intensity": str(result.intensity),
+            "X-Latency-Ms": str(result.latency_ms),
+            "X-Gpu-Used": str(result.gpu_used).lower(),
+            "X-Width": str(result.width),
+            "X-Height": str(result.height),
+            "X-Bytes": str(result.bytes),
+            "X-Encode-Ms": str(result.encode_ms),
+        }
+    )
+
+
 app = FastAPI(
     title="LivePortrait Avatar Service",
     description="GPU-accelerated portrait animation with emotion support",
@@ -82,31 +194,59 @@ async def health_check():
         gpu_available=gpu_available,
         gpu_name=gpu_name,
         cuda_version=torch.version.cuda if gpu_available else None,
-        model_loaded=renderer.is_ready if renderer else False
+        model_loaded=renderer.is_ready if renderer else False,
+        inference=renderer.executor.stats() if renderer else None
     )
 
 
 @app.get("/metrics")
 async def metrics():
     """Prometheus metrics endpoint."""
+    if renderer:
+        stats = renderer.output_store.stats()
+        for tier in ("memory", "disk"):
+            OUTPUT_STORE_BYTES.labels(tier=tier).set(stats[f"{tier}_bytes"])
+            OUTPUT_STORE_ITEMS.labels(tier=tier).set(stats[f"{tier}_items"])
+
+        stats = renderer.executor.stats()
+        for priority, depth in stats["queued"].items():
+            INFERENCE_QUEUE_DEPTH.labels(priority=priority).set(depth)
+        INFERENCE_IN_FLIGHT.set(stats["in_flight"])
+
+        AVATARS.set(len(renderer.avatars.list()))
+        AVATAR_STORAGE_BYTES.set(renderer.avatars.storage_bytes())
+
+    if torch.cuda.is_available():
+        GPU_MEMORY.labels(kind="allocated").set(torch.cuda.memory_allocated())
+        GPU_MEMORY.labels(kind="reserved").set(torch.cuda.memory_reserved())
     return Response(content=generate_latest(), media_type="text/plain")
 
 
 @app.post("/render", response_model=RenderResponse)
 async def render_avatar(
-    source_image: UploadFile = File(..., description="Source portrait image"),
+    source_image: Optional[UploadFile] = File(None, description="Source portrait image"),
+    avatar_id: Optional[str] = Form(None, description="Registered avatar (instead of source_image)"),
     emotion: EmotionType = Form(EmotionType.NEUTRAL, description="Target emotion"),
     intensity: float = Form(0.7, ge=0.0, le=1.0, description="Emotion intensity (0-1)"),
-    output_format: str = Form("png", description="Output format (png/jpg)")
+    output_format: str = Form("png", description="Output format (png/jpg/webp)"),
+    quality: Optional[int] = Form(None, description="JPEG/WebP quality 1-100 (default 85/80)"),
+    effort: int = Form(0, description="Encoder effort 0-6 (0 = fastest, 6 = smallest)"),
+    sizes: Optional[str] = Form(None, description="Extra output sizes, longest side in px (e.g. 256,128)"),
+    inline: bool = Query(False, description="Return the image bytes instead of JSON")
 ):
     """
     Render animated avatar from source image with specified emotion.
 
     Args:
         source_image: Source portrait image (JPEG/PNG)
+        avatar_id: Registered avatar; returns the nearest pre-rendered frame
         emotion: Target emotion (neutral, happy, sad, surprised)
         intensity: Emotion intensity (0.0 to 1.0)
         output_format: Output image format
+        quality: Encoder quality for jpg/webp
+        effort: Encoder effort (0 = fast path, 6 = smallest output)
+        sizes: Resolution ladder; each size is downsampled from the same render
+        inline: Return the image itself (metadata in X-* headers) instead of JSON
 
     Returns:
         RenderResponse with output image path and metadata
@@ -117,20 +257,31 @@ async def render_avatar(
         RENDER_ERRORS.inc()
         raise HTTPException(status_code=503, detail="Renderer not ready")
 
-    try:
-        with REQUEST_LATENCY.time():
-            # Read uploaded image
-            image_data = await source_image.read()
-
-            # Create render request
-            request = RenderRequest(
-                emotion=emotion,
-                intensity=intensity,
-                output_format=output_format
-            )
+    if (source_image is None) == (avatar_id is None):
+        raise HTTPException(status_code=400, detail="Provide either source_image or avatar_id")
+
+    avatar = renderer.avatars.get(avatar_id) if avatar_id else None
+    if avatar_id and avatar is None:
+        raise HTTPException(status_code=404, detail=f"Unknown avatar: {avatar_id}")
+
+    # Create render request
+    request = _render_request(
+        emotion=emotion,
+        intensity=intensity,
+        output_format=output_format,
+        quality=quality,
+        effort=effort,
+        sizes=sizes
+    )
 
+    try:
+        with REQUEST_LATENCY.time(), RENDERS_IN_PROGRESS.track_inprogress():
             # Render avatar
-            result = await renderer.render(image_data, request)
+            if avatar:
+                result = await renderer.render_avatar(avatar, request)
+            else:
+                image_data = await source_image.read()
+                result = await renderer.render(image_data, request)
 
             logger.info(
                 f"Render completed: emotion={emotion}, "
@@ -138,7 +289,7 @@ async def render_avatar(
                 f"gpu={result.gpu_used}"
             )
 
-            return result
+            return _inline_response(result) if inline else result
 
     except Exception as e:
         RENDER_ERRORS.inc()
@@ -148,13 +299,26 @@ async def render_avatar(
 
 @app.post("/render/batch", response_model=list[RenderResponse])
 async def render_batch(
+    response: Response,
     source_image: UploadFile = File(...),
     emotions: list[EmotionType] = Form(...),
-    intensity: float = Form(0.7, ge=0.0, le=1.0)
+    intensity: float = Form(0.7, ge=0.0, le=1.0),
+    output_format: str = Form("png", description="Output format (png/jpg/webp)"),
+    quality: Optional[int] = Form(None, description="JPEG/WebP quality 1-100 (default 85/80)"),
+    effort: int = Form(0, description="Encoder effort 0-6 (0 = fastest, 6 = smallest)"),
+    inline: bool = Query(False, description="Return a ZIP of the images instead of JSON")
 ):
     """
     Render multiple emotion variations from single source image.
     Useful for pre-generating emotion set for a character.
+
+    The source is decoded once and all emotions are rendered in one batch.
+    Each result's latency_ms is the time until that emotion's output was
+    saved; the whole batch is reported in X-Total-Ms, with the shared stages
+    in X-Decode-Ms, X-Inference-Ms and X-Encode-Ms.
+
+    With inline=true the response is a ZIP with one image per emotion and
+    results.json holding the render responses.
     """
     REQUEST_COUNT.inc()
 
@@ -162,20 +326,43 @@ async def render_batch(
         RENDER_ERRORS.inc()
         raise HTTPException(status_code=503, detail="Renderer not ready")
 
+    options = _render_request(output_format=output_format, quality=quality, effort=effort)
+
     try:
-        image_data = await source_image.read()
-        results = []
-
-        for emotion in emotions:
-            request = RenderRequest(
-                emotion=emotion,
-                intensity=intensity,
-                output_format="png"
+        with REQUEST_LATENCY.time(), RENDERS_IN_PROGRESS.track_inprogress():
+            image_data = await source_image.read()
+
+            results, timings = await renderer.render_batch(
+                image_data,
+                emotions,
+                intensity,
+                output_format=options.output_format,
+                quality=options.quality,
+                effort=options.effort
+            )
+
+            if inline:
+                buffer = io.BytesIO()
+                with zipfile.ZipFile(buffer, "w", zipfile.ZIP_STORED) as archive:
+                    for result in results:
+                        data = renderer.output_store.get(result.filename)
+                        if data is None:
+                            raise RuntimeError(f"Output {result.filename} was evicted before it could be returned")
+                        archive.writestr(result.filename, data)
+                    archive.writestr("results.json", json.dumps([r.model_dump(mode="json") for r in results]))
+                response = Response(content=buffer.getvalue(), media_type="application/zip")
+
+            response.headers["X-Total-Ms"] = str(timings["total_ms"])
+            response.headers["X-Decode-Ms"] = str(timings["decode_ms"])
+            response.headers["X-Inference-Ms"] = str(timings["inference_ms"])
+            response.headers["X-Encode-Ms"] = str(timings["encode_ms"])
+
+            logger.info(
+                f"Batch render completed: emotions={len(results)}, "
+                f"latency={timings['total_ms']}ms"
             )
-            result = await renderer.render(image_data, request)
-            results.append(result)
 
-        return results
+            return response if inline else results
 
     except Exception as e:
         RENDER_ERRORS.inc()
@@ -183,24 +370,144 @@ async def render_batch(
         raise HTTPException(status_code=500, detail=f"Batch render failed: {str(e)}")
 
 
+@app.post("/render/transition", response_model=TransitionResponse)
+async def render_transition(
+    source_image: UploadFile = File(..., description="Source portrait image"),
+    from_emotion: EmotionType = Form(EmotionType.NEUTRAL, description="Emotion of the first frame"),
+    to_emotion: EmotionType = Form(..., description="Emotion of the last frame"),
+    frames: int = Form(12, ge=2, le=120, description="Number of frames including both end points"),
+    easing: EasingType = Form(EasingType.EASE_IN_OUT, description="Easing curve"),
+    intensity: float = Form(0.7, ge=0.0, le=1.0, description="Emotion intensity (0-1)"),
+    output: TransitionOutput = Form(TransitionOutput.WEBP, description="Animated webp, mp4 or PNG frames"),
+    fps: float = Form(25.0, gt=0.0, le=60.0, description="Playback frame rate"),
+    inline: bool = Query(False, description="Return the animation (or a ZIP of frames) instead of JSON")
+):
+    """
+    Render an eased transition between two emotions.
+
+    All frames are interpolated in one vectorized step and rendered in one
+    batched inference call. render_fps in the response is the number of
+    frames produced per second of request latency.
+    """
+    REQUEST_COUNT.inc()
+
+    if not renderer or not renderer.is_ready:
+        RENDER_ERRORS.inc()
+        raise HTTPException(status_code=503, detail="Renderer not ready")
+
+    try:
+        with REQUEST_LATENCY.time(), RENDERS_IN_PROGRESS.track_inprogress():
+            image_data = await source_image.read()
+
+            result = await renderer.render_transition(
+                image_data, from_emotion, to_emotion, frames, easing, intensity, output, fps
+            )
+
+            logger.info(
+                f"Transition completed: {from_emotion.value}->{to_emotion.value}, "
+                f"frames={frames}, latency={result.latency_ms}ms, render_fps={result.render_fps}"
+            )
+
+            if not inline:
+                return result
+
+            headers = {
+                "X-Frames": str(result.frames),
+                "X-Render-Fps": str(result.render_fps),
+                "X-Latency-Ms": str(result.latency_ms),
+            }
+            if output != TransitionOutput.FRAMES:
+                data = renderer.output_store.get(result.filenames[0])
+                if data is None:
+                    raise RuntimeError(f"Output {result.filenames[0]} was evicted before it could be returned")
+                return Response(content=data, media_type=_media_type(result.filenames[0]), headers=headers)
+
+            buffer = io.BytesIO()
+            with zipfile.ZipFile(buffer, "w", zipfile.ZIP_STORED) as archive:
+                for index, filename in enumerate(result.filenames):
+                    data = renderer.output_store.get(filename)
+                    if data is None:
+                        raise RuntimeError(f"Output {filename} was evicted before it could be returned")
+                    archive.writestr(f"frame_{index:03d}.png", data)
+                archive.writestr("result.json", result.model_dump_json())
+            return Response(content=buffer.getvalue(), media_type="application/zip", headers=headers)
+
+    except Exception as e:
+        RENDER_ERRORS.inc()
+        logger.error(f"Transition render error: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Transition render failed: {str(e)}")
+
+
+@app.post("/avatars", response_model=AvatarResponse, status_code=202)
+async def register_avatar(
+    source_image: UploadFile = File(..., description="Source portrait image"),
+    avatar_id: Optional[str] = Form(None, description="Avatar id (generated if omitted, replaced if it exists)"),
+    intensities: Optional[str] = Form(None, description="Comma-separated intensities to pre-render")
+):
+    """
+    Register a portrait and pre-render every emotion at the given intensities.
+
+    Pre-rendering runs in the background at batch priority; poll
+    GET /avatars/{avatar_id} for progress and storage footprint.
+    """
+    if not renderer or not renderer.is_ready:
+        raise HTTPException(status_code=503, detail="Renderer not ready")
+
+    try:
+        levels = [float(i) for i in intensities.split(",")] if intensities else AVATAR_INTENSITIES
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid intensities: {intensities}")
+    if not levels or not all(0.0 <= i <= 1.0 for i in levels):
+        raise HTTPException(status_code=400, detail="Intensities must be between 0 and 1")
+
+    try:
+        avatar = renderer.register_avatar(await source_image.read(), levels, avatar_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    logger.info(f"Avatar {avatar.avatar_id} registered: {avatar.total} frames to pre-render")
+    return avatar.info()
+
+
+@app.get("/avatars", response_model=list[AvatarResponse])
+async def list_avatars():
+    """List registered avatars with pre-render progress."""
+    return [avatar.info() for avatar in renderer.avatars.list()] if renderer else []
+
+
+@app.get("/avatars/{avatar_id}", response_model=AvatarResponse)
+async def get_avatar(avatar_id: str):
+    """Pre-render progress and storage footprint of an avatar."""
+    avatar = renderer.avatars.get(avatar_id) if renderer else None
+    if avatar is None:
+        raise HTTPException(status_code=404, detail=f"Unknown avatar: {avatar_id}")
+    return avatar.info()
+
+
+@app.delete("/avatars/{avatar_id}")
+async def delete_avatar(avatar_id: str):
+    """Remove an avatar and its pre-rendered frames."""
+    if renderer and renderer.avatars.delete(avatar_id):
+        return {"status": "deleted", "avatar_id": avatar_id}
+
+    raise HTTPException(status_code=404, detail=f"Unknown avatar: {avatar_id}")
+
+
 @app.get("/output/{filename}")
 async def get_output_file(filename: str):
     """Retrieve rendered output file."""
-    file_path = f"/tmp/liveportrait_output/{filename}"
+    data = renderer.output_store.get(filename) if renderer else None
 
-    if not os.path.exists(file_path):
+    if data is None:
         raise HTTPException(status_code=404, detail="Output file not found")
 
-    return FileResponse(file_path)
+    return Response(content=data, media_type=_media_type(filename))
 
 
 @app.delete("/output/{filename}")
 async def delete_output_file(filename: str):
     """Delete rendered output file to free storage."""
-    file_path = f"/tmp/liveportrait_output/{filename}"
-
-    if os.path.exists(file_path):
-        os.remove(file_path)
+    if renderer and renderer.output_store.delete(filename):
         return {"status": "deleted", "filename": filename}
 
     raise HTTPException(status_code=404, detail="Output file not found")
@@ -3,8 +3,11 @@ Data models for LivePortrait Avatar Service.
 """
 
 from enum import Enum
-from typing import Optional
-from pydantic import BaseModel, Field
+from typing import List, Optional
+from pydantic import BaseModel, Field, field_validator
+
+# Supported still image output formats ("jpeg" is accepted as "jpg")
+OUTPUT_FORMATS = ("png", "jpg", "webp")
 
 
 class EmotionType(str, Enum):
@@ -18,6 +21,21 @@ class EmotionType(str, Enum):
     FEARFUL = "fearful"
 
 
+class EasingType(str, Enum):
+    """Easing curves for emotion transitions."""
+    LINEAR = "linear"
+    EASE_IN = "ease_in"
+    EASE_OUT = "ease_out"
+    EASE_IN_OUT = "ease_in_out"
+
+
+class TransitionOutput(str, Enum):
+    """Output container for emotion transitions."""
+    WEBP = "webp"
+    MP4 = "mp4"
+    FRAMES = "frames"
+
+
 class RenderRequest(BaseModel):
     """Request model for avatar rendering."""
     emotion: EmotionType = Field(
@@ -34,6 +52,22 @@ class RenderRequest(BaseModel):
         default="png",
         description="Output image format (png, jpg, webp)"
     )
+    quality: Optional[int] = Field(
+        default=None,
+        ge=1,
+        le=100,
+        description="JPEG/WebP quality (default 85 for jpg, 80 for webp; ignored for png)"
+    )
+    effort: int = Field(
+        default=0,
+        ge=0,
+        le=6,
+        description="Encoder effort (0 = fastest, 6 = smallest output)"
+    )
+    sizes: List[int] = Field(
+        default_factory=list,
+        description="Extra output sizes (longest side in px) downsampled from the same render"
+    )
     width: Optional[int] = Field(
         default=512,
         ge=256,
@@ -48,9 +82,36 @@ class RenderRequest(BaseModel):
     )
 
 
+    @field_validator("output_format")
+    @classmethod
+    def normalize_output_format(cls, value: str) -> str:
+        value = value.lower()
+        value = "jpg" if value == "jpeg" else value
+        if value not in OUTPUT_FORMATS:
+            raise ValueError(f"Unsupported output format: {value} (supported: {', '.join(OUTPUT_FORMATS)})")
+        return value
+
+    @field_validator("sizes")
+    @classmethod
+    def check_sizes(cls, value: List[int]) -> List[int]:
+        if any(not 16 <= size <= 1024 for size in value):
+            raise ValueError("Output sizes must be between 16 and 1024 px")
+        return value
+
+
+class OutputVariant(BaseModel):
+    """An encoded output stored for GET /output/{filename}."""
+    filename: str = Field(description="Output filename")
+    output_path: str = Field(description="URL path to fetch the output")
+    width: int = Field(description="Image width")
+    height: int = Field(description="Image height")
+    bytes: int = Field(description="Encoded size in bytes")
+    encode_ms: float = Field(description="Encoding time in milliseconds")
+
+
 class RenderResponse(BaseModel):
     """Response model for avatar rendering."""
-    output_path: str = Field(description="Path to rendered output image")
+    output_path: str = Field(description="URL path to fetch the rendered output (GET /output/{filename})")
     filename: str = Field(description="Output filename")
     emotion: EmotionType = Field(description="Applied emotion")
     intensity: float = Field(description="Applied intensity")
@@ -59,6 +120,48 @@ class RenderResponse(BaseModel):
     model_version: str = Field(description="LivePortrait model version")
     width: int = Field(description="Output image width")
     height: int = Field(description="Output image height")
+    bytes: int = Field(description="Encoded output size in bytes")
+    encode_ms: float = Field(description="Output encoding time in milliseconds")
+    variants: List[OutputVariant] = Field(
+        default_factory=list,
+        description="Downsampled outputs requested via sizes, largest first"
+    )
+
+
+class TransitionResponse(BaseModel):
+    """Response model for emotion transition rendering."""
+    filenames: List[str] = Field(
+        description="Output filenames (one animation, or one PNG per frame), fetch via GET /output/{filename}"
+    )
+    from_emotion: EmotionType = Field(description="Start emotion")
+    to_emotion: EmotionType = Field(description="End emotion")
+    intensity: float = Field(description="Applied intensity")
+    easing: EasingType = Field(description="Applied easing curve")
+    output: TransitionOutput = Field(description="Output container")
+    frames: int = Field(description="Number of frames")
+    fps: float = Field(description="Playback frame rate of the animation")
+    render_fps: float = Field(description="Frames per second achieved (frames / latency)")
+    latency_ms: float = Field(description="Total latency in milliseconds")
+    inference_ms: float = Field(description="Batched inference time in milliseconds (incl. decode)")
+    encode_ms: float = Field(description="Animation/frame encoding time in milliseconds")
+    gpu_used: bool = Field(description="Whether GPU was used for rendering")
+    model_version: str = Field(description="LivePortrait model version")
+    width: int = Field(description="Frame width")
+    height: int = Field(description="Frame height")
+
+
+class AvatarResponse(BaseModel):
+    """Registration and pre-render status of an avatar."""
+    avatar_id: str = Field(description="Avatar id, pass as avatar_id to /render")
+    status: str = Field(description="Pre-render status (pending, rendering, ready, failed)")
+    rendered: int = Field(description="Pre-rendered frames")
+    total: int = Field(description="Frames in the emotion x intensity grid")
+    progress: float = Field(description="Pre-render progress (0-1)")
+    intensities: List[float] = Field(description="Pre-rendered intensities")
+    sprite_format: str = Field(description="Encoding of the pre-rendered frames")
+    storage_bytes: int = Field(description="Memory held by the source image and frames")
+    render_ms: float = Field(description="Pre-render time so far in milliseconds")
+    error: Optional[str] = Field(default=None, description="Pre-render error, if failed")
 
 
 class HealthResponse(BaseModel):
@@ -68,6 +171,10 @@ class HealthResponse(BaseModel):
     gpu_name: Optional[str] = Field(default=None, description="GPU device name")
     cuda_version: Optional[str] = Field(default=None, description="CUDA version")
     model_loaded: bool = Field(description="Whether LivePortrait model is loaded")
+    inference: Optional[dict] = Field(
+        default=None,
+        description="Inference executor stats (queue depth, in-flight and coalesced renders)"
+    )
 
 
 class EmotionMapping(BaseModel):
@@ -0,0 +1,189 @@
+"""
+Output store for rendered frames - in-memory LRU with disk spill and TTL eviction.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class OutputStore:
+    """
+    Bounded store for rendered outputs, keyed by filename.
+
+    New outputs are kept in memory. When the memory budget is exceeded the
+    least recently used outputs are spilled to disk; when the disk budget is
+    exceeded the oldest files are deleted. Entries older than the TTL are
+    dropped from both tiers, on access and by evict() (run periodically).
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        memory_bytes: int,
+        disk_bytes: int,
+        ttl_s: float,
+        on_evict: Optional[Callable[[str], None]] = None
+    ):
+        """
+        Initialize output store.
+
+        Args:
+            directory: Directory for spilled outputs
+            memory_bytes: In-memory budget in bytes
+            disk_bytes: Disk budget in bytes (0 disables spilling)
+            ttl_s: Time to live per output in seconds (0 disables expiry)
+            on_evict: Called with the reason ("ttl" or "size") for every evicted output
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self.ttl_s = ttl_s
+        self.on_evict = on_evict
+
+        self._lock = threading.Lock()
+        # filename -> (data, created) in LRU order
+        self._memory: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()
+        # filename -> (size, created) in spill order
+        self._disk: "OrderedDict[str, Tuple[int, float]]" = OrderedDict()
+        self._memory_used = 0
+        self._disk_used = 0
+        self.evictions: Dict[str, int] = {"ttl": 0, "size": 0}
+        self.spills = 0
+
+        # Outputs left over from a previous run are managed like spilled ones
+        for path in sorted(self.directory.iterdir(), key=lambda p: p.stat().st_mtime):
+            if path.is_file():
+                size = path.stat().st_size
+                self._disk[path.name] = (size, path.stat().st_mtime)
+                self._disk_used += size
+
+    @staticmethod
+    def _valid_name(filename: str) -> bool:
+        return bool(filename) and Path(filename).name == filename and not filename.startswith(".")
+
+    def _expired(self, created: float, now: float) -> bool:
+        return self.ttl_s > 0 and now - created > self.ttl_s
+
+    def _evicted(self, reason: str):
+        self.evictions[reason] += 1
+        if self.on_evict:
+            self.on_evict(reason)
+
+    def _drop_disk(self, filename: str):
+        size, _ = self._disk.pop(filename)
+        self._disk_used -= size
+        (self.directory / filename).unlink(missing_ok=True)
+
+    def _drop_memory(self, filename: str) -> Tuple[bytes, float]:
+        data, created = self._memory.pop(filename)
+        self._memory_used -= len(data)
+        return data, created
+
+    def _enforce_budgets(self):
+        """Spill LRU outputs to disk, then trim the oldest files (lock held)."""
+        while self._memory_used > self.memory_bytes and self._memory:
+            filename = next(iter(self._memory))
+            data, created = self._drop_memory(filename)
+            if len(data) > self.disk_bytes:
+                self._evicted("size")
+                continue
+            (self.directory / filename).write_bytes(data)
+            self._disk[filename] = (len(data), created)
+            self._disk_used += len(data)
+            self.spills += 1
+
+        while self._disk_used > self.disk_bytes and self._disk:
+            self._drop_disk(next(iter(self._disk)))
+            self._evicted("size")
+
+    def put(self, filename: str, data: bytes):
+        """Store an output under filename."""
+        if not self._valid_name(filename):
+            raise ValueError(f"Invalid output filename: {filename}")
+
+        with self._lock:
+            self._delete(filename)
+            self._memory[filename] = (data, time.time())
+            self._memory_used += len(data)
+            self._enforce_budgets()
+
+    def get(self, filename: str) -> Optional[bytes]:
+        """Return the output bytes, or None if unknown or expired."""
+        if not self._valid_name(filename):
+            return None
+
+        now = time.time()
+        path = None
+        with self._lock:
+            if filename in self._memory:
+                data, created = self._memory[filename]
+                if self._expired(created, now):
+                    self._drop_memory(filename)
+                    self._evicted("ttl")
+                    return None
+                self._memory.move_to_end(filename)
+                return data
+
+            if filename in self._disk:
+                _, created = self._disk[filename]
+                if self._expired(created, now):
+                    self._drop_disk(filename)
+                    self._evicted("ttl")
+                    return None
+                path = self.directory / filename
+
+        if path is None:
+            return None
+        try:
+            return path.read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def _delete(self, filename: str) -> bool:
+        """Remove an output from either tier (lock held)."""
+        if filename in self._memory:
+            self._drop_memory(filename)
+            return True
+        if filename in self._disk:
+            self._drop_disk(filename)
+            return True
+        return False
+
+    def delete(self, filename: str) -> bool:
+        """Remove an output. Returns False if it was not stored."""
+        if not self._valid_name(filename):
+            return False
+        with self._lock:
+            return self._delete(filename)
+
+    def evict(self) -> int:
+        """Drop expired outputs and enforce budgets. Returns the number evicted."""
+        now = time.time()
+        with self._lock:
+            before = sum(self.evictions.values())
+            for tier, drop in ((self._memory, self._drop_memory), (self._disk, self._drop_disk)):
+                expired = [name for name, (_, created) in tier.items() if self._expired(created, now)]
+                for filename in expired:
+                    drop(filename)
+                    self._evicted("ttl")
+            self._enforce_budgets()
+            return sum(self.evictions.values()) - before
+
+    def stats(self) -> dict:
+        """Current size and eviction counters."""
+        with self._lock:
+            return {
+                "memory_items": len(self._memory),
+                "memory_bytes": self._memory_used,
+                "disk_items": len(self._disk),
+                "disk_bytes": self._disk_used,
+                "spills": self.spills,
+                "evictions": dict(self.evictions),
+            }
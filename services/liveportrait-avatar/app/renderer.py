@@ -3,21 +3,30 @@ LivePortrait Renderer - Core rendering engine with GPU acceleration.
 """
 
 import asyncio
+import hashlib
 import io
 import logging
 import os
 import sys
+import tempfile
 import time
 import uuid
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Callable, Dict, List, Optional, Tuple
 
 import cv2
+import imageio_ffmpeg
 import numpy as np
 import torch
 from PIL import Image
 
-from app.models import RenderRequest, RenderResponse, EmotionType, EmotionMapping
+from app.models import (
+    RenderRequest, RenderResponse, EmotionType, EmotionMapping, OutputVariant,
+    EasingType, TransitionOutput, TransitionResponse
+)
+from app.avatars import Avatar, AvatarRegistry
+from app.executor import InferenceExecutor, Priority
+from app.output_store import OutputStore
 
 logger = logging.getLogger(__name__)
 
@@ -72,13 +81,52 @@ class LivePortraitRenderer:
         ),
     }
 
-    def __init__(self, model_path: str, device: str = "cuda"):
+    # Motion parameter order used for batched parameter arrays
+    MOTION_PARAMS = (
+        "rotation_x", "rotation_y", "rotation_z",
+        "expression_scale", "mouth_open", "eye_open", "eyebrow_raise",
+    )
+
+    # Encoder quality when a request does not set one (PNG is lossless)
+    DEFAULT_QUALITY = {"jpg": 85, "webp": 80}
+
+    # Easing curves mapping transition progress t in [0, 1] to blend weight
+    EASINGS: Dict[EasingType, Callable[[np.ndarray], np.ndarray]] = {
+        EasingType.LINEAR: lambda t: t,
+        EasingType.EASE_IN: lambda t: t * t,
+        EasingType.EASE_OUT: lambda t: t * (2.0 - t),
+        EasingType.EASE_IN_OUT: lambda t: t * t * (3.0 - 2.0 * t),
+    }
+
+    def __init__(
+        self,
+        model_path: str,
+        device: str = "cuda",
+        output_dir: str = "/tmp/liveportrait_output",
+        output_memory_bytes: int = 128 * 1024 * 1024,
+        output_disk_bytes: int = 1024 * 1024 * 1024,
+        output_ttl_s: float = 900.0,
+        on_output_evict: Optional[Callable[[str], None]] = None,
+        inference_concurrency: int = 1,
+        on_stage: Optional[Callable[[str, float, Dict[str, str]], None]] = None,
+        on_cache_hit: Optional[Callable[[str], None]] = None,
+        max_avatars: int = 32
+    ):
         """
         Initialize LivePortrait renderer.
 
         Args:
             model_path: Path to pretrained model weights
             device: Device to use ('cuda' or 'cpu')
+            output_dir: Directory for outputs spilled from memory
+            output_memory_bytes: In-memory budget for rendered outputs
+            output_disk_bytes: Disk budget for spilled outputs
+            output_ttl_s: Time to live for rendered outputs in seconds
+            on_output_evict: Called with the reason for every evicted output
+            inference_concurrency: Number of renders allowed to run on the model at once
+            on_stage: Called with (stage, seconds, labels) for every timed render stage
+            on_cache_hit: Called with the cache name whenever a render is served from a cache
+            max_avatars: Maximum number of registered avatars with pre-rendered sprites
         """
         self.model_path = Path(model_path)
         self.device = device
@@ -91,8 +139,21 @@ class LivePortraitRenderer:
             sys.path.insert(0, str(liveportrait_path))
 
         self.pipeline = None
-        self.output_dir = Path("/tmp/liveportrait_output")
-        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.output_dir = Path(output_dir)
+        self.output_store = OutputStore(
+            self.output_dir,
+            memory_bytes=output_memory_bytes,
+            disk_bytes=output_disk_bytes,
+            ttl_s=output_ttl_s,
+            on_evict=on_output_evict
+        )
+        self.on_stage = on_stage
+        self.on_cache_hit = on_cache_hit
+        self.executor = InferenceExecutor(
+            inference_concurrency,
+            on_coalesce=lambda: self._cache_hit("inflight")
+        )
+        self.avatars = AvatarRegistry(max_avatars)
 
     async def initialize(self):
         """Initialize LivePortrait model and pipeline."""
@@ -139,10 +200,12 @@ class LivePortraitRenderer:
             dummy_image[:] = (128, 128, 128)  # Gray image
 
             # Run a quick inference
-            loop = asyncio.get_event_loop()
-            await loop.run_in_executor(
-                None,
-                lambda: self._process_image(dummy_image, EmotionType.NEUTRAL, 0.5)
+            await self.executor.run(
+                Priority.INTERACTIVE,
+                self._process_image,
+                dummy_image,
+                EmotionType.NEUTRAL,
+                0.5
             )
 
             logger.info("Model warmup complete")
@@ -166,35 +229,333 @@ class LivePortraitRenderer:
         Returns:
             Processed image as numpy array
         """
-        # Get emotion mapping
-        emotion_map = self.EMOTION_MAPPINGS[emotion]
-
-        # Apply intensity scaling
-        scaled_params = {
-            'rotation_x': emotion_map.rotation_x * intensity,
-            'rotation_y': emotion_map.rotation_y * intensity,
-            'rotation_z': emotion_map.rotation_z * intensity,
-            'expression_scale': 1.0 + (emotion_map.expression_scale - 1.0) * intensity,
-            'mouth_open': emotion_map.mouth_open * intensity,
-            'eye_open': 1.0 - (1.0 - emotion_map.eye_open) * intensity,
-            'eyebrow_raise': emotion_map.eyebrow_raise * intensity,
-        }
+        return self._process_batch(image, [emotion], intensity)[0]
+
+    def _scaled_params(self, emotions: List[EmotionType], intensity: float) -> np.ndarray:
+        """
+        Intensity-scaled motion parameters for several emotions at once.
+
+        Returns:
+            Array of shape (len(emotions), len(MOTION_PARAMS)), columns in MOTION_PARAMS order
+        """
+        base = np.array(
+            [[getattr(self.EMOTION_MAPPINGS[e], name) for name in self.MOTION_PARAMS] for e in emotions],
+            dtype=np.float32,
+        ).reshape(len(emotions), len(self.MOTION_PARAMS))
+        # Rotations, mouth and eyebrows scale from 0; expression scale and eye openness from 1
+        rest = np.array([0.0, 0.0, 0.0, 1.0, 0.0, 1.0, 0.0], dtype=np.float32)
+        return rest + (base - rest) * intensity
+
+    def _transition_params(
+        self,
+        from_emotion: EmotionType,
+        to_emotion: EmotionType,
+        intensity: float,
+        frames: int,
+        easing: EasingType
+    ) -> np.ndarray:
+        """
+        Motion parameters for each frame of an eased transition between two emotions.
+
+        Returns:
+            Array of shape (frames, len(MOTION_PARAMS)); first row is from_emotion, last is to_emotion
+        """
+        start, end = self._scaled_params([from_emotion, to_emotion], intensity)
+        weights = self.EASINGS[easing](np.linspace(0.0, 1.0, frames, dtype=np.float32))
+        return start + (end - start) * weights[:, np.newaxis]
+
+    def _process_batch(
+        self,
+        image: np.ndarray,
+        emotions: List[EmotionType],
+        intensity: float
+    ) -> np.ndarray:
+        """
+        Process one source image for several emotions in a single inference call.
+
+        Args:
+            image: Input image as numpy array (RGB, HxWx3)
+            emotions: Target emotions
+            intensity: Emotion intensity (0-1), shared by all emotions
+
+        Returns:
+            Processed images as numpy array of shape (len(emotions), H, W, 3)
+        """
+        return self._process_params(image, self._scaled_params(emotions, intensity))
 
+    def _process_params(self, image: np.ndarray, scaled_params: np.ndarray) -> np.ndarray:
+        """
+        Process one source image for a batch of motion parameter rows in a single inference call.
+
+        Args:
+            image: Input image as numpy array (RGB, HxWx3)
+            scaled_params: Motion parameters, shape (N, len(MOTION_PARAMS))
+
+        Returns:
+            Processed images as numpy array of shape (N, H, W, 3)
+        """
         # TODO: Implement actual LivePortrait inference
         # This is a placeholder that needs to be replaced with real LivePortrait API calls
         # The actual implementation will depend on LivePortrait's pipeline API
 
-        # For now, return the input image (placeholder)
-        # In real implementation, this would call:
+        # For now, return the input image once per parameter row (placeholder)
+        # In real implementation, the source features are extracted once and
+        # all rows of scaled_params are driven through the warp/decode step as one batch:
         # output = self.pipeline.execute(image, motion_params=scaled_params)
 
         logger.warning("Using placeholder renderer - LivePortrait integration pending")
-        return image
+        return np.repeat(image[np.newaxis], len(scaled_params), axis=0)
+
+    def _observe(self, stage: str, seconds: float, labels: Optional[Dict[str, str]]):
+        """Report a stage duration (no-op for unlabelled internal calls such as warm-up)."""
+        if self.on_stage and labels is not None:
+            self.on_stage(stage, seconds, labels)
+
+    def _cache_hit(self, cache: str):
+        if self.on_cache_hit:
+            self.on_cache_hit(cache)
+
+    @staticmethod
+    def _stage_labels(
+        kind: str, emotions: List[EmotionType], output_format: str, width: Optional[int], height: Optional[int]
+    ) -> Dict[str, str]:
+        """Metric labels; emotion is empty when the render spans several emotions."""
+        return {
+            "kind": kind,
+            "emotion": emotions[0].value if len(set(emotions)) == 1 else "",
+            "format": output_format,
+            "resolution": f"{width}x{height}" if width and height else "source",
+        }
+
+    def _load_image(
+        self,
+        image_data: bytes,
+        width: Optional[int],
+        height: Optional[int],
+        labels: Optional[Dict[str, str]] = None
+    ) -> np.ndarray:
+        """
+        Decode source image bytes to a contiguous RGB numpy array, resized to the target dimensions.
+
+        JPEGs are decoded in draft mode: libjpeg scales by 1/2, 1/4 or 1/8 during
+        the DCT, down to the smallest size still covering the target, and decodes
+        straight to RGB. A 12 MP phone photo for a 512x512 render is decoded at
+        1008x756 instead of 4032x3024.
+        """
+        start = time.perf_counter()
+        image = Image.open(io.BytesIO(image_data))
+
+        if width and height:
+            # No-op for formats without draft support
+            image.draft("RGB", (width, height))
+
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+        image.load()
+        decoded = time.perf_counter()
+        self._observe("decode", decoded - start, labels)
+
+        if width and height and image.size != (width, height):
+            # reducing_gap: integer box reduction first, then LANCZOS on the small image
+            image = image.resize((width, height), Image.Resampling.LANCZOS, reducing_gap=3.0)
+
+        image_np = np.ascontiguousarray(np.asarray(image))
+        self._observe("resize", time.perf_counter() - decoded, labels)
+        return image_np
+
+    def _save_output(
+        self,
+        output_np: np.ndarray,
+        output_format: str,
+        labels: Optional[Dict[str, str]] = None,
+        quality: Optional[int] = None,
+        effort: int = 0
+    ) -> OutputVariant:
+        """Encode a rendered frame and put it into the output store."""
+        start = time.perf_counter()
+        data = self._encode_image(output_np, output_format, labels, quality, effort)
+        encoded = time.perf_counter()
+
+        output_filename = f"{uuid.uuid4()}.{output_format}"
+        self.output_store.put(output_filename, data)
+        self._observe("save", time.perf_counter() - encoded, labels)
+
+        return OutputVariant(
+            filename=output_filename,
+            output_path=f"/output/{output_filename}",
+            width=output_np.shape[1],
+            height=output_np.shape[0],
+            bytes=len(data),
+            encode_ms=round((encoded - start) * 1000, 2)
+        )
+
+    def _save_variant(
+        self,
+        output_np: np.ndarray,
+        size: int,
+        output_format: str,
+        labels: Optional[Dict[str, str]] = None,
+        quality: Optional[int] = None,
+        effort: int = 0
+    ) -> OutputVariant:
+        """Downsample a rendered frame so its longest side is size px, then encode and store it."""
+        start = time.perf_counter()
+        height, width = output_np.shape[:2]
+        scale = size / max(height, width)
+        small = cv2.resize(
+            output_np,
+            (max(1, round(width * scale)), max(1, round(height * scale))),
+            interpolation=cv2.INTER_AREA
+        )
+        self._observe("downsample", time.perf_counter() - start, labels)
+        return self._save_output(small, output_format, labels, quality, effort)
+
+    async def _save_outputs(
+        self,
+        output_np: np.ndarray,
+        request: RenderRequest,
+        labels: Optional[Dict[str, str]] = None
+    ) -> Tuple[OutputVariant, List[OutputVariant]]:
+        """Encode the full-size frame and the requested resolution ladder in parallel."""
+        loop = asyncio.get_event_loop()
+        ladder = sorted({size for size in request.sizes if size < max(output_np.shape[:2])}, reverse=True)
+
+        saved = await asyncio.gather(
+            loop.run_in_executor(
+                None, self._save_output, output_np, request.output_format, labels, request.quality, request.effort
+            ),
+            *(
+                loop.run_in_executor(
+                    None, self._save_variant, output_np, size, request.output_format,
+                    labels, request.quality, request.effort
+                )
+                for size in ladder
+            )
+        )
+        return saved[0], list(saved[1:])
+
+    def _encode_image(
+        self,
+        output_np: np.ndarray,
+        output_format: str,
+        labels: Optional[Dict[str, str]] = None,
+        quality: Optional[int] = None,
+        effort: int = 0
+    ) -> bytes:
+        """
+        Encode a rendered frame (H, W, 3 RGB) as png, jpg or webp.
+
+        effort (0-6) trades encode time for size: it is the WebP method, enables
+        JPEG Huffman optimization from 4 and sets the PNG zlib level (1-9).
+        Effort 0 is the fast path - libjpeg-turbo through OpenCV for JPEG,
+        WebP method 0 (about 4x faster than the libwebp default) and PNG level 1.
+        """
+        start = time.perf_counter()
+        frame = np.ascontiguousarray(output_np.astype('uint8'))
+
+        if output_format == "webp":
+            buffer = io.BytesIO()
+            Image.fromarray(frame).save(
+                buffer,
+                format="WEBP",
+                quality=quality or self.DEFAULT_QUALITY["webp"],
+                method=effort
+            )
+            data = buffer.getvalue()
+        else:
+            if output_format == "jpg":
+                params = [
+                    cv2.IMWRITE_JPEG_QUALITY, quality or self.DEFAULT_QUALITY["jpg"],
+                    cv2.IMWRITE_JPEG_OPTIMIZE, int(effort >= 4),
+                ]
+            else:
+                params = [cv2.IMWRITE_PNG_COMPRESSION, 1 + round(effort * 8 / 6)]
+            ok, encoded = cv2.imencode(f".{output_format}", cv2.cvtColor(frame, cv2.COLOR_RGB2BGR), params)
+            if not ok:
+                raise ValueError(f"Failed to encode {output_format}")
+            data = encoded.tobytes()
+
+        self._observe("encode", time.perf_counter() - start, labels)
+        return data
+
+    def _encode_animation(self, frames: np.ndarray, output: TransitionOutput, fps: float) -> bytes:
+        """Encode rendered frames (N, H, W, 3) as an animated WebP or H.264 MP4."""
+        if output == TransitionOutput.WEBP:
+            images = [Image.fromarray(frame) for frame in frames.astype('uint8')]
+            buffer = io.BytesIO()
+            images[0].save(
+                buffer,
+                format="WEBP",
+                save_all=True,
+                append_images=images[1:],
+                duration=round(1000 / fps),
+                loop=0
+            )
+            return buffer.getvalue()
+
+        height, width = frames.shape[1:3]
+        with tempfile.NamedTemporaryFile(suffix=".mp4") as tmp:
+            writer = imageio_ffmpeg.write_frames(
+                tmp.name,
+                (width, height),
+                fps=fps,
+                codec="libx264",
+                pix_fmt_out="yuv420p",
+                macro_block_size=2,
+                output_params=["-movflags", "+faststart"]
+            )
+            writer.send(None)
+            for frame in frames.astype('uint8'):
+                writer.send(np.ascontiguousarray(frame))
+            writer.close()
+            return Path(tmp.name).read_bytes()
+
+    async def _infer(
+        self,
+        image_data: bytes,
+        scaled_params: np.ndarray,
+        width: Optional[int],
+        height: Optional[int],
+        priority: Priority,
+        labels: Optional[Dict[str, str]] = None
+    ) -> Tuple[np.ndarray, Dict[str, float]]:
+        """
+        Decode the source and render it for the given motion parameters on the inference executor.
+
+        Identical concurrent requests (same image bytes, motion parameters and
+        size) share one decode and inference, at the highest priority of the
+        callers; the result must not be modified.
+
+        Returns:
+            (outputs of shape (len(scaled_params), H, W, 3), decode/inference timings in ms)
+        """
+        key = (hashlib.sha256(image_data).hexdigest(), scaled_params.tobytes(), scaled_params.shape, width, height)
+
+        def process(image_np: np.ndarray, queued: float) -> np.ndarray:
+            start = time.perf_counter()
+            self._observe("queue", start - queued, labels)
+            outputs = self._process_params(image_np, scaled_params)
+            self._observe("inference", time.perf_counter() - start, labels)
+            return outputs
+
+        async def job():
+            loop = asyncio.get_event_loop()
+            start_time = time.time()
+            image_np = await loop.run_in_executor(None, self._load_image, image_data, width, height, labels)
+            decoded = time.time()
+            outputs = await self.executor.run(priority, process, image_np, time.perf_counter())
+            return outputs, {
+                "decode_ms": round((decoded - start_time) * 1000, 2),
+                "inference_ms": round((time.time() - decoded) * 1000, 2),
+            }
+
+        return await self.executor.coalesce(key, job, priority)
 
     async def render(
         self,
         image_data: bytes,
-        request: RenderRequest
+        request: RenderRequest,
+        priority: Priority = Priority.INTERACTIVE
     ) -> RenderResponse:
         """
         Render avatar with specified emotion.
@@ -202,6 +563,7 @@ class LivePortraitRenderer:
         Args:
             image_data: Source image bytes
             request: Render request with emotion parameters
+            priority: Inference queue priority
 
         Returns:
             RenderResponse with output path and metadata
@@ -209,57 +571,338 @@ class LivePortraitRenderer:
         start_time = time.time()
 
         try:
-            # Load and preprocess image
-            image = Image.open(io.BytesIO(image_data)).convert("RGB")
+            labels = self._stage_labels(
+                "single", [request.emotion], request.output_format, request.width, request.height
+            )
 
-            # Resize to target dimensions
-            if request.width and request.height:
-                image = image.resize((request.width, request.height), Image.Resampling.LANCZOS)
+            # Load, preprocess and run inference off the event loop
+            outputs, _ = await self._infer(
+                image_data,
+                self._scaled_params([request.emotion], request.intensity),
+                request.width,
+                request.height,
+                priority,
+                labels
+            )
 
-            # Convert to numpy array
-            image_np = np.array(image)
+            # Save output (and the resolution ladder, if requested)
+            output, variants = await self._save_outputs(outputs[0], request, labels)
 
-            # Run inference in executor to avoid blocking event loop
-            loop = asyncio.get_event_loop()
-            output_np = await loop.run_in_executor(
-                None,
-                self._process_image,
-                image_np,
-                request.emotion,
-                request.intensity
+            # Calculate latency
+            latency_ms = (time.time() - start_time) * 1000
+
+            return self._render_response(output, request, request.intensity, latency_ms, variants)
+
+        except Exception as e:
+            logger.error(f"Render failed: {e}", exc_info=True)
+            raise
+
+    def _render_response(
+        self,
+        output: OutputVariant,
+        request: RenderRequest,
+        intensity: float,
+        latency_ms: float,
+        variants: Optional[List[OutputVariant]] = None
+    ) -> RenderResponse:
+        return RenderResponse(
+            output_path=output.output_path,
+            filename=output.filename,
+            emotion=request.emotion,
+            intensity=intensity,
+            latency_ms=round(latency_ms, 2),
+            gpu_used=(self.device == "cuda"),
+            model_version=self.model_version,
+            width=output.width,
+            height=output.height,
+            bytes=output.bytes,
+            encode_ms=output.encode_ms,
+            variants=variants or []
+        )
+
+    async def render_batch(
+        self,
+        image_data: bytes,
+        emotions: List[EmotionType],
+        intensity: float,
+        output_format: str = "png",
+        width: Optional[int] = 512,
+        height: Optional[int] = 512,
+        priority: Priority = Priority.BATCH,
+        quality: Optional[int] = None,
+        effort: int = 0
+    ) -> Tuple[List[RenderResponse], Dict[str, float]]:
+        """
+        Render several emotions from one source image.
+
+        The source is decoded and resized once, all emotions go through a single
+        batched inference call and the outputs are encoded in parallel.
+
+        Args:
+            image_data: Source image bytes
+            emotions: Emotions to render
+            intensity: Emotion intensity (0-1), shared by all emotions
+            output_format: Output image format
+            width: Output image width
+            height: Output image height
+            priority: Inference queue priority (batch pre-generation by default)
+            quality: JPEG/WebP quality (format default if None)
+            effort: Encoder effort (0 = fastest, 6 = smallest output)
+
+        Returns:
+            (responses in emotion order, stage timings in milliseconds). Each
+            response's latency_ms is the time until that emotion's output was saved.
+        """
+        start_time = time.time()
+        loop = asyncio.get_event_loop()
+
+        try:
+            labels = self._stage_labels("batch", emotions, output_format, width, height)
+            outputs, timings = await self._infer(
+                image_data, self._scaled_params(emotions, intensity), width, height, priority, labels
             )
+            inferred = time.time()
 
-            # Convert back to PIL Image
-            output_image = Image.fromarray(output_np.astype('uint8'))
+            async def save(output_np: np.ndarray):
+                output = await loop.run_in_executor(
+                    None, self._save_output, output_np, output_format, labels, quality, effort
+                )
+                return output, (time.time() - start_time) * 1000
 
-            # Save output
-            output_filename = f"{uuid.uuid4()}.{request.output_format}"
-            output_path = self.output_dir / output_filename
-            output_image.save(output_path, format=request.output_format.upper())
+            saved = await asyncio.gather(*(save(output_np) for output_np in outputs))
+            total_ms = (time.time() - start_time) * 1000
 
-            # Calculate latency
-            latency_ms = (time.time() - start_time) * 1000
+            results = [
+                self._render_response(
+                    output,
+                    RenderRequest(emotion=emotion, intensity=intensity, output_format=output_format),
+                    intensity,
+                    latency_ms
+                )
+                for emotion, (output, latency_ms) in zip(emotions, saved)
+            ]
+            timings = dict(timings)
+            timings["encode_ms"] = round((time.time() - inferred) * 1000, 2)
+            timings["total_ms"] = round(total_ms, 2)
+            return results, timings
 
-            return RenderResponse(
-                output_path=str(output_path),
-                filename=output_filename,
-                emotion=request.emotion,
-                intensity=request.intensity,
-                latency_ms=round(latency_ms, 2),
+        except Exception as e:
+            logger.error(f"Batch render failed: {e}", exc_info=True)
+            raise
+
+    async def render_transition(
+        self,
+        image_data: bytes,
+        from_emotion: EmotionType,
+        to_emotion: EmotionType,
+        frames: int,
+        easing: EasingType,
+        intensity: float,
+        output: TransitionOutput,
+        fps: float,
+        width: Optional[int] = 512,
+        height: Optional[int] = 512,
+        priority: Priority = Priority.INTERACTIVE
+    ) -> TransitionResponse:
+        """
+        Render an eased transition between two emotions.
+
+        Motion parameters for all frames are interpolated at once and rendered
+        in a single batched inference call.
+
+        Args:
+            image_data: Source image bytes
+            from_emotion: Emotion of the first frame
+            to_emotion: Emotion of the last frame
+            frames: Number of frames, including both end points
+            easing: Easing curve
+            intensity: Emotion intensity (0-1) of both end points
+            output: Animated WebP, MP4 or individual PNG frames
+            fps: Playback frame rate of the animation
+            width: Output frame width
+            height: Output frame height
+            priority: Inference queue priority
+
+        Returns:
+            TransitionResponse with output filenames and timings
+        """
+        start_time = time.time()
+        loop = asyncio.get_event_loop()
+
+        try:
+            output_format = "png" if output == TransitionOutput.FRAMES else output.value
+            labels = self._stage_labels("transition", [from_emotion, to_emotion], output_format, width, height)
+            params = self._transition_params(from_emotion, to_emotion, intensity, frames, easing)
+            outputs, _ = await self._infer(image_data, params, width, height, priority, labels)
+            inferred = time.time()
+
+            if output == TransitionOutput.FRAMES:
+                saved = await asyncio.gather(*(
+                    loop.run_in_executor(None, self._save_output, frame, "png", labels) for frame in outputs
+                ))
+                filenames = [output.filename for output in saved]
+            else:
+                data = await loop.run_in_executor(None, self._encode_animation, outputs, output, fps)
+                self._observe("encode", time.time() - inferred, labels)
+                saving = time.perf_counter()
+                filenames = [f"{uuid.uuid4()}.{output.value}"]
+                self.output_store.put(filenames[0], data)
+                self._observe("save", time.perf_counter() - saving, labels)
+
+            finished = time.time()
+            latency_s = finished - start_time
+
+            return TransitionResponse(
+                filenames=filenames,
+                from_emotion=from_emotion,
+                to_emotion=to_emotion,
+                intensity=intensity,
+                easing=easing,
+                output=output,
+                frames=frames,
+                fps=fps,
+                render_fps=round(frames / latency_s, 2),
+                latency_ms=round(latency_s * 1000, 2),
+                inference_ms=round((inferred - start_time) * 1000, 2),
+                encode_ms=round((finished - inferred) * 1000, 2),
                 gpu_used=(self.device == "cuda"),
                 model_version=self.model_version,
-                width=output_image.width,
-                height=output_image.height
+                width=outputs.shape[2],
+                height=outputs.shape[1]
             )
 
         except Exception as e:
-            logger.error(f"Render failed: {e}", exc_info=True)
+            logger.error(f"Transition render failed: {e}", exc_info=True)
             raise
 
+    def register_avatar(
+        self,
+        image_data: bytes,
+        intensities: List[float],
+        avatar_id: Optional[str] = None
+    ) -> Avatar:
+        """
+        Register a portrait and pre-render its emotion x intensity grid in the background.
+
+        Args:
+            image_data: Source image bytes
+            intensities: Intensities (0-1) to pre-render for every emotion
+            avatar_id: Avatar id (generated if omitted; an existing avatar is replaced)
+
+        Returns:
+            The registered avatar; poll avatar.info() for progress
+
+        Raises:
+            ValueError: If the image cannot be decoded or the avatar limit is reached
+        """
+        try:
+            image = Image.open(io.BytesIO(image_data))
+            source_size = image.size
+            image.verify()
+        except Exception as e:
+            raise ValueError(f"Invalid source image: {e}") from e
+
+        avatar = self.avatars.register(image_data, intensities, avatar_id, source_size=source_size)
+        avatar.task = asyncio.create_task(self._prerender_avatar(avatar))
+        return avatar
+
+    async def _prerender_avatar(self, avatar: Avatar):
+        """Render all emotions per intensity as one batch each, at batch priority."""
+        width, height = avatar.sprite_size
+        emotions = list(EmotionType)
+        labels = self._stage_labels("sprite", emotions, avatar.sprite_format, width, height)
+        loop = asyncio.get_event_loop()
+        start_time = time.time()
+        avatar.status = "rendering"
+
+        try:
+            for intensity in avatar.intensities:
+                outputs, _ = await self._infer(
+                    avatar.source, self._scaled_params(emotions, intensity), width, height, Priority.BATCH, labels
+                )
+                encoded = await asyncio.gather(*(
+                    loop.run_in_executor(None, self._encode_image, output_np, avatar.sprite_format, labels)
+                    for output_np in outputs
+                ))
+                for emotion, data in zip(emotions, encoded):
+                    avatar.frames[(emotion, intensity)] = data
+                avatar.render_ms = (time.time() - start_time) * 1000
+
+            avatar.status = "ready"
+            logger.info(
+                f"Avatar {avatar.avatar_id} pre-rendered: {len(avatar.frames)} frames, "
+                f"{avatar.storage_bytes / 1024:.0f} KB, {avatar.render_ms:.0f}ms"
+            )
+
+        except Exception as e:
+            avatar.status = "failed"
+            avatar.error = str(e)
+            logger.error(f"Avatar {avatar.avatar_id} pre-render failed: {e}", exc_info=True)
+
+    @staticmethod
+    def _decode_sprite(data: bytes, size: Tuple[int, int]) -> np.ndarray:
+        """Decode a stored sprite to RGB, downsampled to size (width, height) if needed."""
+        frame = np.asarray(Image.open(io.BytesIO(data)).convert("RGB"))
+        if (frame.shape[1], frame.shape[0]) != size:
+            frame = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+        return frame
+
+    async def render_avatar(self, avatar: Avatar, request: RenderRequest) -> RenderResponse:
+        """
+        Render a registered avatar, returning the nearest pre-rendered frame when available.
+
+        The response intensity is the pre-rendered intensity actually used. The stored
+        frame is returned as-is only when size, format and encoder settings match the
+        sprites; smaller sizes are downsampled from it and re-encoded. Emotions without
+        a pre-rendered frame yet and sizes larger than the sprites are rendered on
+        demand from the source.
+        """
+        start_time = time.time()
+        if request.width and request.height:
+            size = (request.width, request.height)
+        else:
+            size = avatar.source_size
+
+        sprite = avatar.nearest(request.emotion, request.intensity)
+        if sprite is None or size[0] > avatar.sprite_size[0] or size[1] > avatar.sprite_size[1]:
+            return await self.render(avatar.source, request)
+
+        intensity, data = sprite
+        self._cache_hit("sprite")
+
+        if (
+            request.output_format == avatar.sprite_format
+            and size == avatar.sprite_size
+            and not request.sizes
+            and request.effort == 0
+            and request.quality in (None, self.DEFAULT_QUALITY.get(avatar.sprite_format))
+        ):
+            # Stored frame as-is, no decode or re-encode
+            output_filename = f"{uuid.uuid4()}.{request.output_format}"
+            self.output_store.put(output_filename, data)
+            output = OutputVariant(
+                filename=output_filename,
+                output_path=f"/output/{output_filename}",
+                width=size[0],
+                height=size[1],
+                bytes=len(data),
+                encode_ms=0.0
+            )
+            variants = []
+        else:
+            frame = await asyncio.get_event_loop().run_in_executor(None, self._decode_sprite, data, size)
+            output, variants = await self._save_outputs(frame, request)
+
+        return self._render_response(output, request, intensity, (time.time() - start_time) * 1000, variants)
+
     async def cleanup(self):
         """Clean up resources."""
         logger.info("Cleaning up renderer resources...")
         self.is_ready = False
+        for avatar in self.avatars.list():
+            if avatar.task and not avatar.task.done():
+                avatar.task.cancel()
+        await asyncio.get_event_loop().run_in_executor(None, self.executor.shutdown)
 
         # Clear CUDA cache if using GPU
         if self.device == "cuda" and torch.cuda.is_available():
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+LivePortrait avatar ingest benchmark: full decode + LANCZOS vs. JPEG draft decode.
+
+Encodes synthetic phone photos at typical sizes, then loads each one at the
+render size with the previous path (full-resolution decode, RGB convert,
+LANCZOS resize) and with LivePortraitRenderer._load_image (DCT-scaled draft
+decode, reducing_gap resize). Prints best-of-N latency and the PSNR between
+the two outputs.
+
+Run inside the liveportrait-avatar container:
+    python3 /app/benchmark_ingest.py --sizes 4032x3024 4000x3000 1920x1080 --target 512
+"""
+
+import argparse
+import io
+import time
+
+import numpy as np
+from PIL import Image
+
+from app.renderer import LivePortraitRenderer
+
+
+def phone_photo(width: int, height: int, quality: int) -> bytes:
+    """Smooth gradients plus sensor-like noise, encoded as a camera-style JPEG."""
+    rng = np.random.default_rng(0)
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    base = np.stack([
+        128 + 100 * np.sin(x / width * 6.0),
+        128 + 100 * np.cos(y / height * 4.0),
+        128 + 60 * np.sin((x + y) / (width + height) * 10.0),
+    ], axis=-1)
+    pixels = np.clip(base + rng.normal(0, 12, base.shape), 0, 255).astype(np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, format="JPEG", quality=quality, subsampling=2)
+    return buffer.getvalue()
+
+
+def previous_load(image_data: bytes, width: int, height: int) -> np.ndarray:
+    image = Image.open(io.BytesIO(image_data)).convert("RGB")
+    image = image.resize((width, height), Image.Resampling.LANCZOS)
+    return np.array(image)
+
+
+def best_ms(fn, repeats: int) -> float:
+    """Best-of-N wall time in ms (after one warm-up call)."""
+    fn()
+    best = float("inf")
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+
+def psnr(a: np.ndarray, b: np.ndarray) -> float:
+    mse = np.mean((a.astype(np.float32) - b.astype(np.float32)) ** 2)
+    return float("inf") if mse == 0 else 10 * np.log10(255.0 ** 2 / mse)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", nargs="+", default=["4032x3024", "4000x3000", "3024x4032", "1920x1080"])
+    parser.add_argument("--target", type=int, nargs="+", default=[512, 1024])
+    parser.add_argument("--quality", type=int, default=92)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    renderer = LivePortraitRenderer(model_path="/app/liveportrait/pretrained_weights", device="cpu")
+
+    print()
+    print(f"{'photo':>10} {'MB':>5} {'target':>6} {'previous ms':>11} {'draft ms':>9} {'speedup':>8} {'PSNR dB':>8}")
+    for size in args.sizes:
+        width, height = (int(v) for v in size.split("x"))
+        data = phone_photo(width, height, args.quality)
+        for target in args.target:
+            previous = best_ms(lambda: previous_load(data, target, target), args.repeats)
+            draft = best_ms(lambda: renderer._load_image(data, target, target), args.repeats)
+            quality = psnr(previous_load(data, target, target), renderer._load_image(data, target, target))
+            print(f"{size:>10} {len(data) / 1e6:>5.1f} {target:>6} {previous:>11.1f} {draft:>9.1f} "
+                  f"{previous / draft:>7.2f}x {quality:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Unit tests for avatar registration and pre-rendered sprites
+"""
+
+import asyncio
+from io import BytesIO
+
+import pytest
+from PIL import Image
+
+from app.avatars import AvatarRegistry
+from app.models import EmotionType, RenderRequest
+from app.renderer import LivePortraitRenderer
+
+
+class TestAvatarRegistry:
+    """Test suite for AvatarRegistry"""
+
+    def test_nearest_frame(self):
+        """Test that lookups return the closest pre-rendered intensity"""
+        registry = AvatarRegistry()
+        avatar = registry.register(b"source", [1.0, 0.25, 0.5])
+        assert avatar.intensities == [0.25, 0.5, 1.0]
+        assert avatar.nearest(EmotionType.HAPPY, 0.7) is None
+
+        for intensity in avatar.intensities:
+            avatar.frames[(EmotionType.HAPPY, intensity)] = f"happy-{intensity}".encode()
+
+        assert avatar.nearest(EmotionType.HAPPY, 0.7) == (0.5, b"happy-0.5")
+        assert avatar.nearest(EmotionType.HAPPY, 0.8) == (1.0, b"happy-1.0")
+        assert avatar.nearest(EmotionType.SAD, 0.5) is None
+
+        info = avatar.info()
+        assert (info.rendered, info.total) == (3, len(EmotionType) * 3)
+        assert info.storage_bytes == len(b"source") + sum(len(f) for f in avatar.frames.values())
+
+    def test_limit_and_replace(self):
+        """Test the avatar limit and that re-registering an id replaces it"""
+        registry = AvatarRegistry(max_avatars=1)
+        registry.register(b"a", [0.5], avatar_id="bob")
+        registry.register(b"b", [0.5], avatar_id="bob")
+        assert registry.get("bob").source == b"b"
+
+        with pytest.raises(ValueError):
+            registry.register(b"c", [0.5], avatar_id="alice")
+        assert registry.delete("bob")
+        assert not registry.delete("bob")
+
+
+class TestAvatarPrerender:
+    """Test pre-rendering through LivePortraitRenderer"""
+
+    @pytest.fixture
+    def sample_image_bytes(self):
+        buffer = BytesIO()
+        Image.new('RGB', (512, 512), color=(128, 128, 128)).save(buffer, format='PNG')
+        return buffer.getvalue()
+
+    @pytest.mark.asyncio
+    async def test_register_and_render(self, sample_image_bytes, tmp_path):
+        """Test that registration pre-renders the grid and renders use it"""
+        hits = []
+        renderer = LivePortraitRenderer("/tmp", "cpu", output_dir=str(tmp_path), on_cache_hit=hits.append)
+
+        avatar = renderer.register_avatar(sample_image_bytes, [0.5, 1.0], avatar_id="bob")
+        await avatar.task
+
+        assert avatar.status == "ready"
+        assert len(avatar.frames) == avatar.total == len(EmotionType) * 2
+
+        result = await renderer.render_avatar(avatar, RenderRequest(emotion=EmotionType.SAD, intensity=0.6))
+        assert result.intensity == 0.5
+        assert renderer.output_store.get(result.filename) == avatar.frames[(EmotionType.SAD, 0.5)]
+        assert hits == ["sprite"]
+        await renderer.cleanup()
+
+    @pytest.mark.asyncio
+    async def test_render_other_size_and_settings(self, sample_image_bytes, tmp_path):
+        """Test that a size or encoder settings unlike the sprites' are re-encoded, not served as stored"""
+        renderer = LivePortraitRenderer("/tmp", "cpu", output_dir=str(tmp_path))
+        avatar = renderer.register_avatar(sample_image_bytes, [0.5], avatar_id="bob")
+        await avatar.task
+        stored = avatar.frames[(EmotionType.HAPPY, 0.5)]
+
+        result = await renderer.render_avatar(
+            avatar, RenderRequest(emotion=EmotionType.HAPPY, intensity=0.5, width=256, height=256)
+        )
+        data = renderer.output_store.get(result.filename)
+        assert (result.width, result.height) == (256, 256)
+        assert Image.open(BytesIO(data)).size == (256, 256)
+        assert data != stored
+
+        result = await renderer.render_avatar(
+            avatar, RenderRequest(emotion=EmotionType.HAPPY, intensity=0.5, width=512, height=512, effort=6)
+        )
+        assert renderer.output_store.get(result.filename) != stored
+        assert (result.width, result.height) == (512, 512)
+        await renderer.cleanup()
+
+    @pytest.mark.asyncio
+    async def test_register_rejects_invalid_image(self, tmp_path):
+        """Test that undecodable sources are rejected at registration"""
+        renderer = LivePortraitRenderer("/tmp", "cpu", output_dir=str(tmp_path))
+        with pytest.raises(ValueError):
+            renderer.register_avatar(b"not an image", [0.5])
+        assert renderer.avatars.list() == []
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,109 @@
+"""
+Unit tests for the inference executor
+"""
+
+import asyncio
+import threading
+
+import pytest
+
+from app.executor import InferenceExecutor, Priority
+
+
+class TestInferenceExecutor:
+    """Test suite for InferenceExecutor"""
+
+    @pytest.fixture
+    def executor(self):
+        """Create a single-worker executor"""
+        executor = InferenceExecutor(concurrency=1)
+        yield executor
+        executor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_interactive_jumps_batch_queue(self, executor):
+        """Test that queued interactive jobs run before queued batch jobs"""
+        started, gate = threading.Event(), threading.Event()
+        order = []
+
+        def block():
+            started.set()
+            gate.wait(timeout=5)
+
+        blocker = executor.submit(Priority.BATCH, block)
+        assert started.wait(timeout=5)
+        futures = [executor.submit(Priority.BATCH, order.append, f"batch-{i}") for i in range(3)]
+        futures.append(executor.submit(Priority.INTERACTIVE, order.append, "interactive"))
+        assert executor.stats()["queue_depth"] == 4
+
+        gate.set()
+        await asyncio.gather(*(asyncio.wrap_future(f) for f in [blocker] + futures))
+
+        assert order == ["interactive", "batch-0", "batch-1", "batch-2"]
+        assert executor.stats()["queue_depth"] == 0
+        assert executor.stats()["in_flight"] == 0
+
+    @pytest.mark.asyncio
+    async def test_coalesce_identical_requests(self, executor):
+        """Test that identical concurrent requests share one call"""
+        calls = []
+
+        async def job():
+            calls.append(1)
+            return await executor.run(Priority.INTERACTIVE, sum, [1, 2, 3])
+
+        results = await asyncio.gather(*(executor.coalesce("same", job) for _ in range(5)))
+
+        assert results == [6] * 5
+        assert len(calls) == 1
+        assert executor.stats()["coalesced"] == 4
+
+        # Finished calls are not reused
+        assert await executor.coalesce("same", job) == 6
+        assert len(calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_interactive_join_promotes_batch_call(self, executor):
+        """Test that an interactive caller joining a queued batch call moves it to the interactive lane"""
+        started, gate = threading.Event(), threading.Event()
+        order = []
+
+        def block():
+            started.set()
+            gate.wait(timeout=5)
+
+        async def job():
+            return await executor.run(Priority.BATCH, order.append, "shared")
+
+        blocker = executor.submit(Priority.BATCH, block)
+        assert started.wait(timeout=5)
+        futures = [executor.submit(Priority.BATCH, order.append, f"batch-{i}") for i in range(2)]
+        first = asyncio.ensure_future(executor.coalesce("same", job, Priority.BATCH))
+        await asyncio.sleep(0.01)
+        assert executor.stats()["queued"] == {"interactive": 0, "batch": 3}
+
+        joined = asyncio.ensure_future(executor.coalesce("same", job, Priority.INTERACTIVE))
+        await asyncio.sleep(0.01)
+        assert executor.stats()["queued"] == {"interactive": 1, "batch": 2}
+
+        gate.set()
+        await asyncio.gather(first, joined, *(asyncio.wrap_future(f) for f in [blocker] + futures))
+
+        assert order == ["shared", "batch-0", "batch-1"]
+        assert executor.stats()["queue_depth"] == 0
+        assert executor.stats()["coalesced"] == 1
+
+    @pytest.mark.asyncio
+    async def test_errors_propagate(self, executor):
+        """Test that job exceptions reach every waiting caller"""
+        async def job():
+            return await executor.run(Priority.INTERACTIVE, int, "not a number")
+
+        results = await asyncio.gather(
+            executor.coalesce("bad", job), executor.coalesce("bad", job), return_exceptions=True
+        )
+        assert all(isinstance(r, ValueError) for r in results)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
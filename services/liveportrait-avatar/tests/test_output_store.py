@@ -0,0 +1,68 @@
+"""
+Unit tests for the rendered output store
+"""
+
+import time
+
+import pytest
+
+from app.output_store import OutputStore
+
+
+class TestOutputStore:
+    """Test suite for OutputStore"""
+
+    @pytest.fixture
+    def store(self, tmp_path):
+        """Create a store with room for three 100-byte outputs in memory and two on disk"""
+        return OutputStore(tmp_path, memory_bytes=300, disk_bytes=200, ttl_s=60)
+
+    def test_put_get_delete(self, store):
+        """Test basic round trip through the memory tier"""
+        store.put("a.png", b"x" * 100)
+
+        assert store.get("a.png") == b"x" * 100
+        assert store.stats()["memory_items"] == 1
+        assert store.delete("a.png")
+        assert store.get("a.png") is None
+        assert not store.delete("a.png")
+
+    def test_spill_to_disk_and_size_eviction(self, store, tmp_path):
+        """Test that LRU outputs spill to disk and the oldest files are dropped"""
+        for name in ("a.png", "b.png", "c.png"):
+            store.put(name, name[:1].encode() * 100)
+        store.get("a.png")  # a becomes most recently used, b is spilled first
+
+        store.put("d.png", b"d" * 100)
+        assert (tmp_path / "b.png").exists()
+        assert store.get("b.png") == b"b" * 100
+
+        store.put("e.png", b"e" * 100)
+        store.put("f.png", b"f" * 100)
+        stats = store.stats()
+        assert stats["memory_bytes"] <= 300
+        assert stats["disk_bytes"] <= 200
+        assert stats["evictions"]["size"] == 1
+        assert store.get("b.png") is None
+
+    def test_ttl_eviction(self, tmp_path):
+        """Test that expired outputs are dropped by evict() and on access"""
+        store = OutputStore(tmp_path, memory_bytes=1000, disk_bytes=1000, ttl_s=0.05)
+        store.put("a.png", b"a")
+        store.put("b.png", b"b")
+        time.sleep(0.1)
+
+        assert store.get("a.png") is None
+        assert store.evict() == 1
+        assert store.stats()["evictions"]["ttl"] == 2
+
+    def test_rejects_path_traversal(self, store):
+        """Test that filenames cannot escape the output directory"""
+        with pytest.raises(ValueError):
+            store.put("../evil.png", b"x")
+        assert store.get("../../etc/passwd") is None
+        assert not store.delete("../evil.png")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -9,7 +9,7 @@ from PIL import Image
 from io import BytesIO
 
 from app.renderer import LivePortraitRenderer
-from app.models import RenderRequest, EmotionType
+from app.models import RenderRequest, EmotionType, EasingType, TransitionOutput
 
 
 class TestLivePortraitRenderer:
@@ -127,6 +127,138 @@ class TestLivePortraitRenderer:
         assert result.height == 512
         assert result.latency_ms >= 0
 
+    @pytest.mark.asyncio
+    async def test_render_batch(self, renderer, sample_image_bytes):
+        """Test that batch render decodes once and returns one output per emotion"""
+        renderer.is_ready = True
+        emotions = [EmotionType.HAPPY, EmotionType.SAD, EmotionType.SURPRISED]
+
+        results, timings = await renderer.render_batch(sample_image_bytes, emotions, 0.7)
+
+        assert [r.emotion for r in results] == emotions
+        assert len({r.filename for r in results}) == len(emotions)
+        for result in results:
+            assert result.output_path.endswith('.png')
+            assert (result.width, result.height) == (512, 512)
+            assert 0 <= result.latency_ms <= timings["total_ms"]
+        assert set(timings) == {"decode_ms", "inference_ms", "encode_ms", "total_ms"}
+
+    def test_load_image_draft_decode(self, renderer):
+        """Test that large JPEGs load at the target size, close to a full decode"""
+        y, x = np.mgrid[0:3024, 0:4032]
+        pixels = np.stack([x * 255 // 4032, y * 255 // 3024, (x + y) * 255 // 7056], axis=-1).astype(np.uint8)
+        buffer = BytesIO()
+        Image.fromarray(pixels).save(buffer, format='JPEG', quality=90)
+
+        loaded = renderer._load_image(buffer.getvalue(), 512, 512)
+
+        assert loaded.shape == (512, 512, 3)
+        assert loaded.dtype == np.uint8
+        assert loaded.flags['C_CONTIGUOUS']
+        reference = np.array(
+            Image.open(BytesIO(buffer.getvalue())).convert('RGB').resize((512, 512), Image.Resampling.LANCZOS)
+        )
+        assert np.abs(loaded.astype(int) - reference.astype(int)).mean() < 2.0
+
+    def test_batch_params_match_single(self, renderer):
+        """Test that batched parameter scaling matches the per-emotion formula"""
+        emotions = list(EmotionType)
+        params = renderer._scaled_params(emotions, 0.5)
+
+        assert params.shape == (len(emotions), len(renderer.MOTION_PARAMS))
+        for row, emotion in zip(params, emotions):
+            mapping = renderer.EMOTION_MAPPINGS[emotion]
+            values = dict(zip(renderer.MOTION_PARAMS, row))
+            assert values["rotation_x"] == pytest.approx(mapping.rotation_x * 0.5)
+            assert values["expression_scale"] == pytest.approx(1.0 + (mapping.expression_scale - 1.0) * 0.5)
+            assert values["eye_open"] == pytest.approx(1.0 - (1.0 - mapping.eye_open) * 0.5)
+
+    def test_transition_params(self, renderer):
+        """Test that transitions start and end at the scaled emotion parameters"""
+        start, end = renderer._scaled_params([EmotionType.SAD, EmotionType.HAPPY], 0.8)
+
+        for easing in EasingType:
+            params = renderer._transition_params(EmotionType.SAD, EmotionType.HAPPY, 0.8, 9, easing)
+            assert params.shape == (9, len(renderer.MOTION_PARAMS))
+            np.testing.assert_allclose(params[0], start, atol=1e-6)
+            np.testing.assert_allclose(params[-1], end, atol=1e-6)
+            # Monotonic between the end points for every parameter
+            steps = np.diff(params, axis=0) * np.sign(end - start)
+            assert (steps >= -1e-6).all()
+
+    @pytest.mark.asyncio
+    async def test_render_transition_frames(self, renderer, sample_image_bytes):
+        """Test that a frame-list transition stores one PNG per frame"""
+        result = await renderer.render_transition(
+            sample_image_bytes, EmotionType.NEUTRAL, EmotionType.SURPRISED,
+            frames=5, easing=EasingType.LINEAR, intensity=0.7,
+            output=TransitionOutput.FRAMES, fps=25.0
+        )
+
+        assert len(result.filenames) == 5
+        assert all(renderer.output_store.get(name) is not None for name in result.filenames)
+        assert (result.width, result.height) == (512, 512)
+        assert result.render_fps > 0
+
+    @pytest.mark.asyncio
+    async def test_stage_and_cache_hit_callbacks(self, sample_image_bytes, tmp_path):
+        """Test that render stages are reported with labels and coalesced renders count as cache hits"""
+        stages, hits = [], []
+        renderer = LivePortraitRenderer(
+            "/tmp", "cpu", output_dir=str(tmp_path),
+            on_stage=lambda stage, seconds, labels: stages.append((stage, labels)),
+            on_cache_hit=hits.append
+        )
+        request = RenderRequest(emotion=EmotionType.HAPPY, output_format="png")
+
+        await asyncio.gather(*(renderer.render(sample_image_bytes, request) for _ in range(3)))
+
+        labels = {"kind": "single", "emotion": "happy", "format": "png", "resolution": "512x512"}
+        assert [stage for stage, _ in stages].count("inference") == 1
+        assert [stage for stage, _ in stages].count("encode") == 3
+        assert {stage for stage, _ in stages} == {"decode", "resize", "queue", "inference", "encode", "save"}
+        assert all(stage_labels == labels for _, stage_labels in stages)
+        assert hits == ["inflight", "inflight"]
+
+        stages.clear()
+        await renderer.render_batch(sample_image_bytes, [EmotionType.HAPPY, EmotionType.SAD], 0.7)
+        assert stages and all(
+            stage_labels["kind"] == "batch" and stage_labels["emotion"] == "" for _, stage_labels in stages
+        )
+        await renderer.cleanup()
+
+    @pytest.mark.asyncio
+    async def test_encoding_options_and_ladder(self, renderer, sample_image_bytes):
+        """Test quality/effort options, format aliases and the resolution ladder"""
+        request = RenderRequest(output_format="jpeg", quality=60, effort=4, sizes=[128, 256, 1024])
+        assert request.output_format == "jpg"
+
+        result = await renderer.render(sample_image_bytes, request)
+
+        data = renderer.output_store.get(result.filename)
+        assert data[:2] == b"\xff\xd8"
+        assert result.bytes == len(data)
+        assert result.encode_ms >= 0
+        # 1024 is not smaller than the render and is skipped; largest first
+        assert [(v.width, v.height) for v in result.variants] == [(256, 256), (128, 128)]
+        for variant in result.variants:
+            assert Image.open(BytesIO(renderer.output_store.get(variant.filename))).size == (variant.width, variant.height)
+
+        with pytest.raises(ValueError):
+            RenderRequest(output_format="gif")
+
+    def test_effort_reduces_webp_size(self, renderer):
+        """Test that higher effort trades encode time for smaller output"""
+        rng = np.random.default_rng(0)
+        y, x = np.mgrid[0:256, 0:256]
+        frame = np.clip(np.stack([x, y, (x + y) // 2], axis=-1) + rng.normal(0, 8, (256, 256, 3)), 0, 255)
+
+        fast = renderer._encode_image(frame, "webp", effort=0)
+        small = renderer._encode_image(frame, "webp", effort=6)
+
+        assert Image.open(BytesIO(fast)).format == "WEBP"
+        assert len(small) < len(fast)
+
 
 class TestEmotionIntensity:
     """Test emotion intensity calculations"""
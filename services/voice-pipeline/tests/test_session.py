@@ -0,0 +1,181 @@
+"""
+Unit tests for the /session turn state machine and its end-of-speech latency
+
+VoiceSession is driven with synthetic PCM in real-time 20 ms chunks;
+_transcribe_array is replaced by a stand-in that sleeps like the model.
+Run from services/voice-pipeline: python -m pytest tests/ -s
+"""
+
+import asyncio
+import threading
+import time
+
+import numpy as np
+import pytest
+
+pytest.importorskip("faster_whisper")
+pytest.importorskip("whisper")
+
+import voice_service
+from voice_service import ENDPOINT_SILENCE_MS, WHISPER_SAMPLE_RATE, VoiceSession
+
+CHUNK_MS = 20
+TRANSCRIBE_S = 0.15
+
+
+class FakeWebSocket:
+    """Collects what the session sends"""
+
+    def __init__(self):
+        self.events = []
+        self.audio = []
+
+    async def send_json(self, message):
+        self.events.append(message)
+
+    async def send_bytes(self, data):
+        self.audio.append(data)
+
+    def types(self):
+        return [event["type"] for event in self.events]
+
+
+class FakeWhisper:
+    """Stand-in for _transcribe_array: sleeps like the model and records every call"""
+
+    def __init__(self, seconds: float = TRANSCRIBE_S):
+        self.seconds = seconds
+        self.calls = []  # audio seconds per call
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, audio, language):
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+            self.calls.append(len(audio) / WHISPER_SAMPLE_RATE)
+        time.sleep(self.seconds)
+        with self._lock:
+            self.active -= 1
+        return f"{len(audio) / WHISPER_SAMPLE_RATE:.2f}s", language or "en", self.seconds * 1000
+
+
+@pytest.fixture
+def whisper(monkeypatch):
+    fake = FakeWhisper()
+    monkeypatch.setattr(voice_service, "_transcribe_array", fake)
+    return fake
+
+
+@pytest.fixture
+def session():
+    session = VoiceSession(FakeWebSocket())
+    yield session
+    session.close()
+
+
+async def stream(session: VoiceSession, ms: int, speech: bool):
+    """Feed ms of noise (speech) or near-silence in real-time chunks"""
+    rng = np.random.default_rng(ms)
+    for _ in range(ms // CHUNK_MS):
+        samples = rng.normal(0, 0.2 if speech else 0.001, WHISPER_SAMPLE_RATE * CHUNK_MS // 1000)
+        await session.feed((np.clip(samples, -1, 1) * 32767).astype("<i2").tobytes())
+        await asyncio.sleep(CHUNK_MS / 1000)
+
+
+async def wait_for(session: VoiceSession, kind: str, timeout: float = 3.0) -> dict:
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        for event in session.websocket.events:
+            if event["type"] == kind:
+                return event
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"No {kind} event in {session.websocket.types()}")
+
+
+class TestVoiceSession:
+    """Test suite for VoiceSession"""
+
+    @pytest.mark.asyncio
+    async def test_turn_opens_and_closes(self, session, whisper):
+        """Test that speech opens a turn and trailing silence closes it"""
+        await stream(session, 200, speech=False)
+        await stream(session, 1000, speech=True)
+        await stream(session, ENDPOINT_SILENCE_MS + 100, speech=False)
+        final = await wait_for(session, "final")
+
+        types = session.websocket.types()
+        assert types.index("speech_start") < types.index("speech_end") < types.index("final")
+        assert types.count("speech_start") == 1
+        assert final["turn"] == 1
+        assert not session.in_speech
+
+    @pytest.mark.asyncio
+    async def test_final_latency_hides_transcription(self, session, whisper, monkeypatch):
+        """Test that the speculative final overlaps the endpoint window (prints the measurement)"""
+        monkeypatch.setattr(voice_service, "PARTIAL_INTERVAL_MS", 60_000)
+        await stream(session, 1000, speech=True)
+        await stream(session, ENDPOINT_SILENCE_MS + 100, speech=False)
+        final = await wait_for(session, "final")
+
+        print(f"\nend of speech -> final: {final['latency_ms']} ms "
+              f"(endpoint {ENDPOINT_SILENCE_MS} ms, transcribe {final['transcribe_ms']} ms)")
+        assert final["speculative"]
+        assert final["latency_ms"] < ENDPOINT_SILENCE_MS + TRANSCRIBE_S * 1000
+
+    @pytest.mark.asyncio
+    async def test_resumed_speech_discards_speculation(self, session, whisper):
+        """Test that a pause shorter than the endpoint keeps one turn covering all speech"""
+        await stream(session, 600, speech=True)
+        await stream(session, 200, speech=False)  # speculation starts, endpoint not reached
+        await stream(session, 600, speech=True)
+        await stream(session, ENDPOINT_SILENCE_MS + 100, speech=False)
+        final = await wait_for(session, "final")
+
+        assert session.websocket.types().count("speech_start") == 1
+        assert float(final["text"].rstrip("s")) > 1.3
+
+    @pytest.mark.asyncio
+    async def test_flush_closes_turn(self, session, whisper):
+        """Test that flush ends the open turn without waiting for silence"""
+        await stream(session, 500, speech=True)
+        await session.handle({"type": "flush"})
+        final = await wait_for(session, "final")
+
+        assert "speech_end" in session.websocket.types()
+        assert not final["speculative"]
+
+    @pytest.mark.asyncio
+    async def test_no_partial_after_turn_end(self, session, whisper):
+        """Test that a partial finishing after the turn closed is dropped"""
+        whisper.seconds = 0.4
+        await stream(session, 700, speech=True)  # partial started at 600 ms
+        await session.handle({"type": "flush"})
+        await wait_for(session, "final")
+
+        types = session.websocket.types()
+        assert "partial" not in types[types.index("speech_end"):]
+
+    @pytest.mark.asyncio
+    async def test_partials_are_bounded(self, session, whisper, monkeypatch):
+        """Test that partials never overlap and only see the trailing window"""
+        monkeypatch.setattr(voice_service, "PARTIAL_WINDOW_S", 0.5)
+        await stream(session, 2500, speech=True)
+
+        assert len(whisper.calls) >= 2
+        assert max(whisper.calls) <= 0.5
+        assert whisper.max_active == 1
+        assert "partial" in session.websocket.types()
+
+    @pytest.mark.asyncio
+    async def test_invalid_sample_rate(self, session):
+        """Test that a non-numeric sample rate is answered with an error event"""
+        await session.handle({"type": "config", "sample_rate": "fast"})
+
+        assert session.websocket.events[-1]["type"] == "error"
+        assert session.sample_rate == WHISPER_SAMPLE_RATE
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
@@ -4,19 +4,25 @@ Voice Pipeline Service - XTTS + Whisper with GPU acceleration
 Provides TTS (Text-to-Speech) and STT (Speech-to-Text) capabilities
 """
 
+import asyncio
+import io
+import json
 import os
-import tempfile
 import time
+import wave
+from abc import ABC, abstractmethod
+from collections import deque
 from pathlib import Path
 from typing import Optional, Dict, List
 
+import httpx
 import torch
 import numpy as np
-from fastapi import FastAPI, File, UploadFile, HTTPException, Form
+from fastapi import FastAPI, File, UploadFile, HTTPException, Form, WebSocket, WebSocketDisconnect
 from fastapi.responses import FileResponse, JSONResponse
 from pydantic import BaseModel
 import whisper
-from faster_whisper import WhisperModel
+from faster_whisper import WhisperModel, decode_audio
 
 # Initialize FastAPI
 app = FastAPI(
@@ -36,6 +42,32 @@ SUPPORTED_LANGUAGES = ["en", "de", "fr", "es", "it", "pt", "nl", "pl", "ru", "ja
 VOICE_PROFILES_DIR = Path("./voice_profiles")
 VOICE_PROFILES_DIR.mkdir(exist_ok=True)
 
+# Streaming session (/session): 16-bit mono PCM in, energy VAD endpointing
+WHISPER_SAMPLE_RATE = 16000
+VAD_FRAME_MS = 30
+VAD_THRESHOLD_DB = float(os.getenv("VAD_THRESHOLD_DB", "-45"))      # frame RMS (dBFS) counted as speech
+VAD_START_MS = int(os.getenv("VAD_START_MS", "90"))                 # voiced audio needed to open a turn
+VAD_PREROLL_MS = int(os.getenv("VAD_PREROLL_MS", "300"))            # audio kept from before the turn opened
+ENDPOINT_SILENCE_MS = int(os.getenv("ENDPOINT_SILENCE_MS", "300"))  # trailing silence that closes a turn
+# The final transcript is started speculatively after this much silence, so
+# it overlaps the rest of the endpoint window; discarded if speech resumes
+SPECULATIVE_SILENCE_MS = int(os.getenv("SPECULATIVE_SILENCE_MS", "120"))
+PARTIAL_INTERVAL_MS = int(os.getenv("PARTIAL_INTERVAL_MS", "600"))  # audio between partial transcripts
+PARTIAL_WINDOW_S = float(os.getenv("PARTIAL_WINDOW_S", "8"))         # partials only see the latest audio
+MAX_UTTERANCE_S = float(os.getenv("MAX_UTTERANCE_S", "30"))
+SESSION_BEAM_SIZE = int(os.getenv("SESSION_BEAM_SIZE", "1"))         # greedy decoding for low latency
+
+# Upload pre-filter (/stt/transcribe): skip silent clips and trim leading/trailing
+# silence with the same energy VAD before Whisper sees the audio
+STT_VAD_ENABLED = os.getenv("STT_VAD_ENABLED", "true").lower() in ("1", "true", "yes")
+STT_VAD_PAD_MS = int(os.getenv("STT_VAD_PAD_MS", "200"))  # audio kept around the speech
+
+# TTS backend for /session: "xtts" (HTTP client to the XTTS container) or "local" (tone stand-in)
+TTS_BACKEND = os.getenv("TTS_BACKEND", "xtts")
+XTTS_URL = os.getenv("XTTS_URL", "http://localhost:8082")
+XTTS_SPEAKER = os.getenv("XTTS_SPEAKER") or None
+SYNTHESIS_TIMEOUT = float(os.getenv("SYNTHESIS_TIMEOUT", "30"))
+
 
 class TTSRequest(BaseModel):
     """Text-to-Speech request"""
@@ -53,6 +85,7 @@ class STTResponse(BaseModel):
     confidence: float
     duration: float
     segments: Optional[List[Dict]] = None
+    skipped: bool = False  # silent clip, Whisper was not run
 
 
 class VoiceProfile(BaseModel):
@@ -62,6 +95,112 @@ class VoiceProfile(BaseModel):
     language: str = "en"
 
 
+class TTSBackend(ABC):
+    """Text-to-speech used by /session; synthesize() returns a WAV file"""
+    name = "none"
+
+    @abstractmethod
+    async def synthesize(self, text: str, language: str) -> bytes:
+        """Synthesize text and return the audio as WAV bytes"""
+
+    async def close(self):
+        pass
+
+
+class XTTSBackend(TTSBackend):
+    """Forwards synthesis to the XTTS container (docker/xtts, POST /synthesize)"""
+    name = "xtts"
+
+    def __init__(self, url: str, speaker: Optional[str] = None, timeout: float = SYNTHESIS_TIMEOUT):
+        self.speaker = speaker
+        self.client = httpx.AsyncClient(base_url=url, timeout=timeout)
+
+    async def synthesize(self, text: str, language: str) -> bytes:
+        response = await self.client.post(
+            "/synthesize",
+            json={"text": text, "language": language, "speaker": self.speaker}
+        )
+        response.raise_for_status()
+        return response.content
+
+    async def close(self):
+        await self.client.aclose()
+
+
+class ToneTTSBackend(TTSBackend):
+    """Local stand-in without a model: one short tone per word (for development and tests)"""
+    name = "local"
+    sample_rate = 22050
+
+    async def synthesize(self, text: str, language: str) -> bytes:
+        t = np.arange(int(0.15 * self.sample_rate)) / self.sample_rate
+        gap = np.zeros(int(0.05 * self.sample_rate))
+        tones = [np.concatenate([0.3 * np.sin(2 * np.pi * (220 + 20 * (len(word) % 12)) * t), gap])
+                 for word in text.split()]
+        audio = np.concatenate(tones) if tones else gap
+        return _wav_bytes(audio, self.sample_rate)
+
+
+TTS_BACKENDS = {
+    "xtts": lambda: XTTSBackend(XTTS_URL, speaker=XTTS_SPEAKER),
+    "local": ToneTTSBackend,
+}
+
+tts_backend: Optional[TTSBackend] = None
+
+# Upload pre-filter counters (reported in /health)
+vad_stats = {
+    "clips": 0,
+    "skipped_clips": 0,
+    "trimmed_clips": 0,
+    "audio_seconds": 0.0,
+    "audio_seconds_saved": 0.0,
+}
+
+
+def _wav_bytes(audio: np.ndarray, sample_rate: int) -> bytes:
+    """Encode float samples in [-1, 1] as a 16-bit mono WAV file"""
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes((np.clip(audio, -1, 1) * 32767).astype("<i2").tobytes())
+    return buffer.getvalue()
+
+
+def _pcm16_to_float(data: bytes, sample_rate: int) -> np.ndarray:
+    """Decode little-endian 16-bit mono PCM to float32 at Whisper's 16 kHz"""
+    samples = np.frombuffer(data[:len(data) - len(data) % 2], dtype="<i2").astype(np.float32) / 32768.0
+    if sample_rate == WHISPER_SAMPLE_RATE or len(samples) == 0:
+        return samples
+    # Linear interpolation per chunk; good enough for speech recognition
+    n = int(round(len(samples) * WHISPER_SAMPLE_RATE / sample_rate))
+    return np.interp(
+        np.linspace(0, len(samples) - 1, n), np.arange(len(samples)), samples
+    ).astype(np.float32)
+
+
+def _frame_energy_db(samples: np.ndarray, frame_samples: int) -> np.ndarray:
+    """RMS level in dBFS of each complete frame of float samples"""
+    n = len(samples) // frame_samples
+    frames = samples[:n * frame_samples].reshape(n, frame_samples).astype(np.float64)
+    rms = np.sqrt(np.mean(frames * frames, axis=1))
+    return 20 * np.log10(np.maximum(rms, 1e-10))
+
+
+def _speech_bounds(audio: np.ndarray) -> Optional[tuple]:
+    """Padded (start, end) sample range holding speech, or None if the clip is silent"""
+    frame_samples = WHISPER_SAMPLE_RATE * VAD_FRAME_MS // 1000
+    voiced = np.flatnonzero(_frame_energy_db(audio, frame_samples) >= VAD_THRESHOLD_DB)
+    if len(voiced) * VAD_FRAME_MS < VAD_START_MS:
+        return None
+    pad = WHISPER_SAMPLE_RATE * STT_VAD_PAD_MS // 1000
+    start = max(0, voiced[0] * frame_samples - pad)
+    end = min(len(audio), (voiced[-1] + 1) * frame_samples + pad)
+    return start, end
+
+
 @app.on_event("startup")
 async def startup_event():
     """Initialize models on startup"""
@@ -87,9 +226,23 @@ async def startup_event():
 
     # TTS initialization (placeholder until we get XTTS working)
     print("⏳ TTS (XTTS) will be initialized separately")
+
+    # TTS for streaming sessions
+    global tts_backend
+    if TTS_BACKEND not in TTS_BACKENDS:
+        raise RuntimeError(f"Unknown TTS_BACKEND '{TTS_BACKEND}'. Use: {', '.join(TTS_BACKENDS)}")
+    tts_backend = TTS_BACKENDS[TTS_BACKEND]()
+    print(f"🔊 Session TTS backend: {tts_backend.name}")
     print("✅ Voice Pipeline Service ready!")
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Close the session TTS backend"""
+    if tts_backend is not None:
+        await tts_backend.close()
+
+
 @app.get("/")
 async def root():
     """Health check endpoint"""
@@ -118,7 +271,12 @@ async def health():
             "xtts": {
                 "loaded": False,  # TODO: Update when implemented
                 "status": "not_implemented"
-            }
+            },
+            "session_tts": tts_backend.name if tts_backend else None
+        },
+        "vad": {
+            "enabled": STT_VAD_ENABLED,
+            **{key: round(value, 2) for key, value in vad_stats.items()}
         },
         "gpu": {
             "available": torch.cuda.is_available(),
@@ -150,18 +308,43 @@ async def transcribe_audio(
     if whisper_model is None:
         raise HTTPException(status_code=503, detail="Whisper model not loaded")
 
-    # Save uploaded file temporarily
-    with tempfile.NamedTemporaryFile(delete=False, suffix=Path(file.filename).suffix) as tmp:
-        content = await file.read()
-        tmp.write(content)
-        tmp_path = tmp.name
+    content = await file.read()
 
     try:
         start_time = time.time()
 
+        # Decode once to 16 kHz mono; Whisper gets the (trimmed) samples
+        audio = decode_audio(io.BytesIO(content), sampling_rate=WHISPER_SAMPLE_RATE)
+        offset = 0.0
+
+        if STT_VAD_ENABLED:
+            audio_seconds = len(audio) / WHISPER_SAMPLE_RATE
+            vad_stats["clips"] += 1
+            vad_stats["audio_seconds"] += audio_seconds
+            bounds = _speech_bounds(audio)
+
+            if bounds is None:
+                vad_stats["skipped_clips"] += 1
+                vad_stats["audio_seconds_saved"] += audio_seconds
+                return STTResponse(
+                    text="",
+                    language=language or "",
+                    confidence=0.0,
+                    duration=time.time() - start_time,
+                    segments=[] if include_segments else None,
+                    skipped=True
+                )
+
+            start, end = bounds
+            if end - start < len(audio):
+                vad_stats["trimmed_clips"] += 1
+                vad_stats["audio_seconds_saved"] += (len(audio) - (end - start)) / WHISPER_SAMPLE_RATE
+                audio = audio[start:end]
+                offset = start / WHISPER_SAMPLE_RATE
+
         # Transcribe with faster-whisper
         segments, info = whisper_model.transcribe(
-            tmp_path,
+            audio,
             language=language,
             task=task,
             beam_size=5,
@@ -175,8 +358,8 @@ async def transcribe_audio(
 
         for segment in segments:
             segment_dict = {
-                "start": segment.start,
-                "end": segment.end,
+                "start": segment.start + offset,
+                "end": segment.end + offset,
                 "text": segment.text,
                 "confidence": segment.avg_logprob
             }
@@ -198,10 +381,6 @@ async def transcribe_audio(
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Transcription failed: {str(e)}")
-    finally:
-        # Cleanup temp file
-        if os.path.exists(tmp_path):
-            os.unlink(tmp_path)
 
 
 @app.post("/tts/synthesize")
@@ -261,6 +440,283 @@ async def list_voice_profiles():
     return {"profiles": profiles}
 
 
+def _transcribe_array(audio: np.ndarray, language: Optional[str]) -> tuple:
+    """Transcribe 16 kHz float samples (blocking); returns (text, language, transcribe_ms)"""
+    start_time = time.perf_counter()
+    segments, info = whisper_model.transcribe(
+        audio,
+        language=language,
+        beam_size=SESSION_BEAM_SIZE,
+        condition_on_previous_text=False,
+        without_timestamps=True
+    )
+    text = " ".join(segment.text.strip() for segment in segments)
+    return text.strip(), info.language, (time.perf_counter() - start_time) * 1000
+
+
+class VoiceSession:
+    """
+    State of one /session WebSocket
+
+    Streamed PCM is cut into VAD frames; a turn opens after VAD_START_MS of
+    voiced frames and closes after ENDPOINT_SILENCE_MS of silence. Transcription
+    and synthesis run as tasks so audio keeps flowing while they are in progress.
+    """
+
+    def __init__(self, websocket: WebSocket):
+        self.websocket = websocket
+        self.language: Optional[str] = None
+        self.sample_rate = WHISPER_SAMPLE_RATE
+        self.frame_samples = WHISPER_SAMPLE_RATE * VAD_FRAME_MS // 1000
+        self.pending = np.zeros(0, dtype=np.float32)  # samples short of a full frame
+        self.preroll: deque = deque(maxlen=max(1, VAD_PREROLL_MS // VAD_FRAME_MS))
+        self.utterance: List[np.ndarray] = []
+        self.turn = 0
+        self.in_speech = False
+        self.voiced_ms = 0
+        self.silence_ms = 0
+        self.partial_ms = 0  # audio since the last partial transcript
+        self.speech_end_time = 0.0  # arrival of the last voiced frame
+        self.speculation: Optional[asyncio.Task] = None
+        # Latest partial/speculative/final transcription. Superseded threads cannot be
+        # stopped, so no new partial or speculation starts until it has finished.
+        self.job: Optional[asyncio.Task] = None
+        self.tasks: set = set()
+        self.send_lock = asyncio.Lock()
+        self.closed = False
+
+    async def send(self, message: Dict, audio: Optional[bytes] = None):
+        """Send a JSON event, optionally followed by a binary audio message"""
+        async with self.send_lock:
+            if self.closed:
+                return
+            await self.websocket.send_json(message)
+            if audio is not None:
+                await self.websocket.send_bytes(audio)
+
+    def spawn(self, coro) -> asyncio.Task:
+        task = asyncio.ensure_future(coro)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return task
+
+    def audio(self) -> np.ndarray:
+        """Current utterance, without trailing silence beyond the speculative window"""
+        trailing = max(0, self.silence_ms - SPECULATIVE_SILENCE_MS) // VAD_FRAME_MS
+        return np.concatenate(self.utterance[:len(self.utterance) - trailing])
+
+    def transcribe(self, window_s: Optional[float] = None) -> asyncio.Task:
+        """Start transcribing a snapshot of the current utterance (or its last window_s)"""
+        audio = self.audio()
+        if window_s is not None:
+            audio = audio[-int(window_s * WHISPER_SAMPLE_RATE):]
+        self.job = self.spawn(asyncio.to_thread(_transcribe_array, audio, self.language))
+        return self.job
+
+    def idle(self) -> bool:
+        return self.job is None or self.job.done()
+
+    async def feed(self, data: bytes):
+        """Run VAD over a chunk of PCM, opening and closing turns"""
+        now = time.perf_counter()
+        samples = np.concatenate([self.pending, _pcm16_to_float(data, self.sample_rate)])
+        levels = _frame_energy_db(samples, self.frame_samples)
+        self.pending = samples[len(levels) * self.frame_samples:]
+
+        for i, level in enumerate(levels):
+            frame = samples[i * self.frame_samples:(i + 1) * self.frame_samples]
+            voiced = level >= VAD_THRESHOLD_DB
+
+            if not self.in_speech:
+                self.preroll.append(frame)
+                self.voiced_ms = self.voiced_ms + VAD_FRAME_MS if voiced else 0
+                if self.voiced_ms >= VAD_START_MS:
+                    await self.start_turn(now)
+                continue
+
+            self.utterance.append(frame)
+            self.partial_ms += VAD_FRAME_MS
+            if voiced:
+                self.silence_ms = 0
+                self.speech_end_time = now
+                self.speculation = None
+            else:
+                self.silence_ms += VAD_FRAME_MS
+
+            if self.silence_ms >= ENDPOINT_SILENCE_MS or len(self.utterance) * VAD_FRAME_MS >= MAX_UTTERANCE_S * 1000:
+                await self.end_turn()
+            elif self.silence_ms >= SPECULATIVE_SILENCE_MS:
+                if self.speculation is None and self.idle():
+                    self.speculation = self.transcribe()
+            elif self.partial_ms >= PARTIAL_INTERVAL_MS and self.idle():
+                self.partial_ms = 0
+                self.spawn(self.send_partial(self.turn, self.transcribe(window_s=PARTIAL_WINDOW_S)))
+
+    async def start_turn(self, now: float):
+        self.turn += 1
+        self.in_speech = True
+        self.utterance = list(self.preroll)
+        self.preroll.clear()
+        self.voiced_ms = self.silence_ms = self.partial_ms = 0
+        self.speech_end_time = now
+        self.speculation = None
+        await self.send({"type": "speech_start", "turn": self.turn})
+
+    async def end_turn(self):
+        """Close the open turn; reuses the speculative transcript if speech did not resume"""
+        audio_ms = len(self.utterance) * VAD_FRAME_MS
+        speculative = self.speculation is not None
+        transcription = self.speculation or self.transcribe()
+        self.in_speech = False
+        self.utterance = []
+        self.speculation = None
+        self.voiced_ms = 0
+        await self.send({"type": "speech_end", "turn": self.turn, "audio_ms": audio_ms})
+        self.spawn(self.send_final(self.turn, transcription, self.speech_end_time, audio_ms, speculative))
+
+    async def send_partial(self, turn: int, transcription: asyncio.Task):
+        try:
+            text, _, _ = await transcription
+        except Exception as e:
+            print(f"⚠️ Partial transcription failed: {e}")
+            return
+        if text and self.in_speech and turn == self.turn:
+            await self.send({"type": "partial", "turn": turn, "text": text})
+
+    async def send_final(self, turn: int, transcription: asyncio.Task, speech_end_time: float,
+                         audio_ms: int, speculative: bool):
+        try:
+            text, language, transcribe_ms = await transcription
+        except Exception as e:
+            await self.send({"type": "error", "turn": turn, "detail": f"Transcription failed: {str(e)}"})
+            return
+
+        latency_ms = (time.perf_counter() - speech_end_time) * 1000
+        print(f"🗣️ Turn {turn}: {audio_ms} ms audio, transcript {latency_ms:.0f} ms after end of speech "
+              f"(transcribe {transcribe_ms:.0f} ms{', speculative' if speculative else ''})")
+        await self.send({
+            "type": "final",
+            "turn": turn,
+            "text": text,
+            "language": language,
+            "audio_ms": audio_ms,
+            "transcribe_ms": round(transcribe_ms, 1),
+            "latency_ms": round(latency_ms, 1),
+            "speculative": speculative
+        })
+
+    async def synthesize(self, text: str, language: str):
+        start_time = time.perf_counter()
+        try:
+            audio = await tts_backend.synthesize(text, language)
+        except Exception as e:
+            await self.send({"type": "error", "detail": f"Synthesis failed: {str(e)}"})
+            return
+        await self.send({
+            "type": "tts",
+            "text": text,
+            "format": "wav",
+            "bytes": len(audio),
+            "latency_ms": round((time.perf_counter() - start_time) * 1000, 1)
+        }, audio=audio)
+
+    async def handle(self, message: Dict):
+        """Handle a JSON control message"""
+        kind = message.get("type")
+        if kind == "config":
+            language = message.get("language")
+            if language is not None and language not in SUPPORTED_LANGUAGES:
+                await self.send({"type": "error", "detail": f"Unsupported language: {language}"})
+                return
+            sample_rate = message.get("sample_rate", self.sample_rate)
+            try:
+                sample_rate = int(sample_rate)
+            except (TypeError, ValueError):
+                sample_rate = None
+            if sample_rate is None or not 8000 <= sample_rate <= 48000:
+                await self.send({"type": "error", "detail": f"Unsupported sample_rate: {message['sample_rate']}"})
+                return
+            self.language = language
+            self.sample_rate = sample_rate
+        elif kind == "flush":
+            if self.in_speech:
+                await self.end_turn()
+        elif kind == "synthesize":
+            text = str(message.get("text", "")).strip()
+            if not text:
+                await self.send({"type": "error", "detail": "Empty text"})
+                return
+            if tts_backend is None:
+                await self.send({"type": "error", "detail": "No TTS backend configured"})
+                return
+            self.spawn(self.synthesize(text, message.get("language") or self.language or "en"))
+        else:
+            await self.send({"type": "error", "detail": f"Unknown message type: {kind}"})
+
+    def close(self):
+        self.closed = True
+        for task in list(self.tasks):
+            task.cancel()
+
+
+@app.websocket("/session")
+async def voice_session(websocket: WebSocket):
+    """
+    Full-duplex streaming voice session
+
+    Client -> server:
+        binary: 16-bit little-endian mono PCM (16 kHz unless configured)
+        {"type": "config", "language": "de", "sample_rate": 48000}
+        {"type": "flush"}  # close the current turn now (e.g. push-to-talk release)
+        {"type": "synthesize", "text": "...", "language": "de"}
+
+    Server -> client:
+        {"type": "ready", ...}
+        {"type": "speech_start" | "speech_end", "turn": n, ...}
+        {"type": "partial", "turn": n, "text": "..."}
+        {"type": "final", "turn": n, "text": "...", "latency_ms": ...}
+        {"type": "tts", "bytes": n, ...} followed by a binary WAV message
+        {"type": "error", "detail": "..."}
+
+    latency_ms on a final transcript is measured from the arrival of the
+    last voiced audio frame of the turn to the transcript being sent.
+    """
+    await websocket.accept()
+    if whisper_model is None:
+        await websocket.close(code=1013, reason="Whisper model not loaded")
+        return
+
+    session = VoiceSession(websocket)
+    await session.send({
+        "type": "ready",
+        "sample_rate": WHISPER_SAMPLE_RATE,
+        "frame_ms": VAD_FRAME_MS,
+        "endpoint_silence_ms": ENDPOINT_SILENCE_MS,
+        "tts": tts_backend.name if tts_backend else None
+    })
+
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            if message.get("bytes") is not None:
+                await session.feed(message["bytes"])
+            elif message.get("text") is not None:
+                try:
+                    payload = json.loads(message["text"])
+                except ValueError:
+                    payload = None
+                if not isinstance(payload, dict):
+                    await session.send({"type": "error", "detail": "Expected a JSON object"})
+                    continue
+                await session.handle(payload)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        session.close()
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8765, log_level="info")